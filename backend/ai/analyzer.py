@@ -1,4 +1,6 @@
 import pandas as pd
+from backend.utils.event_store import read_events
+from backend.utils.heavy_hitters import heavy_hitters
 
 def analyze_logs(df: pd.DataFrame):
     """Basic analysis for anomalies and alert patterns."""
@@ -35,3 +37,43 @@ def analyze_logs(df: pd.DataFrame):
         })
 
     return insights
+
+
+def analyze_stored_logs(start=None, end=None, stage="enriched"):
+    """Run analyze_logs over the columnar event store for a time range.
+
+    Only the four columns the analysis uses are read, and days outside
+    [start, end) are skipped without being opened.
+    """
+    df = read_events(
+        stage,
+        columns=["user", "src_ip", "alert_score", "prelim_priority"],
+        start=start,
+        end=end
+    )
+    return analyze_logs(df)
+
+
+def analyze_recent(window="24h", limit=5):
+    """Same findings as analyze_logs, answered from the streaming top-K
+    trackers instead of groupby passes over the data."""
+    store = heavy_hitters.refresh()
+    if not store.events:
+        return [{"message": "No log data available"}]
+
+    insights = []
+    for user, count, _ in store.top("user_high", limit, window):
+        insights.append({
+            "user": user,
+            "finding": f"{int(count)} high-priority alerts detected for {user}"
+        })
+
+    for ip, total, _ in store.top("ip_risk", limit, window):
+        events = store.estimate("ip_events", ip, window)
+        avg = total / events if events else 0
+        insights.append({
+            "ip": ip,
+            "finding": f"IP {ip} shows avg alert score {avg:.2f}"
+        })
+
+    return insights
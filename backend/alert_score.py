@@ -9,18 +9,19 @@ from sklearn.preprocessing import MinMaxScaler
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report
+from backend.utils.event_store import write_events
 
 DATA_PATH = "../data/enriched_logs.csv"
 OUT_PATH  = "../data/final_alerts.csv"
 
 def load_data(path=DATA_PATH):
     print(f"📘 Loading enriched logs from: {path}")
-    df = pd.read_csv(path)
-    # fill missing numeric columns
-    df["alert_score"] = df["alert_score"].fillna(0)
-    df["ti_score"] = df["ti_score"].fillna(0)
-    df["ip_score"] = df["ip_score"].fillna(0)
-    df["result_flag"] = df["result_flag"].fillna(0)
+    return fill_features(pd.read_csv(path))
+
+def fill_features(df: pd.DataFrame):
+    # fill missing numeric columns (absent or unparseable values count as 0)
+    for col in ["alert_score", "ti_score", "ip_score", "result_flag"]:
+        df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0) if col in df.columns else 0
     return df
 
 def prepare_features(df: pd.DataFrame):
@@ -66,6 +67,7 @@ def main():
     df = load_data()
     df_final = train_model(df)
     df_final.to_csv(OUT_PATH, index=False)
+    write_events(df_final, stage="final_alerts")
     print(f"✅ Final alert scoring complete → {OUT_PATH}")
     print(df_final[["timestamp","user","src_ip","final_priority"]].head(10))
 
@@ -1,4 +1,4 @@
-from flask import Flask, jsonify, render_template
+from flask import Flask, jsonify, render_template, request
 from flask_cors import CORS
 import psycopg2
 import pandas as pd
@@ -7,6 +7,11 @@ from backend.routes.logs import logs_bp
 from backend.routes.insights_ai import ai_bp
 from backend.utils.db_config import get_connection
 from backend.routes.alerts import alerts_bp
+from backend.routes.admin import admin_bp
+from backend.utils.profiler import install_profiler
+from backend.utils.response_cache import cached_json
+from backend.utils.stats_engine import fetch_summary, fetch_series, SERIES_WINDOWS
+from backend.utils.telemetry import TimedConnection, install_request_metrics, metrics_response
 # ----------------------------
 # PATH SETUP
 # ----------------------------
@@ -23,6 +28,8 @@ app = Flask(
     template_folder=str(TEMPLATES_DIR)
 )
 CORS(app)
+install_request_metrics(app)
+install_profiler(app)
 
 # ----------------------------
 # DATABASE CONFIG
@@ -39,13 +46,14 @@ DB_CONFIG = {
 app.register_blueprint(logs_bp)
 app.register_blueprint(ai_bp)
 app.register_blueprint(alerts_bp)
+app.register_blueprint(admin_bp)
 # ----------------------------
 # DATABASE HELPER
 # ----------------------------
 def fetch_df(query: str):
     """Run SQL query and return a pandas DataFrame."""
     try:
-        conn = psycopg2.connect(**DB_CONFIG)
+        conn = psycopg2.connect(**DB_CONFIG, connection_factory=TimedConnection)
         df = pd.read_sql(query, conn)
         conn.close()
         return df
@@ -66,6 +74,7 @@ def dashboard():
 # ----------------------------
 
 @app.route("/api/alerts/", methods=["GET"])
+@cached_json("alerts_joined")
 def get_alerts():
     """Fetch joined log data for display."""
     query = """
@@ -89,34 +98,54 @@ def get_alerts():
     return jsonify(df.to_dict(orient="records"))
 
 @app.route("/api/stats/", methods=["GET"])
+@cached_json("stats")
 def get_stats():
     """Return aggregate statistics for dashboard cards."""
-    query = """
-        SELECT 
-            COUNT(*) AS total_alerts,
-            SUM(CASE WHEN e.prelim_priority ILIKE 'HIGH' THEN 1 ELSE 0 END) AS critical_alerts,
-            COUNT(DISTINCT e.user_id) AS unique_users,
-            ROUND(AVG(e.alert_score)::numeric, 6) AS avg_risk_score
-        FROM enriched_logs e;
-    """
-    df = fetch_df(query)
-    if df.empty:
+    conn = get_connection()
+    if not conn:
+        return jsonify({"error": "DB not connected"}), 500
+    try:
+        summary = fetch_summary(conn, "enriched_logs")
+    except Exception as e:
+        print("❌ Stats query error:", e)
+        return jsonify({"error": str(e)}), 500
+    finally:
+        conn.close()
+
+    if not summary["total"]:
         return jsonify({"error": "No data found"}), 404
 
-    stats = df.iloc[0].to_dict()
-    
     # 🔥 Fix scaling for readability
-    avg_score = float(stats.get("avg_risk_score", 0.0)) * 10000
-
+    avg_score = round(summary["avg_score"], 6) * 10000
 
     return jsonify({
-        "total_alerts": int(stats.get("total_alerts", 0)),
-        "critical_alerts": int(stats.get("critical_alerts", 0)),
-        "unique_users": int(stats.get("unique_users", 0)),
+        "total_alerts": summary["total"],
+        "critical_alerts": summary["by_priority"]["HIGH"],
+        "unique_users": summary["unique_users"],
         "avg_risk_score": round(avg_score, 2)
     })
 
 
+@app.route("/api/stats/series", methods=["GET"])
+@cached_json("stats_series")
+def get_stats_series():
+    """Return time-bucketed alert counts (window=1h|24h|7d) for charts."""
+    window = request.args.get("window", "24h")
+    if window not in SERIES_WINDOWS:
+        return jsonify({"error": f"Unsupported window: {window}"}), 400
+
+    conn = get_connection()
+    if not conn:
+        return jsonify({"error": "DB not connected"}), 500
+    try:
+        return jsonify(fetch_series(conn, "enriched_logs", window))
+    except Exception as e:
+        print("❌ Stats series error:", e)
+        return jsonify({"error": str(e)}), 500
+    finally:
+        conn.close()
+
+
 @app.route("/api/insights/", methods=["GET"])
 def get_insights():
     """Static insights placeholder — to be replaced by Agentic AI."""
@@ -127,6 +156,11 @@ def get_insights():
         ]
     })
 
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Prometheus metrics: request latency, DB timings, TI lookups."""
+    return metrics_response()
+
 @app.route("/api/health/", methods=["GET"])
 def health_check():
     """Check DB connection and record count."""
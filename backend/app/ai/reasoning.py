@@ -0,0 +1,416 @@
+import asyncio
+import hashlib
+import ipaddress
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from openai import AsyncOpenAI
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.alert import Alert
+from app.models.reasoning_cache import ReasoningCache
+
+
+PRIORITY_RANK = {"LOW": 0, "MEDIUM": 1, "HIGH": 2, "CRITICAL": 3}
+
+# IPs and numbers vary between otherwise identical alerts
+_SPECIFICS = re.compile(r"\b(?:\d{1,3}\.){3}\d{1,3}\b|\d+")
+
+SYSTEM_PROMPT = (
+    "You are a cloud IAM security analyst. For each alert pattern in the input, "
+    "explain in 2-3 sentences why it is suspicious and what to check first. "
+    "Do not mention specific users or IP addresses. Reply with JSON: "
+    '{"results": [{"index": <int>, "reasoning": <string>}]}'
+)
+
+
+def _ip_scope(event):
+
+    if event.get("ip_scope"):
+        return event["ip_scope"]
+
+    try:
+        return "private" if ipaddress.ip_address(event.get("src_ip", "")).is_private else "external"
+    except ValueError:
+        return "unknown"
+
+
+def alert_signature(event: dict, model: str = ""):
+    """Normalize an alert to its pattern and return (sha256, pattern).
+
+    User names, escalation-chain principals, IPs and numbers are stripped,
+    so alerts that differ only in who / where share one cached reasoning.
+    The model name is part of the digest: switching backends (e.g. from the
+    local stub to OpenAI) must not keep serving the old backend's texts.
+    """
+
+    user = event.get("user")
+    # "role:Admin" -> "role"; the shape of a chain matters, not who is in it
+    principals = sorted(
+        (event.get("escalation") or {}).get("principals") or [], key=len, reverse=True
+    )
+    reasons = set()
+
+    for reason in event.get("reasons") or []:
+        for principal in principals:
+            reason = reason.replace(principal, principal.split(":", 1)[0])
+        if user:
+            reason = reason.replace(str(user), "<user>")
+        reasons.add(_SPECIFICS.sub("#", reason))
+
+    pattern = {
+        "action": event.get("action") or event.get("event_type"),
+        "priority": event.get("priority") or event.get("severity"),
+        "result": event.get("result"),
+        "ip_scope": _ip_scope(event),
+        "reasons": sorted(reasons)
+    }
+
+    digest = hashlib.sha256(json.dumps({"model": model, **pattern}, sort_keys=True).encode()).hexdigest()
+
+    return digest, pattern
+
+
+# ---------------- BACKENDS ----------------
+
+class LocalStubBackend:
+    """Deterministic offline stand-in with the same interface as the model."""
+
+    name = "local-stub"
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+
+    async def complete(self, patterns):
+
+        if self.delay:
+            await asyncio.sleep(self.delay)
+
+        texts = []
+
+        for pattern in patterns:
+            reasons = "; ".join(pattern["reasons"]) or "no specific indicators"
+            texts.append(
+                f"{pattern['priority']} {pattern['action']} from a {pattern['ip_scope']} source "
+                f"(result: {pattern['result'] or 'n/a'}). Indicators: {reasons}. "
+                f"Confirm the activity with the identity owner and review recent IAM changes."
+            )
+
+        prompt_tokens = sum(len(json.dumps(p).split()) for p in patterns)
+        completion_tokens = sum(len(t.split()) for t in texts)
+
+        return texts, {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens}
+
+
+class OpenAIBackend:
+    """One chat completion per batch of alert patterns."""
+
+    def __init__(self, model: str, api_key: str):
+        self.name = model
+        self.client = AsyncOpenAI(api_key=api_key)
+
+    async def complete(self, patterns):
+
+        response = await self.client.chat.completions.create(
+            model=self.name,
+            temperature=0,
+            response_format={"type": "json_object"},
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": json.dumps(
+                    {"alerts": [{"index": i, **p} for i, p in enumerate(patterns)]}
+                )}
+            ]
+        )
+
+        data = json.loads(response.choices[0].message.content)
+        by_index = {item.get("index"): item.get("reasoning") for item in data.get("results", [])}
+        usage = response.usage
+
+        return (
+            [by_index.get(i) for i in range(len(patterns))],
+            {"prompt_tokens": usage.prompt_tokens, "completion_tokens": usage.completion_tokens}
+        )
+
+
+def build_backend():
+
+    if settings.AI_REASONING_BACKEND == "openai":
+        if settings.OPENAI_API_KEY:
+            return OpenAIBackend(settings.AI_REASONING_MODEL, settings.OPENAI_API_KEY)
+        print("⚠️ AI_REASONING_BACKEND=openai but OPENAI_API_KEY is not set; using local stub")
+
+    return LocalStubBackend()
+
+
+# ---------------- SERVICE ----------------
+
+class ReasoningService:
+    """Fills `Alert.ai_reasoning` in the background.
+
+    Alerts below `min_priority` are skipped. The rest are reduced to a
+    pattern signature: a signature already answered (memory LRU, then the
+    `ai_reasoning_cache` table) costs no model call, identical signatures
+    waiting in the queue share one slot, and up to `batch_size` distinct
+    patterns go to the model in a single request. `submit()` is cheap and
+    safe to call from worker threads.
+    """
+
+    def __init__(self, backend, min_priority="HIGH", batch_size=8, batch_wait=0.5,
+                 queue_size=1000, cache_size=5000, session_factory=SessionLocal):
+        self.backend = backend
+        self.min_rank = PRIORITY_RANK.get(min_priority.upper(), 2)
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.queue_size = queue_size
+        self.cache_size = cache_size
+        self.session_factory = session_factory
+
+        self._cache = OrderedDict()      # signature -> reasoning
+        self._waiting = {}               # signature -> {"pattern", "alert_ids"}
+        self._in_flight = {}             # signatures currently being answered
+        self._fills = []                 # (alert_id, reasoning) ready to write
+        self._wakeup = None
+        self._loop = None
+        self._task = None
+        self._lock = threading.Lock()
+
+        self.counters = dict.fromkeys([
+            "submitted", "below_threshold", "cache_hits", "db_cache_hits", "coalesced",
+            "model_calls", "model_alerts", "dropped", "errors", "filled",
+            "prompt_tokens", "completion_tokens"
+        ], 0)
+        self.model_seconds = 0.0
+        self.max_model_seconds = 0.0
+
+    # ---------------- producer side ----------------
+
+    def submit(self, alert_id, event: dict):
+
+        if self._loop is None:
+            return False
+
+        priority = (event.get("priority") or event.get("severity") or "LOW").upper()
+
+        with self._lock:
+            self.counters["submitted"] += 1
+            if PRIORITY_RANK.get(priority, 0) < self.min_rank:
+                self.counters["below_threshold"] += 1
+                return False
+
+        digest, pattern = alert_signature(event, self.backend.name)
+        self._loop.call_soon_threadsafe(self._accept, alert_id, digest, pattern)
+
+        return True
+
+    def _accept(self, alert_id, digest, pattern):
+
+        cached = self._cache.get(digest)
+
+        if cached is not None:
+            self._cache.move_to_end(digest)
+            self.counters["cache_hits"] += 1
+            self._fills.append((alert_id, cached))
+
+        elif digest in self._waiting or digest in self._in_flight:
+            self.counters["coalesced"] += 1
+            job = self._waiting.get(digest) or self._in_flight[digest]
+            job["alert_ids"].append(alert_id)
+
+        elif len(self._waiting) >= self.queue_size:
+            self.counters["dropped"] += 1
+            return
+
+        else:
+            self._waiting[digest] = {"pattern": pattern, "alert_ids": [alert_id]}
+
+        self._wakeup.set()
+
+    # ---------------- cache ----------------
+
+    def _remember(self, digest, reasoning):
+
+        self._cache[digest] = reasoning
+        self._cache.move_to_end(digest)
+
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _load_cached(self, digests):
+
+        db = self.session_factory()
+
+        try:
+            rows = db.execute(
+                select(ReasoningCache.signature, ReasoningCache.reasoning)
+                .where(ReasoningCache.signature.in_(digests), ReasoningCache.model == self.backend.name)
+            ).all()
+            return dict(rows)
+        finally:
+            db.close()
+
+    def _store_cached(self, entries):
+
+        db = self.session_factory()
+
+        try:
+            db.execute(
+                insert(ReasoningCache)
+                .values([{"signature": d, "reasoning": r, "model": self.backend.name} for d, r in entries])
+                .on_conflict_do_nothing(index_elements=[ReasoningCache.signature])
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def _write_fills(self, fills):
+
+        by_text = {}
+
+        for alert_id, reasoning in fills:
+            by_text.setdefault(reasoning, []).append(alert_id)
+
+        db = self.session_factory()
+
+        try:
+            for reasoning, ids in by_text.items():
+                db.execute(update(Alert).where(Alert.id.in_(ids)).values(ai_reasoning=reasoning))
+            db.commit()
+        finally:
+            db.close()
+
+    # ---------------- worker ----------------
+
+    async def _process(self, batch):
+
+        digests = [digest for digest, _ in batch]
+        stored = await asyncio.to_thread(self._load_cached, digests)
+
+        pending = []
+
+        for digest, job in batch:
+            if digest in stored:
+                self.counters["db_cache_hits"] += 1
+                self._remember(digest, stored[digest])
+                self._fills.extend((alert_id, stored[digest]) for alert_id in job["alert_ids"])
+            else:
+                pending.append((digest, job))
+
+        if not pending:
+            return
+
+        started = time.perf_counter()
+        texts, usage = await self.backend.complete([job["pattern"] for _, job in pending])
+        elapsed = time.perf_counter() - started
+
+        self.counters["model_calls"] += 1
+        self.counters["model_alerts"] += len(pending)
+        self.counters["prompt_tokens"] += usage.get("prompt_tokens", 0)
+        self.counters["completion_tokens"] += usage.get("completion_tokens", 0)
+        self.model_seconds += elapsed
+        self.max_model_seconds = max(self.max_model_seconds, elapsed)
+
+        answered = []
+
+        for (digest, job), text in zip(pending, texts):
+            if not text:
+                self.counters["errors"] += 1
+                continue
+            self._remember(digest, text)
+            answered.append((digest, text))
+            self._fills.extend((alert_id, text) for alert_id in job["alert_ids"])
+
+        if answered:
+            await asyncio.to_thread(self._store_cached, answered)
+
+    async def _run(self):
+
+        while True:
+
+            await self._wakeup.wait()
+
+            # give a burst a moment to fill the batch
+            if 0 < len(self._waiting) < self.batch_size:
+                await asyncio.sleep(self.batch_wait)
+
+            self._wakeup.clear()
+
+            batch = []
+            for digest in list(self._waiting)[:self.batch_size]:
+                batch.append((digest, self._waiting.pop(digest)))
+
+            self._in_flight = dict(batch)
+
+            try:
+                if batch:
+                    await self._process(batch)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.counters["errors"] += len(batch)
+                print("❌ AI reasoning batch failed:", e)
+            finally:
+                self._in_flight = {}
+
+            fills, self._fills = self._fills, []
+
+            if fills:
+                try:
+                    await asyncio.to_thread(self._write_fills, fills)
+                    self.counters["filled"] += len(fills)
+                except Exception as e:
+                    print("❌ Writing ai_reasoning failed:", e)
+
+            if self._waiting or self._fills:
+                self._wakeup.set()
+
+    async def start(self):
+
+        if self._task is not None:
+            return
+
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+
+        self._loop = None
+
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self):
+
+        lookups = self.counters["cache_hits"] + self.counters["db_cache_hits"] + self.counters["model_alerts"]
+        calls = self.counters["model_calls"]
+
+        return {
+            "backend": self.backend.name,
+            **self.counters,
+            "pending_patterns": len(self._waiting),
+            "cache_entries": len(self._cache),
+            "cache_hit_rate": round(
+                (self.counters["cache_hits"] + self.counters["db_cache_hits"]) / lookups, 4
+            ) if lookups else 0.0,
+            "avg_model_latency_ms": round(1000 * self.model_seconds / calls, 3) if calls else 0.0,
+            "max_model_latency_ms": round(1000 * self.max_model_seconds, 3)
+        }
+
+
+reasoning_service = ReasoningService(
+    build_backend(),
+    min_priority=settings.AI_REASONING_MIN_PRIORITY,
+    batch_size=settings.AI_REASONING_BATCH_SIZE,
+    batch_wait=settings.AI_REASONING_BATCH_WAIT,
+    queue_size=settings.AI_REASONING_QUEUE_SIZE,
+    cache_size=settings.AI_REASONING_CACHE_SIZE
+)
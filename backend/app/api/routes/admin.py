@@ -0,0 +1,68 @@
+import hmac
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel
+
+from app.core.config import settings
+from app.core.profiler import profiler
+
+router = APIRouter(prefix="/admin")
+
+
+def require_admin(x_admin_token: str = Header(default="")):
+
+    # admin endpoints stay closed until a token is configured; compared as
+    # bytes, since compare_digest raises TypeError on non-ASCII str
+    if not settings.ADMIN_TOKEN or not hmac.compare_digest(x_admin_token.encode(), settings.ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+
+class ProfilerConfig(BaseModel):
+    enabled: Optional[bool] = None
+    sample_rate: Optional[float] = None
+    interval: Optional[float] = None
+    top_n: Optional[int] = None
+
+
+@router.get("/profiler", dependencies=[Depends(require_admin)])
+def profiler_status():
+
+    return {
+        **profiler.stats(),
+        "profiles": profiler.profiles()
+    }
+
+
+@router.post("/profiler", dependencies=[Depends(require_admin)])
+def configure_profiler(config: ProfilerConfig):
+
+    profiler.configure(**config.model_dump())
+
+    return profiler.stats()
+
+
+@router.get("/profiler/flamegraph.folded", dependencies=[Depends(require_admin)])
+def download_all_profiles():
+
+    return PlainTextResponse(profiler.folded())
+
+
+@router.get("/profiler/profiles/{profile_id}.folded", dependencies=[Depends(require_admin)])
+def download_profile(profile_id: int):
+
+    folded = profiler.folded(profile_id)
+
+    if folded is None:
+        raise HTTPException(status_code=404, detail="Profile not found (evicted or never kept)")
+
+    return PlainTextResponse(folded)
+
+
+@router.delete("/profiler/profiles", dependencies=[Depends(require_admin)])
+def clear_profiles():
+
+    profiler.clear()
+
+    return {"status": "cleared"}
@@ -0,0 +1,11 @@
+from fastapi import APIRouter
+
+from app.ai.reasoning import reasoning_service
+
+router = APIRouter()
+
+
+@router.get("/ai/reasoning-stats")
+def reasoning_stats():
+
+    return reasoning_service.stats()
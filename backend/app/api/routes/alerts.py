@@ -1,13 +1,48 @@
-from fastapi import APIRouter, Depends
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
 from app.models.alert import Alert
+from app.services.alert_archive import reaches_archive, read_archived_alerts
 
 router = APIRouter()
 
 
+def _row(alert: Alert):
+
+    return {column.name: getattr(alert, column.name) for column in Alert.__table__.columns}
+
+
 @router.get("/alerts")
-def get_alerts(db: Session = Depends(get_db)):
+def get_alerts(
+    since: datetime = None,
+    until: datetime = None,
+    limit: int = Query(None, ge=1, le=5000),
+    db: Session = Depends(get_db)
+):
+
+    query = db.query(Alert)
+
+    if since is not None:
+        query = query.filter(Alert.timestamp >= since)
+    if until is not None:
+        query = query.filter(Alert.timestamp < until)
+
+    if since is None:
+        query = query.order_by(Alert.id.desc())
+        return query.limit(limit).all() if limit else query.all()
+
+    # a range that reaches back past the retention window also reads the
+    # Parquet archive written by the retention job
+    limit = limit or 1000
+    hot = [_row(alert) for alert in query.order_by(Alert.timestamp.desc()).limit(limit)]
+
+    if not reaches_archive(since):
+        return hot
+
+    cold = read_archived_alerts(since, until or datetime.utcnow(), limit)
+    merged = sorted(hot + cold, key=lambda row: row["timestamp"] or datetime.min, reverse=True)
 
-    return db.query(Alert).order_by(Alert.id.desc()).all()
\ No newline at end of file
+    return merged[:limit]
@@ -1,42 +1,61 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Response
 from pydantic import BaseModel
 from typing import Any
+import asyncio
 import json
 
-from app.parsing.parser import parse_cloudtrail_event
-from app.detection.risk_engine import calculate_risk
+import orjson
+
 from app.ai.explain import generate_explanation
+from app.core.admission import PROTECTED_PRIORITIES, Overloaded, analyze_admission, too_many_requests
+from app.services.analysis_pool import analysis_pool, analyze_records
+from app.services.analysis_store import analysis_store
 
 router = APIRouter()
 
 class LogRequest(BaseModel):
     logs: Any
+    # scores, priorities and reason codes only; details via the lazy endpoints
+    compact: bool = False
 
-@router.post("/api/analyze-logs")
-async def analyze_logs(payload: LogRequest):
 
-    logs = payload.logs
+COMPACT_FIELDS = ("action", "user", "src_ip", "timestamp", "risk_score", "priority", "reason_codes")
 
-    if isinstance(logs, str):
-        logs = json.loads(logs)
-
-    if isinstance(logs, dict):
-        logs = [logs]
+def build_response(scored_events, compact: bool, defer_low: bool = False):
 
     alerts = []
+    deferred = 0
 
-    for log in logs:
+    # under pressure LOW alerts come back compact; their explanation and
+    # raw event stay available from the lazy endpoints
+    if compact:
+        stored = scored_events
+    elif defer_low:
+        stored = [s for s in scored_events if s.get("priority") not in PROTECTED_PRIORITIES]
+    else:
+        stored = []
 
-        parsed = parse_cloudtrail_event(log)
+    try:
+        alert_ids = dict(zip(map(id, stored), analysis_store.put_many(stored)))
+    except Overloaded:
+        if compact:
+            raise
+        # no room to keep them: deferred alerts go out in full after all
+        alert_ids = {}
 
-        scored = calculate_risk(parsed)
+    for scored in scored_events:
 
-        explanation = generate_explanation(scored)
+        alert_id = alert_ids.get(id(scored))
 
-        alerts.append({
-            **scored,
-            "explanation": explanation
-        })
+        if alert_id:
+            alerts.append({"alert_id": alert_id, **{k: scored.get(k) for k in COMPACT_FIELDS}})
+            deferred += not compact
+        else:
+            if "explanation" not in scored:
+                scored["explanation"] = generate_explanation(scored)
+            alerts.append(scored)
+
+    analyze_admission.record_deferred(deferred)
 
     alerts = sorted(
         alerts,
@@ -44,9 +63,80 @@ async def analyze_logs(payload: LogRequest):
         reverse=True
     )
 
-    return {
-        "total_logs": len(logs),
+    response = {
+        "total_logs": len(scored_events),
         "total_alerts": len(alerts),
         "top_alert": alerts[0] if alerts else None,
         "alerts": alerts
-    }
\ No newline at end of file
+    }
+
+    if defer_low:
+        response["deferred_low"] = deferred
+
+    return response
+
+
+@router.post("/api/analyze-logs")
+async def analyze_logs(payload: LogRequest):
+
+    try:
+        with analyze_admission.admit():
+            return await analyze(payload)
+    except Overloaded as e:
+        raise too_many_requests(e)
+
+
+async def analyze(payload: LogRequest):
+
+    logs = payload.logs
+
+    if isinstance(logs, str):
+        logs = json.loads(logs)
+
+    if isinstance(logs, dict):
+        logs = [logs]
+
+    # every compact alert needs a store entry, so a larger batch could
+    # never be stored
+    if payload.compact and len(logs) > analysis_store.max_entries:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Compact analysis is limited to {analysis_store.max_entries} logs per request"
+        )
+
+    # compact responses explain lazily, and so do LOW alerts under pressure;
+    # build_response explains whatever is still returned in full
+    defer_low = not payload.compact and analyze_admission.under_pressure()
+    explain = not payload.compact and not defer_low
+
+    if not analysis_pool.use_pool(len(logs)):
+        return build_response(analyze_records(logs, explain=explain), payload.compact, defer_low)
+
+    scored = await analysis_pool.analyze(logs, explain=explain)
+
+    # building, sorting and encoding 200k alerts would block the loop as well
+    def encode():
+        return orjson.dumps(build_response(scored, payload.compact, defer_low), default=str)
+
+    return Response(await asyncio.to_thread(encode), media_type="application/json")
+
+@router.get("/api/analyze-logs/alerts/{alert_id}/explanation")
+def alert_explanation(alert_id: str):
+
+    explanation = analysis_store.explanation(alert_id)
+
+    if explanation is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired alert")
+
+    return {"alert_id": alert_id, "explanation": explanation}
+
+
+@router.get("/api/analyze-logs/alerts/{alert_id}/raw")
+def alert_raw_event(alert_id: str):
+
+    raw_event = analysis_store.raw_event(alert_id)
+
+    if raw_event is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired alert")
+
+    return {"alert_id": alert_id, "raw_event": raw_event}
@@ -1,21 +1,46 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 
+from app.core.cache import response_cache
 from app.core.database import get_db
-from app.models.alert import Alert
+from app.services.metrics_service import (
+    dashboard_counters,
+    dashboard_series,
+    SERIES_WINDOWS
+)
 
 router = APIRouter()
 
 
 @router.get("/dashboard-metrics")
-def metrics(db: Session = Depends(get_db)):
+def metrics(request: Request, db: Session = Depends(get_db)):
 
-    total = db.query(Alert).count()
-    critical = db.query(Alert).filter(Alert.severity == "CRITICAL").count()
-    high = db.query(Alert).filter(Alert.severity == "HIGH").count()
+    def build():
 
-    return {
-        "total_alerts": total,
-        "critical_alerts": critical,
-        "high_alerts": high
-    }
\ No newline at end of file
+        counters = dashboard_counters(db, "alerts")
+
+        return {
+            "total_alerts": counters["total"],
+            "critical_alerts": counters["by_priority"]["CRITICAL"],
+            "high_alerts": counters["by_priority"]["HIGH"],
+            "medium_alerts": counters["by_priority"]["MEDIUM"],
+            "low_alerts": counters["by_priority"]["LOW"],
+            "unique_users": counters["unique_users"],
+            "avg_risk_score": round(counters["avg_score"], 2)
+        }
+
+    return response_cache.respond(
+        request, db, "dashboard-metrics", ("alerts",), build
+    )
+
+
+@router.get("/dashboard-metrics/series")
+def metrics_series(request: Request, window: str = "24h", db: Session = Depends(get_db)):
+
+    if window not in SERIES_WINDOWS:
+        raise HTTPException(status_code=400, detail=f"Unsupported window: {window}")
+
+    return response_cache.respond(
+        request, db, "dashboard-series", ("alerts",),
+        lambda: dashboard_series(db, "alerts", window)
+    )
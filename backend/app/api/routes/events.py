@@ -0,0 +1,47 @@
+from datetime import datetime
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.core.database import get_db
+from app.services.event_search import search_events
+
+router = APIRouter()
+
+
+@router.get("/events/search")
+def search(
+    action: str = None,
+    user: str = None,
+    src_ip: str = None,
+    error_code: str = None,
+    field: List[str] = Query(None, description="Extra filters as key:value, e.g. userIdentity.arn:arn:aws:iam::1:user/x"),
+    q: str = Query(None, description="Substring of the raw log"),
+    since: datetime = None,
+    until: datetime = None,
+    cursor: str = Query(None, description="next_cursor of the previous page"),
+    limit: int = Query(100, ge=1, le=1000),
+    include_raw: bool = False,
+    db: Session = Depends(get_db)
+):
+
+    fields = {
+        name: value
+        for name, value in (("action", action), ("user", user), ("src_ip", src_ip), ("error_code", error_code))
+        if value is not None
+    }
+
+    for item in field or []:
+        if ":" not in item:
+            raise HTTPException(status_code=400, detail=f"Expected key:value, got {item!r}")
+        name, value = item.split(":", 1)
+        fields[name] = value
+
+    try:
+        return search_events(
+            db, fields, contains=q, since=since, until=until,
+            cursor=cursor, limit=limit, include_raw=include_raw
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
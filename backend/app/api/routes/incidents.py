@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.core.database import get_db
+from app.models.incident import Incident
+
+router = APIRouter()
+
+
+@router.get("/incidents")
+def get_incidents(
+    limit: int = Query(100, ge=1, le=1000),
+    status: str = None,
+    db: Session = Depends(get_db)
+):
+
+    query = db.query(Incident)
+
+    if status:
+        query = query.filter(Incident.status == status.upper())
+
+    return query.order_by(Incident.last_seen.desc()).limit(limit).all()
+
+
+@router.get("/incidents/{incident_id}")
+def get_incident(incident_id: int, db: Session = Depends(get_db)):
+
+    incident = db.get(Incident, incident_id)
+
+    if incident is None:
+        raise HTTPException(status_code=404, detail="Incident not found")
+
+    return incident
@@ -1,9 +1,21 @@
-from fastapi import APIRouter, Depends
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 
 from app.core.database import get_db
-from app.services.pipeline_service import process_event
+from app.core.config import settings
+from app.core.admission import Overloaded, analyze_admission, paste_admission, too_many_requests
+from app.core.realtime_engine import EngineOverloaded
+from app.services.event_queue import enqueue_event, enqueue_events, queue_depth, worker_pool
+from app.services.pipeline_service import realtime_engine
+from app.ingestion.file_ingestion import file_ingestion
+from app.ingestion.paste_handler import split_paste
+from app.ingestion.uplod_handler import UploadTooLarge, upload_jobs
+from app.detection.baselines import baseline_store
+from app.detection.correlation_engine import identity_graph
+from app.services.analysis_pool import analysis_pool
 
 router = APIRouter()
 
@@ -12,9 +24,149 @@ class PasteLogRequest(BaseModel):
     log: str
 
 
-@router.post("/paste-log")
+def enqueue_paste(db: Session, text: str):
+
+    logs = split_paste(text)
+
+    if len(logs) > 1:
+        return {
+            "queued": enqueue_events(db, logs),
+            "status": "queued"
+        }
+
+    event_id = enqueue_event(db, logs[0] if logs else text)
+
+    return {
+        "event_id": event_id,
+        "status": "queued"
+    }
+
+
+@router.post("/paste-log", status_code=202)
 async def paste_log(payload: PasteLogRequest, db: Session = Depends(get_db)):
 
-    result = await process_event(payload.log, db)
+    # only the append happens in the request, off the event loop; scoring
+    # runs in the worker pool. A full in-flight budget answers 429 at once
+    # instead of queueing on the DB connection pool.
+    try:
+        with paste_admission.admit():
+            return await asyncio.to_thread(enqueue_paste, db, payload.log)
+    except Overloaded as e:
+        raise too_many_requests(e)
+
+
+# the multipart body is read by the spooler itself, so describe it for the docs
+UPLOAD_FORM = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                    "required": ["file"]
+                }
+            }
+        }
+    }
+}
+
+
+@router.post("/upload-log", status_code=202, openapi_extra=UPLOAD_FORM)
+async def upload_log(request: Request):
+
+    # the file is streamed to disk; parsing and enqueueing run as a background job
+    try:
+        job = await upload_jobs.spool(request)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "size_bytes": job.size_bytes,
+        "status_url": f"/upload-jobs/{job.id}"
+    }
+
+
+@router.get("/upload-jobs")
+def list_upload_jobs():
+
+    return upload_jobs.list()
+
+
+@router.get("/upload-jobs/{job_id}")
+def upload_job_status(job_id: str):
+
+    job = upload_jobs.get(job_id)
+
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired upload job")
+
+    return job
+
+
+@router.get("/queue-stats")
+def queue_stats(db: Session = Depends(get_db)):
+
+    return {
+        **queue_depth(db),
+        **worker_pool.stats(),
+        "file_sources": file_ingestion.stats(),
+        "uploads": upload_jobs.stats(),
+        "admission": {
+            "paste-log": paste_admission.stats(),
+            "analyze-logs": analyze_admission.stats()
+        }
+    }
+
+
+@router.post("/stream-log", status_code=202)
+async def stream_log(payload: PasteLogRequest):
+
+    try:
+        await realtime_engine.submit(payload.log, timeout=settings.ENGINE_SUBMIT_TIMEOUT)
+    except EngineOverloaded:
+        raise HTTPException(
+            status_code=503,
+            detail="Pipeline saturated, retry later",
+            headers={"Retry-After": "1"}
+        )
+
+    return {"status": "accepted"}
+
+
+@router.get("/pipeline-stats")
+def pipeline_stats():
+
+    return {
+        **realtime_engine.stats(),
+        "baselines": baseline_store.stats(),
+        "identity_graph": identity_graph.stats(),
+        "analysis_pool": analysis_pool.stats()
+    }
+
+
+@router.get("/baselines/{kind}/{name}")
+def identity_baseline(kind: str, name: str):
+
+    baseline = baseline_store.identity(f"{kind}:{name}")
+
+    if baseline is None:
+        raise HTTPException(status_code=404, detail="No baseline for this identity")
+
+    return baseline
+
+
+@router.get("/identity-graph/paths")
+def identity_graph_paths(
+    principal: str,
+    direction: str = Query("out", pattern="^(out|in)$"),
+    max_depth: int = Query(None, ge=1, le=8),
+    limit: int = Query(20, ge=1, le=200)
+):
 
-    return result
\ No newline at end of file
+    # principal keys look like user:alice, role:Admin, group:ops or root
+    return identity_graph.paths(principal, direction, max_depth, limit)
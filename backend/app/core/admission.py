@@ -0,0 +1,143 @@
+from contextlib import contextmanager
+
+from fastapi import HTTPException
+from prometheus_client import Counter, Gauge
+
+from app.core.config import settings
+
+
+ADMISSION_IN_FLIGHT = Gauge(
+    "iampact_admission_in_flight", "Requests holding an admission slot", ["endpoint"]
+)
+ADMISSION_REJECTED = Counter(
+    "iampact_admission_rejected_total", "Requests refused with 429 for lack of a slot", ["endpoint"]
+)
+EVENTS_DEGRADED = Counter(
+    "iampact_events_degraded_total",
+    "LOW-risk events sampled out or deferred while under pressure", ["where", "outcome"]
+)
+
+# priorities that are never sampled or deferred
+PROTECTED_PRIORITIES = {"MEDIUM", "HIGH", "CRITICAL"}
+
+
+class Overloaded(Exception):
+    """Raised when an endpoint's in-flight budget is used up."""
+
+    def __init__(self, endpoint: str, retry_after: int):
+        super().__init__(endpoint)
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Bounded in-flight budget for one ingest endpoint.
+
+    A request past `limit` is refused straight away (the route turns
+    Overloaded into 429 + Retry-After) instead of queueing for a database
+    connection. From `shed_ratio` of the budget on, the endpoint reports
+    pressure and callers degrade LOW-risk work. Slots are taken and
+    released on the event loop thread, so plain counters suffice.
+    """
+
+    def __init__(self, endpoint: str, limit: int, shed_ratio: float = 0.75, retry_after: int = 1):
+        self.endpoint = endpoint
+        self.limit = limit
+        self.shed_ratio = shed_ratio
+        self.retry_after = retry_after
+
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.deferred = 0
+
+        self._gauge = ADMISSION_IN_FLIGHT.labels(endpoint)
+        self._rejected = ADMISSION_REJECTED.labels(endpoint)
+
+    @contextmanager
+    def admit(self):
+
+        if self.in_flight >= self.limit:
+            self.rejected += 1
+            self._rejected.inc()
+            raise Overloaded(self.endpoint, self.retry_after)
+
+        self.in_flight += 1
+        self.admitted += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        self._gauge.inc()
+
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._gauge.dec()
+
+    def under_pressure(self):
+
+        return self.in_flight >= self.limit * self.shed_ratio
+
+    def record_deferred(self, count: int):
+
+        if count:
+            self.deferred += count
+            EVENTS_DEGRADED.labels(self.endpoint, "deferred").inc(count)
+
+    def stats(self):
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "under_pressure": self.under_pressure(),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "low_deferred": self.deferred
+        }
+
+
+class LowRiskSampler:
+    """Keeps one LOW-risk event in `every`, counting the rest as sampled out."""
+
+    def __init__(self, where: str, every: int):
+        self.where = where
+        self.every = max(every, 1)
+        self._seen = 0
+        self.kept = 0
+        self.sampled_out = 0
+
+    def keep(self, event: dict):
+
+        if event.get("priority") in PROTECTED_PRIORITIES:
+            return True
+
+        self._seen += 1
+
+        if self._seen % self.every == 0:
+            self.kept += 1
+            return True
+
+        self.sampled_out += 1
+        EVENTS_DEGRADED.labels(self.where, "sampled_out").inc()
+        return False
+
+    def stats(self):
+        return {"sample_every": self.every, "low_kept": self.kept, "low_sampled_out": self.sampled_out}
+
+
+def too_many_requests(e: Overloaded):
+
+    return HTTPException(
+        status_code=429,
+        detail=f"{e.endpoint} is at capacity, retry later",
+        headers={"Retry-After": str(e.retry_after)}
+    )
+
+
+paste_admission = AdmissionController(
+    "paste-log", settings.ADMISSION_PASTE_LIMIT, settings.ADMISSION_SHED_RATIO, settings.ADMISSION_RETRY_AFTER
+)
+analyze_admission = AdmissionController(
+    "analyze-logs", settings.ADMISSION_ANALYZE_LIMIT, settings.ADMISSION_SHED_RATIO, settings.ADMISSION_RETRY_AFTER
+)
+
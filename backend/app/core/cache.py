@@ -0,0 +1,76 @@
+import threading
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.data_version import DataVersion
+from common.response_cache import ResponseCache as SharedResponseCache
+
+
+_local_epochs = {}
+_local_lock = threading.Lock()
+
+
+def bump_data_version(db: Session, name: str):
+    """Mark `name` as changed inside the caller's transaction."""
+
+    stmt = insert(DataVersion).values(name=name, version=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[DataVersion.name],
+        set_={
+            "version": DataVersion.version + 1,
+            "updated_at": stmt.excluded.updated_at
+        }
+    )
+    db.execute(stmt)
+
+    with _local_lock:
+        _local_epochs[name] = _local_epochs.get(name, 0) + 1
+
+
+class ResponseCache(SharedResponseCache):
+    """Version-keyed response cache for the FastAPI dashboard routes.
+
+    Versions are read from the `data_versions` table through the request's
+    session; the cache itself lives in common.response_cache.
+    """
+
+    def __init__(self, ttl, version_poll_interval, max_entries):
+        super().__init__(ttl, version_poll_interval, max_entries, local_epoch=lambda name: _local_epochs.get(name, 0))
+
+    def respond(self, request: Request, db: Session, name: str, depends_on, build):
+        """Serve `build()` from cache, with ETag / If-None-Match support."""
+
+        version = self.version_of(
+            depends_on,
+            lambda: dict(db.execute(select(DataVersion.name, DataVersion.version)).all())
+        )
+        entry = self.get_or_build(
+            (name, str(request.query_params)), version,
+            lambda: {"body": JSONResponse(jsonable_encoder(build())).body}
+        )
+
+        etag = '"' + entry["etag"] + '"'
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+        if_none_match = request.headers.get("if-none-match", "")
+        if etag in [tag.strip() for tag in if_none_match.split(",")]:
+            return Response(status_code=304, headers=headers)
+
+        return Response(
+            content=entry["body"],
+            media_type="application/json",
+            headers=headers
+        )
+
+
+response_cache = ResponseCache(
+    ttl=settings.RESPONSE_CACHE_TTL,
+    version_poll_interval=settings.CACHE_VERSION_POLL_INTERVAL,
+    max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES
+)
@@ -4,8 +4,99 @@ from pydantic_settings import BaseSettings
 class Settings(BaseSettings):
     DATABASE_URL: str
 
+    # response cache for polled dashboard endpoints
+    RESPONSE_CACHE_TTL: float = 30.0
+    CACHE_VERSION_POLL_INTERVAL: float = 2.0
+    RESPONSE_CACHE_MAX_ENTRIES: int = 512
+
+    # durable ingest queue (events table)
+    QUEUE_WORKERS: int = 4
+    QUEUE_BATCH_SIZE: int = 100
+    QUEUE_POLL_INTERVAL: float = 0.5
+    # a batch that failed this often is set aside as dead-letter
+    QUEUE_MAX_ATTEMPTS: int = 5
+
+    # staged realtime engine (/stream-log)
+    ENGINE_QUEUE_SIZE: int = 1000
+    ENGINE_STAGE_CONCURRENCY: str = "normalize=1,enrich=1,score=1,persist=4,broadcast=1"
+    ENGINE_PROCESS_STAGES: str = ""
+    ENGINE_PROCESS_WORKERS: int = 2
+    ENGINE_SUBMIT_TIMEOUT: float = 0.5
+
+    # continuous file ingestion (comma-separated auth.log paths)
+    AUTHLOG_PATHS: str = ""
+    CLOUDTRAIL_DIR: str = ""
+    INGEST_CHECKPOINT_PATH: str = "data/ingest_checkpoint.json"
+    INGEST_POLL_INTERVAL: float = 1.0
+
+    # multipart uploads: spooled to disk, enqueued by background jobs
+    UPLOAD_SPOOL_DIR: str = "data/uploads"
+    UPLOAD_MAX_BYTES: int = 10 * 1024 ** 3
+    UPLOAD_BATCH_SIZE: int = 2000
+    UPLOAD_MAX_CONCURRENT_JOBS: int = 2
+    UPLOAD_MAX_PENDING_EVENTS: int = 200000
+    UPLOAD_DOCUMENT_MAX_BYTES: int = 256 * 1024 ** 2
+
+    # per-identity behavioural baselines
+    BASELINE_PATH: str = "data/baselines.json"
+    BASELINE_MAX_IDENTITIES: int = 10000
+    BASELINE_SAVE_INTERVAL: float = 60.0
+
+    # in-memory identity graph for cross-identity privilege-escalation chains
+    IDENTITY_GRAPH_TTL_SECONDS: int = 3 * 24 * 3600
+    IDENTITY_GRAPH_MAX_DEPTH: int = 4
+    IDENTITY_GRAPH_MAX_EXPANSIONS: int = 5000
+
+    # cold rows moved out by backend/utils/archive.py (day-partitioned Parquet)
+    ARCHIVE_DIR: str = "data/archive"
+
+    # incident aggregation: alerts sharing these fields within one window
+    # update a single incident instead of inserting new alert rows
+    INCIDENT_AGGREGATION: bool = True
+    INCIDENT_KEY: str = "user,src_ip,event_type,priority"
+    INCIDENT_WINDOW_SECONDS: int = 300
+
+    # LLM reasoning for alerts ("stub" runs locally, "openai" needs OPENAI_API_KEY)
+    AI_REASONING_BACKEND: str = "stub"
+    AI_REASONING_MODEL: str = "gpt-4o-mini"
+    OPENAI_API_KEY: str = ""
+    AI_REASONING_MIN_PRIORITY: str = "HIGH"
+    AI_REASONING_BATCH_SIZE: int = 8
+    AI_REASONING_BATCH_WAIT: float = 0.5
+    AI_REASONING_QUEUE_SIZE: int = 1000
+    AI_REASONING_CACHE_SIZE: int = 5000
+
+    # compact /api/analyze-logs: server-side raw events / explanations
+    ANALYSIS_STORE_TTL: float = 3600.0
+    ANALYSIS_STORE_MAX_ENTRIES: int = 50000
+
+    # /api/analyze-logs batches above ANALYZE_INLINE_MAX records are sharded
+    # across a pre-warmed process pool (0 workers keeps every batch inline)
+    ANALYZE_POOL_WORKERS: int = 2
+    ANALYZE_INLINE_MAX: int = 2000
+    ANALYZE_SHARD_SIZE: int = 5000
+
+    # admission control: requests past the in-flight limit get 429 +
+    # Retry-After; from SHED_RATIO of a limit (or a queue lag above
+    # SHED_QUEUE_LAG_SECONDS) LOW-risk events are sampled or deferred
+    ADMISSION_PASTE_LIMIT: int = 32
+    ADMISSION_ANALYZE_LIMIT: int = 4
+    ADMISSION_SHED_RATIO: float = 0.75
+    ADMISSION_RETRY_AFTER: int = 2
+    SHED_QUEUE_LAG_SECONDS: float = 30.0
+    SHED_LOW_SAMPLE_EVERY: int = 10
+
+    # sampling profiler (admin endpoints need ADMIN_TOKEN)
+    PROFILER_ENABLED: bool = False
+    PROFILER_SAMPLE_RATE: float = 0.01
+    PROFILER_INTERVAL: float = 0.005
+    PROFILER_TOP_N: int = 20
+    PROFILER_TOKEN: str = ""
+    PROFILER_PATHS: str = ""
+    ADMIN_TOKEN: str = ""
+
     class Config:
         env_file = ".env"
 
 
-settings = Settings()
\ No newline at end of file
+settings = Settings()
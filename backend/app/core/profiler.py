@@ -0,0 +1,99 @@
+import asyncio
+import functools
+import hmac
+from contextvars import ContextVar
+
+from fastapi.routing import APIRoute
+
+from app.core.config import settings
+from common.profiling import SamplingProfiler
+
+
+# the session of the request being handled, visible to threadpool endpoints
+_request_session = ContextVar("profile_session", default=None)
+
+
+class ProfilingMiddleware:
+    """Profile a sampled fraction of HTTP requests, or any request carrying
+    `X-Profile: <PROFILER_TOKEN>` when a token is configured.
+
+    The session belongs to the request's task, so other requests running
+    on the loop meanwhile are not sampled into it; sync routes need
+    profile_sync_routes() to be followed into the threadpool.
+    """
+
+    def __init__(self, app, profiler: SamplingProfiler, token: str = "", paths=()):
+        self.app = app
+        self.profiler = profiler
+        self.token = token.encode() if token else None
+        self.paths = tuple(paths)
+
+    def _wanted(self, scope):
+
+        if self.paths and not scope["path"].startswith(self.paths):
+            return False
+
+        if self.profiler.should_sample():
+            return True
+
+        if self.token is not None:
+            for name, value in scope["headers"]:
+                if name == b"x-profile":
+                    return hmac.compare_digest(value, self.token)
+
+        return False
+
+    async def __call__(self, scope, receive, send):
+
+        if scope["type"] != "http" or not (self.profiler.enabled or self.token) or not self._wanted(scope):
+            return await self.app(scope, receive, send)
+
+        session = self.profiler.start(f"{scope['method']} {scope['path']}", task=asyncio.current_task())
+        token = _request_session.set(session)
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_session.reset(token)
+            self.profiler.stop(session)
+
+
+def profile_sync_routes(app, profiler: SamplingProfiler):
+    """Make sync (`def`) endpoints sample their threadpool thread.
+
+    Starlette runs them in a worker thread, where the loop-thread session
+    the middleware opened would only see an idle loop. The wrapper moves
+    the session to the worker thread for the duration of the call; call
+    it once all routers are included.
+    """
+
+    for route in app.routes:
+
+        if not isinstance(route, APIRoute) or asyncio.iscoroutinefunction(route.dependant.call):
+            continue
+
+        route.dependant.call = _following(route.dependant.call, profiler)
+
+
+def _following(call, profiler):
+
+    @functools.wraps(call)
+    def profiled(*args, **kwargs):
+
+        session = _request_session.get()
+
+        if session is None:
+            return call(*args, **kwargs)
+
+        with profiler.follow(session):
+            return call(*args, **kwargs)
+
+    return profiled
+
+
+profiler = SamplingProfiler(
+    enabled=settings.PROFILER_ENABLED,
+    sample_rate=settings.PROFILER_SAMPLE_RATE,
+    interval=settings.PROFILER_INTERVAL,
+    top_n=settings.PROFILER_TOP_N
+)
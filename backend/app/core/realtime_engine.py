@@ -0,0 +1,181 @@
+import asyncio
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from app.core.telemetry import observe_stage
+
+
+class EngineOverloaded(Exception):
+    """Raised when the first stage's queue stays full past the submit timeout."""
+
+
+@dataclass
+class Stage:
+    name: str
+    func: Callable[[Any], Any]
+    concurrency: int = 1
+    cpu_bound: bool = False      # run in the shared process pool
+    blocking: bool = False       # run in a worker thread (DB / file I/O)
+    queue_size: int = 1000       # bound of this stage's input queue
+
+
+@dataclass
+class StageStats:
+    processed: int = 0
+    failed: int = 0
+    dropped: int = 0
+    in_flight: int = 0
+    busy_seconds: float = 0.0
+    max_seconds: float = 0.0
+    started_at: float = field(default_factory=time.monotonic)
+
+    def record(self, seconds: float):
+        self.processed += 1
+        self.busy_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+
+class RealtimeEngine:
+    """Pipeline of stages connected by bounded asyncio queues.
+
+    A stage can only hand an item downstream when the next queue has room,
+    so a slow stage fills its input queue, stalls the stages before it and
+    finally makes submit() wait (or fail) at the ingest endpoint. Stage
+    functions returning None drop the item.
+    """
+
+    def __init__(self, stages, process_workers: int = 2):
+        self.stages = list(stages)
+        self.process_workers = process_workers
+        self._queues = []
+        self._tasks = []
+        self._stats = {}
+        self._process_pool = None
+        self._running = False
+
+    async def start(self):
+
+        if self._running:
+            return
+
+        self._queues = [asyncio.Queue(maxsize=stage.queue_size) for stage in self.stages]
+        self._stats = {stage.name: StageStats() for stage in self.stages}
+
+        if any(stage.cpu_bound for stage in self.stages):
+            self._process_pool = ProcessPoolExecutor(max_workers=self.process_workers)
+
+        for index, stage in enumerate(self.stages):
+            for _ in range(stage.concurrency):
+                self._tasks.append(asyncio.create_task(self._run_stage(index)))
+
+        self._running = True
+
+    async def stop(self):
+
+        self._running = False
+
+        for task in self._tasks:
+            task.cancel()
+
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False, cancel_futures=True)
+            self._process_pool = None
+
+    async def submit(self, item, timeout: float = None):
+        """Enqueue an item, waiting while the pipeline is saturated."""
+
+        if not self._running:
+            raise RuntimeError("Realtime engine is not running")
+
+        try:
+            await asyncio.wait_for(self._queues[0].put(item), timeout)
+        except asyncio.TimeoutError:
+            raise EngineOverloaded(self.stages[0].name)
+
+    async def _call(self, stage: Stage, item):
+
+        if stage.cpu_bound:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._process_pool, stage.func, item)
+
+        if stage.blocking:
+            return await asyncio.to_thread(stage.func, item)
+
+        result = stage.func(item)
+
+        if asyncio.iscoroutine(result):
+            result = await result
+
+        return result
+
+    async def _run_stage(self, index: int):
+
+        stage = self.stages[index]
+        stats = self._stats[stage.name]
+        inbox = self._queues[index]
+        outbox = self._queues[index + 1] if index + 1 < len(self._queues) else None
+
+        while True:
+
+            item = await inbox.get()
+            stats.in_flight += 1
+            started = time.perf_counter()
+
+            try:
+                result = await self._call(stage, item)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                stats.failed += 1
+                print(f"❌ Stage {stage.name} failed:", e)
+                continue
+            finally:
+                stats.in_flight -= 1
+                inbox.task_done()
+
+            elapsed = time.perf_counter() - started
+            stats.record(elapsed)
+            observe_stage("engine", stage.name, elapsed)
+
+            if outbox is None:
+                continue
+
+            if result is None:
+                stats.dropped += 1
+                continue
+
+            # blocks while the next stage is saturated -> backpressure
+            await outbox.put(result)
+
+    def stats(self):
+
+        report = {}
+
+        for index, stage in enumerate(self.stages):
+
+            stats = self._stats.get(stage.name) or StageStats()
+            queue = self._queues[index] if self._queues else None
+            elapsed = max(time.monotonic() - stats.started_at, 1e-9)
+
+            report[stage.name] = {
+                "concurrency": stage.concurrency,
+                "executor": "process" if stage.cpu_bound else "thread" if stage.blocking else "loop",
+                "queue_depth": queue.qsize() if queue else 0,
+                "queue_capacity": stage.queue_size,
+                "in_flight": stats.in_flight,
+                "processed": stats.processed,
+                "failed": stats.failed,
+                "dropped": stats.dropped,
+                "throughput_per_s": round(stats.processed / elapsed, 3),
+                "avg_latency_ms": round(1000 * stats.busy_seconds / stats.processed, 3) if stats.processed else 0.0,
+                "max_latency_ms": round(1000 * stats.max_seconds, 3),
+                # share of worker time spent busy; the stage nearest 1.0 is the bottleneck
+                "utilization": round(stats.busy_seconds / (elapsed * stage.concurrency), 3)
+            }
+
+        return report
@@ -0,0 +1,125 @@
+import time
+from contextlib import contextmanager
+
+from fastapi import Response
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from sqlalchemy import event
+
+
+# Buckets tuned for in-process work (tens of microseconds) up to slow requests.
+FAST_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+REQUEST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REQUEST_LATENCY = Histogram(
+    "iampact_http_request_duration_seconds", "HTTP request latency",
+    ["method", "route", "status"], buckets=REQUEST_BUCKETS
+)
+STAGE_LATENCY = Histogram(
+    "iampact_pipeline_stage_duration_seconds", "Time spent in one pipeline stage",
+    ["pipeline", "stage"], buckets=FAST_BUCKETS
+)
+DB_QUERY_LATENCY = Histogram(
+    "iampact_db_query_duration_seconds", "Database statement latency",
+    ["operation"], buckets=FAST_BUCKETS
+)
+DB_ROWS = Counter(
+    "iampact_db_rows_total", "Rows returned or affected by database statements", ["operation"]
+)
+WS_CLIENTS = Gauge("iampact_websocket_clients", "Connected WebSocket clients")
+
+
+# labels() does a lock + dict lookup per call; keep the bound children instead
+_children = {}
+
+
+def _child(metric, *labels):
+
+    key = (metric, labels)
+    child = _children.get(key)
+
+    if child is None:
+        child = _children[key] = metric.labels(*labels)
+
+    return child
+
+
+def observe_stage(pipeline: str, stage: str, seconds: float):
+    _child(STAGE_LATENCY, pipeline, stage).observe(seconds)
+
+
+@contextmanager
+def timed_stage(pipeline: str, stage: str):
+
+    started = time.perf_counter()
+
+    try:
+        yield
+    finally:
+        observe_stage(pipeline, stage, time.perf_counter() - started)
+
+
+# ---------------- HTTP ----------------
+
+class RequestMetricsMiddleware:
+    """Pure ASGI middleware: one histogram observation per HTTP request,
+    labelled with the route template (not the raw path) to keep
+    cardinality bounded."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        started = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            _child(REQUEST_LATENCY, scope["method"], path, str(status["code"])).observe(
+                time.perf_counter() - started
+            )
+
+
+def metrics_response():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+# ---------------- DATABASE ----------------
+
+def _operation(statement: str):
+    head = statement.lstrip().split(None, 1)
+    return head[0].upper() if head else "OTHER"
+
+
+def instrument_engine(engine):
+    """Time every statement on the engine and count the rows it touched."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        operation = _operation(statement)
+        _child(DB_QUERY_LATENCY, operation).observe(time.perf_counter() - started)
+
+        if cursor.rowcount and cursor.rowcount > 0:
+            _child(DB_ROWS, operation).inc(cursor.rowcount)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        stack = context.connection.info.get("query_started") if context.connection else None
+        if stack:
+            stack.pop()
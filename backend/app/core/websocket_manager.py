@@ -1,5 +1,7 @@
 from fastapi import WebSocket
 
+from app.core.telemetry import WS_CLIENTS
+
 
 class ConnectionManager:
     def __init__(self):
@@ -8,9 +10,12 @@ class ConnectionManager:
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
         self.active_connections.append(websocket)
+        WS_CLIENTS.set(len(self.active_connections))
 
     def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+        if websocket in self.active_connections:
+            self.active_connections.remove(websocket)
+        WS_CLIENTS.set(len(self.active_connections))
 
     async def broadcast(self, message: dict):
         for connection in self.active_connections:
@@ -0,0 +1,303 @@
+import asyncio
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+
+from app.core.config import settings
+from app.detection.sketches import HyperLogLog, RecentSet
+
+
+# An identity needs this many events before deviations count for scoring.
+MIN_EVENTS = 20
+
+# Histograms are halved once they hold this many events, so the baseline
+# follows slow drift in behaviour instead of being dominated by old history.
+DECAY_AT = 5000
+
+ACTIONS_CAPACITY = 64
+IPS_CAPACITY = 32
+REGIONS_CAPACITY = 8
+
+
+def identity_keys(event: dict):
+    """Baseline keys for an event: the user, plus the role for assumed roles."""
+
+    keys = []
+    user = event.get("user")
+
+    if user and user != "unknown":
+        keys.append(f"user:{user}")
+
+        # arn:aws:sts::123456789012:assumed-role/<role>/<session>
+        if "assumed-role/" in user:
+            role = user.split("assumed-role/", 1)[1].split("/", 1)[0]
+            keys.append(f"role:{role}")
+
+    return keys
+
+
+def event_time(event: dict):
+
+    value = event.get("timestamp")
+
+    if isinstance(value, datetime):
+        return value
+
+    if isinstance(value, str) and value not in ("", "unknown"):
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            pass
+
+    return datetime.utcnow()
+
+
+class IdentityBaseline:
+    """Bounded behavioural profile of one user or role (a few KB at most)."""
+
+    def __init__(self):
+        self.events = 0
+        self.hours = [0] * 24
+        self.weekdays = [0] * 7
+        self.first_seen = None
+        self.last_seen = None
+        self.actions = RecentSet(ACTIONS_CAPACITY)
+        self.ips = RecentSet(IPS_CAPACITY)
+        self.regions = RecentSet(REGIONS_CAPACITY)
+        self.distinct_ips = HyperLogLog()
+        self.distinct_actions = HyperLogLog()
+
+    def features(self, action, ip, region, when: datetime):
+
+        hour_total = sum(self.hours)
+        day_total = sum(self.weekdays)
+
+        return {
+            "events": self.events,
+            "mature": self.events >= MIN_EVENTS,
+            "new_action": bool(action) and action not in self.actions,
+            "new_ip": bool(ip) and ip not in self.ips,
+            "new_region": bool(region) and region not in self.regions,
+            "hour_share": round(self.hours[when.hour] / hour_total, 4) if hour_total else None,
+            "weekday_share": round(self.weekdays[when.weekday()] / day_total, 4) if day_total else None
+        }
+
+    def update(self, action, ip, region, when: datetime):
+
+        self.events += 1
+        self.hours[when.hour] += 1
+        self.weekdays[when.weekday()] += 1
+
+        if sum(self.weekdays) >= DECAY_AT:
+            self.hours = [count // 2 for count in self.hours]
+            self.weekdays = [count // 2 for count in self.weekdays]
+
+        stamp = when.isoformat()
+        self.first_seen = self.first_seen or stamp
+        self.last_seen = stamp
+
+        if action:
+            self.actions.add(action)
+            self.distinct_actions.add(action)
+        if ip:
+            self.ips.add(ip)
+            self.distinct_ips.add(ip)
+        if region:
+            self.regions.add(region)
+
+    def to_dict(self):
+        return {
+            "events": self.events,
+            "hours": self.hours,
+            "weekdays": self.weekdays,
+            "first_seen": self.first_seen,
+            "last_seen": self.last_seen,
+            "actions": self.actions.to_list(),
+            "ips": self.ips.to_list(),
+            "regions": self.regions.to_list(),
+            "distinct_ips": self.distinct_ips.to_dict(),
+            "distinct_actions": self.distinct_actions.to_dict()
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        baseline = cls()
+        baseline.events = data["events"]
+        baseline.hours = data["hours"]
+        baseline.weekdays = data["weekdays"]
+        baseline.first_seen = data.get("first_seen")
+        baseline.last_seen = data.get("last_seen")
+        baseline.actions = RecentSet(ACTIONS_CAPACITY, data["actions"])
+        baseline.ips = RecentSet(IPS_CAPACITY, data["ips"])
+        baseline.regions = RecentSet(REGIONS_CAPACITY, data["regions"])
+        baseline.distinct_ips = HyperLogLog.from_dict(data["distinct_ips"])
+        baseline.distinct_actions = HyperLogLog.from_dict(data["distinct_actions"])
+        return baseline
+
+
+class BaselineStore:
+    """Per-identity baselines updated in O(1) per event.
+
+    `observe()` returns the deviation features of an event against the
+    identity's baseline *before* folding the event in, which is what
+    calculate_risk scores on. State is snapshotted to a JSON file and
+    reloaded at start-up, so baselines survive restarts without ever
+    rescanning stored events. The least recently active identities are
+    evicted beyond `max_identities`.
+    """
+
+    def __init__(self, path=None, max_identities: int = 10000):
+        self.path = Path(path) if path else None
+        self.max_identities = max_identities
+        self._baselines = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._loaded_mtime = None
+
+        self.observed = 0
+        self.evicted = 0
+
+    def _get(self, key, create):
+
+        baseline = self._baselines.get(key)
+
+        if baseline is not None:
+            self._baselines.move_to_end(key)
+        elif create:
+            baseline = self._baselines[key] = IdentityBaseline()
+            if len(self._baselines) > self.max_identities:
+                self._baselines.popitem(last=False)
+                self.evicted += 1
+
+        return baseline
+
+    def _lookup(self, event, update):
+
+        keys = identity_keys(event)
+
+        if not keys:
+            return None
+
+        action = event.get("action") or event.get("event_type")
+        ip = event.get("src_ip") if event.get("src_ip") != "unknown" else None
+        region = event.get("region") if event.get("region") != "unknown" else None
+        when = event_time(event)
+
+        features = {}
+
+        with self._lock:
+            for key in keys:
+                baseline = self._get(key, create=update)
+                kind = key.split(":", 1)[0]
+
+                if baseline is not None:
+                    features[kind] = baseline.features(action, ip, region, when)
+                if update:
+                    baseline.update(action, ip, region, when)
+
+            if update:
+                self.observed += 1
+                self._dirty = True
+
+        return features or None
+
+    def observe(self, event: dict):
+        """Attach `event["baseline"]` deviation features, then learn from the event."""
+
+        event["baseline"] = self._lookup(event, update=True)
+        return event
+
+    def annotate(self, event: dict):
+        """Attach deviation features without learning (ad-hoc analysis)."""
+
+        event["baseline"] = self._lookup(event, update=False)
+        return event
+
+    def identity(self, key):
+
+        with self._lock:
+            baseline = self._baselines.get(key)
+
+            if baseline is None:
+                return None
+
+            return {
+                **baseline.to_dict(),
+                "distinct_ip_count": baseline.distinct_ips.count(),
+                "distinct_action_count": baseline.distinct_actions.count()
+            }
+
+    # ---------------- persistence ----------------
+
+    def save(self):
+
+        if self.path is None:
+            return
+
+        with self._lock:
+            if not self._dirty:
+                return
+            snapshot = {key: baseline.to_dict() for key, baseline in self._baselines.items()}
+            self._dirty = False
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f)
+
+        os.replace(tmp, self.path)
+
+    def load(self):
+
+        if self.path is None or not self.path.exists():
+            return
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            snapshot = json.load(f)
+
+        with self._lock:
+            self._baselines = OrderedDict(
+                (key, IdentityBaseline.from_dict(data)) for key, data in snapshot.items()
+            )
+
+    def refresh(self):
+        """Reload the snapshot if it changed since the last refresh (read-only copies)."""
+
+        if self.path is None:
+            return False
+
+        try:
+            mtime = self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return False
+
+        if mtime == self._loaded_mtime:
+            return False
+
+        self.load()
+        self._loaded_mtime = mtime
+        return True
+
+    async def run_autosave(self, interval: float):
+
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.save)
+            except Exception as e:
+                print("❌ Baseline snapshot failed:", e)
+
+    def stats(self):
+        return {
+            "identities": len(self._baselines),
+            "max_identities": self.max_identities,
+            "observed": self.observed,
+            "evicted": self.evicted
+        }
+
+
+baseline_store = BaselineStore(settings.BASELINE_PATH, settings.BASELINE_MAX_IDENTITIES)
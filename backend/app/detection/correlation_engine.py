@@ -0,0 +1,416 @@
+import threading
+from collections import deque
+from datetime import datetime, timezone
+
+from app.core.config import settings
+from app.detection.baselines import event_time
+
+
+# eventName -> (edge kind, request parameter naming the target, target kind).
+# An edge actor -> target means the actor can act as the target (assume,
+# credentials, login) or changed what the target may do (policy, trust,
+# group), so a path through the graph is a way to accumulate privileges.
+EDGE_ACTIONS = {
+    "AssumeRole": ("assume", "roleArn", "role"),
+    "AssumeRoleWithSAML": ("assume", "roleArn", "role"),
+    "AssumeRoleWithWebIdentity": ("assume", "roleArn", "role"),
+    "AttachRolePolicy": ("policy", "roleName", "role"),
+    "PutRolePolicy": ("policy", "roleName", "role"),
+    "UpdateAssumeRolePolicy": ("trust", "roleName", "role"),
+    "AttachUserPolicy": ("policy", "userName", "user"),
+    "PutUserPolicy": ("policy", "userName", "user"),
+    "AttachGroupPolicy": ("policy", "groupName", "group"),
+    "PutGroupPolicy": ("policy", "groupName", "group"),
+    "AddUserToGroup": ("group", "userName", "user"),
+    "CreateAccessKey": ("credentials", "userName", "user"),
+    "CreateLoginProfile": ("login", "userName", "user"),
+    "UpdateLoginProfile": ("login", "userName", "user"),
+}
+
+EDGE_KINDS = ("assume", "policy", "trust", "group", "member", "credentials", "login")
+KIND_BITS = {kind: 1 << i for i, kind in enumerate(EDGE_KINDS)}
+
+# kinds that hand out permissions or credentials; a chain needs at least one
+GRANT_MASK = sum(KIND_BITS[k] for k in ("policy", "trust", "group", "credentials", "login"))
+
+
+def principal_key(value, kind: str = "user"):
+    """Graph key of a principal: "user:alice", "role:Admin", "group:ops", "root"."""
+
+    if not value or value == "unknown":
+        return None
+
+    value = str(value)
+
+    # arn:aws:sts::123456789012:assumed-role/<role>/<session>
+    if "assumed-role/" in value:
+        return "role:" + value.split("assumed-role/", 1)[1].split("/", 1)[0]
+
+    if value.startswith("arn:"):
+        resource = value.split(":", 5)[-1]
+        if resource == "root":
+            return "root"
+        resource_kind, _, path = resource.partition("/")
+        return f"{resource_kind}:{path.rsplit('/', 1)[-1]}" if path else resource_kind
+
+    return f"{kind}:{value}"
+
+
+def event_edges(event: dict):
+    """(actor, target, kind, policy) edges implied by one parsed event."""
+
+    spec = EDGE_ACTIONS.get(event.get("action"))
+    params = event.get("iam_params")
+
+    if spec is None or event.get("result") == "FAILED":
+        return []
+
+    kind, field, target_kind = spec
+    actor = principal_key(event.get("user")) or principal_key(event.get("user_arn"))
+    params = params or {}
+
+    # CreateAccessKey / *LoginProfile without userName act on the caller
+    target = principal_key(params.get(field), target_kind) or actor
+
+    if actor is None or target is None:
+        return []
+
+    policy = params.get("policyArn") or params.get("policyName")
+    edges = []
+
+    if target != actor:
+        edges.append((actor, target, kind, policy))
+
+    # members inherit the group's policies, so group -> user completes
+    # chains that run through AttachGroupPolicy
+    if kind == "group" and params.get("groupName"):
+        edges.append((principal_key(params["groupName"], "group"), target, "member", None))
+
+    return edges
+
+
+# Edge value: first_seen (32 bits) | last_seen (32 bits) | kind mask (8 bits),
+# epoch seconds, one int per edge in each direction.
+
+def _pack(first, last, mask):
+    return (first << 40) | (last << 8) | mask
+
+
+def _first(packed):
+    return packed >> 40
+
+
+def _last(packed):
+    return (packed >> 8) & 0xFFFFFFFF
+
+
+def _mask(packed):
+    return packed & 0xFF
+
+
+class IdentityGraph:
+    """Incrementally updated graph of who can act as / grant to whom.
+
+    Principals are interned to ints and each direction of the adjacency is
+    a dict of dicts holding one packed int per edge, so hundreds of
+    thousands of principals fit in tens of MB. Edges expire `ttl` seconds
+    after they were last seen, on the graph's clock (the newest event time
+    so far), which keeps replays of old logs consistent.
+
+    `observe()` adds an event's edges and attaches the longest escalation
+    chain ending in the new edge: a path of at least two time-ordered
+    edges, one of which grants permissions or credentials. Searches stop
+    at `max_depth` edges and `max_expansions` visited edges, which keeps
+    them in the millisecond range however dense the graph gets.
+    """
+
+    def __init__(self, ttl: int = 259200, max_depth: int = 4, max_expansions: int = 5000):
+        self.ttl = ttl
+        self.max_depth = max_depth
+        self.max_expansions = max_expansions
+
+        self._ids = {}
+        self._names = []
+        self._free = []
+        self._out = {}
+        self._in = {}
+        self._policies = {}           # (src, dst) -> last attached policy
+        self._expiry = deque()        # (expires_at, src, dst), one per edge
+        self._clock = 0
+        self._lock = threading.Lock()
+
+        self.edges = 0
+        self.observed = 0
+        self.chains = 0
+        self.truncated = 0
+
+    # ---------------- storage ----------------
+
+    def _intern(self, name):
+
+        node = self._ids.get(name)
+
+        if node is None:
+            if self._free:
+                node = self._free.pop()
+                self._names[node] = name
+            else:
+                node = len(self._names)
+                self._names.append(name)
+            self._ids[name] = node
+            self._out[node] = {}
+            self._in[node] = {}
+
+        return node
+
+    def _release(self, node):
+
+        if not self._out[node] and not self._in[node]:
+            del self._ids[self._names[node]]
+            del self._out[node]
+            del self._in[node]
+            self._names[node] = None
+            self._free.append(node)
+
+    def _add(self, src, dst, kind, when, policy):
+
+        packed = self._out[src].get(dst)
+
+        if packed is None:
+            packed = _pack(when, when, KIND_BITS[kind])
+            self._expiry.append((when + self.ttl, src, dst))
+            self.edges += 1
+        else:
+            packed = _pack(min(_first(packed), when), max(_last(packed), when), _mask(packed) | KIND_BITS[kind])
+
+        self._out[src][dst] = packed
+        self._in[dst][src] = packed
+
+        if policy:
+            self._policies[(src, dst)] = policy
+
+        return packed
+
+    def _expire(self):
+
+        horizon = self._clock - self.ttl
+
+        while self._expiry and self._expiry[0][0] <= self._clock:
+            _, src, dst = self._expiry.popleft()
+            packed = self._out[src][dst]
+
+            if _last(packed) > horizon:
+                # refreshed since it was queued; check again when it lapses
+                self._expiry.append((_last(packed) + self.ttl, src, dst))
+                continue
+
+            del self._out[src][dst]
+            del self._in[dst][src]
+            self._policies.pop((src, dst), None)
+            self.edges -= 1
+            self._release(src)
+            if dst != src:
+                self._release(dst)
+
+    def _alive(self, packed):
+
+        return _last(packed) > self._clock - self.ttl
+
+    # ---------------- search ----------------
+
+    def _walk(self, start, adjacency, forward, limit_depth, bound, on_path):
+        """Bounded DFS over time-ordered edges.
+
+        Forward, each next edge must have been seen after the previous
+        edge was first seen; backward, the mirror image. `bound` is the
+        time limit for the first hop. Returns False when the expansion
+        budget ran out.
+        """
+
+        budget = [self.max_expansions]
+        on_stack = {start}
+        path = []
+
+        def visit(node, bound, depth):
+
+            for other, packed in adjacency[node].items():
+
+                if budget[0] <= 0:
+                    return False
+                budget[0] -= 1
+
+                if other in on_stack or not self._alive(packed):
+                    continue
+                if forward and _last(packed) < bound:
+                    continue
+                if not forward and _first(packed) > bound:
+                    continue
+
+                path.append((other, packed))
+                on_path(path)
+
+                if depth + 1 < limit_depth:
+                    on_stack.add(other)
+                    finished = visit(other, _first(packed) if forward else _last(packed), depth + 1)
+                    on_stack.discard(other)
+                    if not finished:
+                        path.pop()
+                        return False
+
+                path.pop()
+
+            return True
+
+        complete = visit(start, bound, 0)
+
+        if not complete:
+            self.truncated += 1
+
+        return complete
+
+    def _describe(self, nodes, edges):
+
+        steps = []
+
+        for (src, dst), packed in zip(zip(nodes, nodes[1:]), edges):
+            steps.append({
+                "from": self._names[src],
+                "to": self._names[dst],
+                "kinds": [kind for kind in EDGE_KINDS if _mask(packed) & KIND_BITS[kind]],
+                "policy": self._policies.get((src, dst)),
+                "first_seen": datetime.fromtimestamp(_first(packed), timezone.utc).isoformat(),
+                "last_seen": datetime.fromtimestamp(_last(packed), timezone.utc).isoformat()
+            })
+
+        return {
+            "principals": [self._names[node] for node in nodes],
+            "length": len(edges),
+            "steps": steps
+        }
+
+    def _chain_into(self, src, dst, packed):
+        """Longest escalation chain ending with the edge src -> dst."""
+
+        best = []
+
+        def consider(path):
+            nonlocal best
+            # path runs backwards from src: [(prev, edge prev->src), ...]
+            edges = [p for _, p in path] + [packed]
+            if len(path) > len(best) and any(_mask(p) & GRANT_MASK for p in edges):
+                best = list(path)
+
+        self._walk(src, self._in, False, self.max_depth - 1, _last(packed), consider)
+
+        if not best:
+            return None
+
+        nodes = [node for node, _ in reversed(best)] + [src, dst]
+        edges = [p for _, p in reversed(best)] + [packed]
+        return self._describe(nodes, edges)
+
+    # ---------------- public API ----------------
+
+    def observe(self, event: dict):
+        """Add the event's edges; attach `event["escalation"]` when they close a chain."""
+
+        edges = event_edges(event)
+
+        if not edges:
+            return event
+
+        stamp = event_time(event)
+
+        if stamp.tzinfo is None:
+            stamp = stamp.replace(tzinfo=timezone.utc)
+
+        # a clock pushed into the future would expire every edge at once
+        when = min(int(stamp.timestamp()), int(datetime.now(timezone.utc).timestamp()))
+
+        chain = None
+
+        with self._lock:
+
+            if when > self._clock:
+                self._clock = when
+                self._expire()
+
+            if when <= self._clock - self.ttl:
+                return event      # older than anything the graph still holds
+
+            self.observed += 1
+
+            for actor, target, kind, policy in edges:
+                src, dst = self._intern(actor), self._intern(target)
+                packed = self._add(src, dst, kind, when, policy)
+
+                if kind != "member":
+                    chain = self._chain_into(src, dst, packed) or chain
+
+            if chain is not None:
+                self.chains += 1
+
+        if chain is not None:
+            event["escalation"] = chain
+
+        return event
+
+    def paths(self, principal: str, direction: str = "out", max_depth: int = None, limit: int = 20):
+        """Escalation paths starting at (out) or leading to (in) a principal.
+
+        Returns up to `limit` paths with at least one granting edge,
+        longest first, plus whether the search hit its expansion budget.
+        """
+
+        max_depth = min(max_depth or self.max_depth, self.max_depth)
+        forward = direction == "out"
+        found = []
+
+        with self._lock:
+
+            start = self._ids.get(principal)
+
+            if start is None:
+                return {"principal": principal, "paths": [], "complete": True}
+
+            def collect(path):
+                edges = [p for _, p in path]
+                if any(_mask(p) & GRANT_MASK for p in edges):
+                    found.append(list(path))
+
+            complete = self._walk(
+                start, self._out if forward else self._in, forward, max_depth,
+                0 if forward else self._clock, collect
+            )
+
+            found.sort(key=len, reverse=True)
+            results = []
+
+            for path in found[:limit]:
+                nodes = [start] + [node for node, _ in path]
+                edges = [p for _, p in path]
+                if not forward:
+                    nodes, edges = nodes[::-1], edges[::-1]
+                results.append(self._describe(nodes, edges))
+
+        return {"principal": principal, "paths": results, "complete": complete}
+
+    def stats(self):
+
+        with self._lock:
+            return {
+                "principals": len(self._ids),
+                "edges": self.edges,
+                "ttl_seconds": self.ttl,
+                "max_depth": self.max_depth,
+                "observed": self.observed,
+                "chains": self.chains,
+                "truncated_searches": self.truncated
+            }
+
+
+identity_graph = IdentityGraph(
+    ttl=settings.IDENTITY_GRAPH_TTL_SECONDS,
+    max_depth=settings.IDENTITY_GRAPH_MAX_DEPTH,
+    max_expansions=settings.IDENTITY_GRAPH_MAX_EXPANSIONS
+)
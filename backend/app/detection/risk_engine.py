@@ -1,7 +1,67 @@
+# share of an identity's activity below which an hour / weekday is unusual
+RARE_HOUR_SHARE = 0.02
+RARE_WEEKDAY_SHARE = 0.02
+
+
+def baseline_deviation(event, reasons, codes):
+
+    # features attached by the baseline store; only mature baselines count
+    baseline = (event.get("baseline") or {}).get("user")
+
+    if not baseline or not baseline["mature"]:
+        return 0
+
+    score = 0
+    user = event.get("user", "unknown")
+
+    if baseline["new_ip"]:
+        score += 10
+        reasons.append(f"First activity of {user} from {event.get('src_ip')}")
+        codes.append("BASELINE_NEW_IP")
+
+    if baseline["new_action"]:
+        score += 10
+        reasons.append(f"First time {user} performed {event.get('action') or event.get('event_type')}")
+        codes.append("BASELINE_NEW_ACTION")
+
+    if baseline["new_region"]:
+        score += 10
+        reasons.append(f"First activity of {user} in region {event.get('region')}")
+        codes.append("BASELINE_NEW_REGION")
+
+    if baseline["hour_share"] is not None and baseline["hour_share"] < RARE_HOUR_SHARE:
+        score += 10
+        reasons.append(f"Unusual hour of activity for {user}")
+        codes.append("BASELINE_RARE_HOUR")
+
+    elif baseline["weekday_share"] is not None and baseline["weekday_share"] < RARE_WEEKDAY_SHARE:
+        score += 5
+        reasons.append(f"Unusual weekday of activity for {user}")
+        codes.append("BASELINE_RARE_WEEKDAY")
+
+    return score
+
+
+def escalation_chain(event, reasons, codes):
+
+    # attached by the identity graph when this event closes a chain
+    chain = event.get("escalation")
+
+    if not chain:
+        return 0
+
+    reasons.append("Privilege escalation chain: " + " -> ".join(chain["principals"]))
+    codes.append("ESCALATION_CHAIN")
+
+    return 30 if chain["length"] >= 3 else 20
+
+
 def calculate_risk(event):
 
     risk_score = 0
     reasons = []
+    # stable machine-readable counterpart of `reasons`
+    reason_codes = []
 
     critical_actions = [
         "CreateAccessKey",
@@ -30,18 +90,21 @@ def calculate_risk(event):
         reasons.append(
             f"Sensitive IAM action detected: {action}"
         )
+        reason_codes.append("SENSITIVE_ACTION")
 
     if action in high_actions:
         risk_score += 25
         reasons.append(
             f"High-risk IAM activity detected: {action}"
         )
+        reason_codes.append("HIGH_RISK_ACTION")
 
     if result == "FAILED":
         risk_score += 20
         reasons.append(
             "Failed authentication detected"
         )
+        reason_codes.append("AUTH_FAILURE")
 
     if (
         ip != "unknown"
@@ -51,12 +114,17 @@ def calculate_risk(event):
         reasons.append(
             f"External source IP detected: {ip}"
         )
+        reason_codes.append("EXTERNAL_IP")
 
     if action in ["DeleteTrail", "StopLogging"]:
         risk_score += 30
         reasons.append(
             "CloudTrail tampering detected"
         )
+        reason_codes.append("TRAIL_TAMPERING")
+
+    risk_score += baseline_deviation(event, reasons, reason_codes)
+    risk_score += escalation_chain(event, reasons, reason_codes)
 
     risk_score = min(risk_score, 100)
 
@@ -72,5 +140,6 @@ def calculate_risk(event):
     event["risk_score"] = risk_score
     event["priority"] = priority
     event["reasons"] = reasons
+    event["reason_codes"] = reason_codes
 
     return event
\ No newline at end of file
@@ -0,0 +1,173 @@
+import asyncio
+import os
+
+from app.ingestion.checkpoint import CheckpointStore
+
+
+CHUNK_SIZE = 1 << 20        # read 1 MiB at a time
+MAX_BATCH_LINES = 5000
+
+
+class AuthLogTailer:
+    """Follow a rotating auth.log the way `tail -F` does, in large chunks.
+
+    Lines are handed to `on_batch(lines)` (a blocking callable, e.g. a bulk
+    enqueue) and the byte offset of the last complete line is checkpointed
+    only after the batch was accepted, so a restart resumes without
+    re-reading or losing lines (at-least-once).
+
+    Rotation (path now points at a new inode) drains the old file first;
+    truncation (file shorter than our offset) restarts from byte 0.
+    """
+
+    def __init__(self, path, checkpoint: CheckpointStore, on_batch,
+                 chunk_size=CHUNK_SIZE, max_batch_lines=MAX_BATCH_LINES, poll_interval=1.0):
+        self.path = str(path)
+        self.checkpoint = checkpoint
+        self.on_batch = on_batch
+        self.chunk_size = chunk_size
+        self.max_batch_lines = max_batch_lines
+        self.poll_interval = poll_interval
+
+        self._file = None
+        self._inode = None
+        self._offset = 0
+        self._running = False
+
+        self.lines_read = 0
+        self.bytes_read = 0
+        self.rotations = 0
+        self.truncations = 0
+
+    # ---------------- file handling ----------------
+
+    def _open(self, resume=True):
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return False
+
+        inode = os.fstat(f.fileno()).st_ino
+        offset = self.checkpoint.get_offset(self.path, inode) if resume else 0
+
+        if offset > os.fstat(f.fileno()).st_size:
+            offset = 0
+
+        f.seek(offset)
+
+        self._file, self._inode, self._offset = f, inode, offset
+        return True
+
+    def _close(self):
+        if self._file:
+            self._file.close()
+        self._file = None
+
+    def _drain(self):
+        """Read everything up to EOF from the open file, batch by batch."""
+
+        try:
+            self._read_to_eof()
+        except Exception:
+            # rewind to the last checkpointed line so nothing is skipped
+            self._file.seek(self._offset)
+            raise
+
+        # leave a trailing partial line for the next read
+        self._file.seek(self._offset)
+
+    def _read_to_eof(self):
+
+        remainder = b""
+        pending = []
+        consumed = self._offset
+
+        while True:
+            chunk = self._file.read(self.chunk_size)
+
+            if not chunk:
+                break
+
+            self.bytes_read += len(chunk)
+            data = remainder + chunk
+            cut = data.rfind(b"\n")
+
+            if cut < 0:
+                remainder = data
+                continue
+
+            complete, remainder = data[:cut], data[cut + 1:]
+            consumed += cut + 1
+
+            pending.extend(
+                line for line in complete.decode("utf-8", errors="replace").split("\n") if line
+            )
+
+            if len(pending) >= self.max_batch_lines:
+                self._emit(pending, consumed)
+                pending = []
+
+        if pending or consumed != self._offset:
+            self._emit(pending, consumed)
+
+    def _emit(self, lines, offset):
+        if lines:
+            self.on_batch(lines)
+            self.lines_read += len(lines)
+        self.checkpoint.set_offset(self.path, self._inode, offset)
+        self._offset = offset
+
+    def poll_once(self):
+        """Read new data, handling rotation and truncation. Blocking."""
+
+        if self._file is None and not self._open():
+            return
+
+        self._drain()
+
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return          # rotated away, new file not created yet
+
+        if st.st_ino != self._inode:
+            # rotated: old file fully drained above, start the new one at 0
+            self.rotations += 1
+            self._close()
+            if self._open(resume=False):
+                self._drain()
+
+        elif st.st_size < self._offset:
+            self.truncations += 1
+            self._file.seek(0)
+            self._offset = 0
+            self._drain()
+
+    # ---------------- async loop ----------------
+
+    async def run(self):
+
+        self._running = True
+
+        try:
+            while self._running:
+                try:
+                    await asyncio.to_thread(self.poll_once)
+                except Exception as e:
+                    print(f"❌ auth.log ingestion error ({self.path}):", e)
+                await asyncio.sleep(self.poll_interval)
+        finally:
+            self._close()
+
+    def stop(self):
+        self._running = False
+
+    def stats(self):
+        return {
+            "path": self.path,
+            "offset": self._offset,
+            "lines_read": self.lines_read,
+            "bytes_read": self.bytes_read,
+            "rotations": self.rotations,
+            "truncations": self.truncations
+        }
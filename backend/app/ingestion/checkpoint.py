@@ -0,0 +1,121 @@
+import json
+import os
+import threading
+from pathlib import Path
+
+
+COMPACT_EVERY = 10_000
+
+
+class CheckpointStore:
+    """Ingestion progress: a JSON snapshot plus an append-only journal.
+
+    Holds byte offsets of tailed files (keyed by path, with the inode so a
+    rotated file is not resumed at the wrong position) and the set of
+    drop-directory files already ingested.
+
+    Each update appends one fsynced line to the journal, so its cost does
+    not grow with the number of files seen. The journal is folded into the
+    snapshot (rewritten atomically) on start-up and every `compact_every`
+    updates.
+    """
+
+    def __init__(self, path, compact_every=COMPACT_EVERY):
+        self.path = Path(path)
+        self.journal_path = self.path.with_suffix(self.path.suffix + ".journal")
+        self.compact_every = compact_every
+        self._lock = threading.Lock()
+        self._state = {"offsets": {}, "files": {}}
+        self._journal = None
+        self._journal_lines = 0
+
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._state.update(json.load(f))
+
+        self._replay()
+        self._compact()
+
+    # ---- persistence ----
+
+    def _apply(self, kind, name, entry):
+        if entry is None:
+            self._state[kind].pop(name, None)
+        else:
+            self._state[kind][name] = entry
+
+    def _replay(self):
+        try:
+            f = open(self.journal_path, "r", encoding="utf-8")
+        except FileNotFoundError:
+            return
+
+        with f:
+            for line in f:
+                try:
+                    kind, name, entry = json.loads(line)
+                except (ValueError, TypeError):
+                    break           # torn last line of a crashed write
+                self._apply(kind, name, entry)
+
+    def _compact(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._state, f)
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(tmp, self.path)
+
+        # the snapshot holds everything now; replaying the old journal over
+        # it after a crash right here would be harmless
+        if self._journal is not None:
+            self._journal.close()
+        self._journal = open(self.journal_path, "w", encoding="utf-8")
+        self._journal_lines = 0
+
+    def _record(self, kind, name, entry):
+        # caller holds self._lock
+        self._apply(kind, name, entry)
+
+        if self._journal_lines >= self.compact_every:
+            self._compact()
+            return
+
+        self._journal.write(json.dumps([kind, name, entry]) + "\n")
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+        self._journal_lines += 1
+
+    # ---- tailed files ----
+
+    def get_offset(self, path, inode):
+        entry = self._state["offsets"].get(str(path))
+
+        if entry and entry["inode"] == inode:
+            return entry["offset"]
+
+        return 0
+
+    def set_offset(self, path, inode, offset):
+        with self._lock:
+            self._record("offsets", str(path), {"inode": inode, "offset": offset})
+
+    # ---- drop-directory files ----
+
+    def is_done(self, path, size, mtime):
+        entry = self._state["files"].get(str(path))
+        return bool(entry) and entry["size"] == size and entry["mtime"] == mtime
+
+    def mark_done(self, path, size, mtime, records):
+        with self._lock:
+            self._record("files", str(path), {"size": size, "mtime": mtime, "records": records})
+
+    def forget_missing(self):
+        """Drop entries for files that no longer exist (keeps the state small)."""
+        with self._lock:
+            gone = [name for name in self._state["files"] if not os.path.exists(name)]
+            for name in gone:
+                self._record("files", name, None)
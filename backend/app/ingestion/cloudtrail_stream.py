@@ -0,0 +1,207 @@
+import asyncio
+import gzip
+import os
+import queue
+import time
+from pathlib import Path
+
+import orjson
+from watchdog.events import FileSystemEventHandler
+from watchdog.observers import Observer
+
+from app.ingestion.checkpoint import CheckpointStore
+
+
+CLOUDTRAIL_SUFFIXES = (".json", ".json.gz")
+MAX_BATCH_RECORDS = 5000
+MAX_DECODE_ATTEMPTS = 8
+MAX_RETRY_DELAY = 300.0
+
+# what a file that is still being written fails with: cut-off JSON, or a
+# gzip stream without its end marker / complete header
+INCOMPLETE_FILE_ERRORS = (orjson.JSONDecodeError, EOFError, gzip.BadGzipFile)
+
+
+def read_cloudtrail_file(path):
+    """Return the Records of one CloudTrail delivery file (.json or .json.gz)."""
+
+    opener = gzip.open if str(path).endswith(".gz") else open
+
+    with opener(path, "rb") as f:
+        payload = orjson.loads(f.read())
+
+    if isinstance(payload, dict):
+        return payload.get("Records", [payload])
+
+    return payload
+
+
+class _DropHandler(FileSystemEventHandler):
+
+    def __init__(self, pending: queue.Queue):
+        self.pending = pending
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self.pending.put(event.src_path)
+
+    def on_moved(self, event):
+        # S3 sync and most writers create a temp file and rename it into place
+        if not event.is_directory:
+            self.pending.put(event.dest_path)
+
+    def on_modified(self, event):
+        # a file written in place (or rewritten after failing) is retried
+        if not event.is_directory:
+            self.pending.put(event.src_path)
+
+
+class CloudTrailDirectoryWatcher:
+    """Ingest CloudTrail files dropped into a directory tree.
+
+    Existing files are scanned once at start-up, new ones arrive through
+    watchdog. Each file's records go to `on_batch(raw_records)` in batches,
+    and the file is checkpointed (path, size, mtime) only after all its
+    records were handed off, so restarts skip finished files and redo
+    at most the file that was in progress. Every `prune_interval` seconds
+    the checkpoints of files deleted since are dropped.
+
+    A file that does not decode yet is retried with exponential backoff
+    and given up on after MAX_DECODE_ATTEMPTS; any later event for it
+    (modified, created, moved into place) starts its retries over.
+    """
+
+    def __init__(self, directory, checkpoint: CheckpointStore, on_batch,
+                 max_batch_records=MAX_BATCH_RECORDS, retry_interval=2.0, prune_interval=3600.0):
+        self.directory = Path(directory)
+        self.checkpoint = checkpoint
+        self.on_batch = on_batch
+        self.max_batch_records = max_batch_records
+        self.retry_interval = retry_interval
+        self.prune_interval = prune_interval
+
+        self._pending = queue.Queue()
+        self._attempts = {}             # path -> (failed attempts, monotonic retry time)
+        self._observer = None
+        self._running = False
+
+        self.files_ingested = 0
+        self.records_ingested = 0
+        self.files_failed = 0
+
+    def _is_cloudtrail_file(self, path):
+        return str(path).endswith(CLOUDTRAIL_SUFFIXES)
+
+    def scan_existing(self):
+        files = [p for p in self.directory.rglob("*") if p.is_file() and self._is_cloudtrail_file(p)]
+
+        for path in sorted(files, key=lambda p: p.stat().st_mtime):
+            self._pending.put(str(path))
+
+    def ingest_file(self, path):
+        """Ingest one file unless already checkpointed. Blocking."""
+
+        if not self._is_cloudtrail_file(path):
+            return False
+
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return False
+
+        if self.checkpoint.is_done(path, st.st_size, st.st_mtime):
+            return False
+
+        records = read_cloudtrail_file(path)
+
+        for start in range(0, len(records), self.max_batch_records):
+            batch = records[start:start + self.max_batch_records]
+            self.on_batch([orjson.dumps(record).decode() for record in batch])
+
+        self.checkpoint.mark_done(path, st.st_size, st.st_mtime, len(records))
+        self.files_ingested += 1
+        self.records_ingested += len(records)
+
+        return True
+
+    def _retry_later(self, path):
+
+        attempts = self._attempts.get(path, (0, 0.0))[0] + 1
+
+        if attempts >= MAX_DECODE_ATTEMPTS:
+            self._attempts.pop(path, None)
+            self.files_failed += 1
+            print(f"❌ CloudTrail file is truncated or not valid JSON: {path} (retried when it changes)")
+            return
+
+        delay = min(self.retry_interval * 2 ** (attempts - 1), MAX_RETRY_DELAY)
+        self._attempts[path] = (attempts, time.monotonic() + delay)
+
+    def _drain_pending(self):
+
+        due = {}                        # ordered set: arrival order is kept
+
+        while True:
+            try:
+                path = self._pending.get_nowait()
+            except queue.Empty:
+                break
+
+            # a new event for the file starts its retries over
+            self._attempts.pop(path, None)
+            due[path] = None
+
+        now = time.monotonic()
+        for path, (_, retry_at) in list(self._attempts.items()):
+            if retry_at <= now:
+                due[path] = None
+
+        for path in due:
+            try:
+                self.ingest_file(path)
+                self._attempts.pop(path, None)
+            except INCOMPLETE_FILE_ERRORS:
+                # most likely still being written
+                self._retry_later(path)
+            except Exception as e:
+                self._attempts.pop(path, None)
+                self.files_failed += 1
+                print(f"❌ CloudTrail ingestion error ({path}):", e)
+
+    async def run(self):
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        self._observer = Observer()
+        self._observer.schedule(_DropHandler(self._pending), str(self.directory), recursive=True)
+        self._observer.start()
+
+        self.scan_existing()
+        self._running = True
+        pruned = time.monotonic()
+
+        try:
+            while self._running:
+                await asyncio.to_thread(self._drain_pending)
+
+                if time.monotonic() - pruned >= self.prune_interval:
+                    await asyncio.to_thread(self.checkpoint.forget_missing)
+                    pruned = time.monotonic()
+
+                await asyncio.sleep(self.retry_interval)
+        finally:
+            self._observer.stop()
+            self._observer.join()
+
+    def stop(self):
+        self._running = False
+
+    def stats(self):
+        return {
+            "directory": str(self.directory),
+            "pending_files": self._pending.qsize(),
+            "retrying_files": len(self._attempts),
+            "files_ingested": self.files_ingested,
+            "records_ingested": self.records_ingested,
+            "files_failed": self.files_failed
+        }
@@ -0,0 +1,53 @@
+import asyncio
+
+from app.core.config import settings
+from app.ingestion.authlog_stream import AuthLogTailer
+from app.ingestion.checkpoint import CheckpointStore
+from app.ingestion.cloudtrail_stream import CloudTrailDirectoryWatcher
+from app.services.event_queue import enqueue_batch
+
+
+class FileIngestion:
+    """Runs the configured auth.log tailers and CloudTrail watcher.
+
+    Every source hands its batches to the durable events queue, where the
+    worker pool scores them like any other ingested log.
+    """
+
+    def __init__(self):
+        self.sources = []
+        self._tasks = []
+
+        paths = [p.strip() for p in settings.AUTHLOG_PATHS.split(",") if p.strip()]
+
+        if not paths and not settings.CLOUDTRAIL_DIR:
+            return
+
+        checkpoint = CheckpointStore(settings.INGEST_CHECKPOINT_PATH)
+
+        for path in paths:
+            self.sources.append(
+                AuthLogTailer(path, checkpoint, enqueue_batch,
+                              poll_interval=settings.INGEST_POLL_INTERVAL)
+            )
+
+        if settings.CLOUDTRAIL_DIR:
+            self.sources.append(
+                CloudTrailDirectoryWatcher(settings.CLOUDTRAIL_DIR, checkpoint, enqueue_batch)
+            )
+
+    async def start(self):
+        self._tasks = [asyncio.create_task(source.run()) for source in self.sources]
+
+    async def stop(self):
+        for source in self.sources:
+            source.stop()
+
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self):
+        return [source.stats() for source in self.sources]
+
+
+file_ingestion = FileIngestion()
@@ -0,0 +1,268 @@
+"""
+loadgen.py – replay / synthetic load generator for the ingest API
+
+Drives /paste-log, /api/analyze-logs (and optionally /stream-log) at a target
+rate while listening on /ws/alerts, then reports throughput, latency
+percentiles and error rates per target plus the server's own per-stage
+pipeline and queue statistics. Pushes received on /ws/alerts are counted,
+without latencies (they carry no send time).
+
+    python -m app.ingestion.loadgen --profile ramp --rate 50 --peak 500 \\
+        --duration 60 --targets paste,analyze,ws --out loadgen.json
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+import websockets
+
+from app.ingestion import simulator
+
+
+class TargetStats:
+
+    def __init__(self, name):
+        self.name = name
+        self.latencies = []
+        self.errors = {}
+        self.sent = 0
+        self.received = 0
+
+    def ok(self, seconds):
+        self.latencies.append(seconds)
+
+    def receive(self):
+        # pushed messages carry no send time, so they count without a latency
+        self.received += 1
+
+    def fail(self, reason):
+        self.errors[reason] = self.errors.get(reason, 0) + 1
+
+    def report(self, elapsed):
+        lat = sorted(self.latencies)
+        failed = sum(self.errors.values())
+
+        def pct(p):
+            if not lat:
+                return None
+            return round(1000 * lat[min(len(lat) - 1, int(p / 100 * len(lat)))], 3)
+
+        done = len(lat) + self.received
+
+        return {
+            "sent": self.sent,
+            "ok": len(lat),
+            "received": self.received,
+            "failed": failed,
+            "error_rate": round(failed / self.sent, 4) if self.sent else 0.0,
+            "errors": self.errors,
+            "throughput_per_s": round(done / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": pct(50),
+            "p95_ms": pct(95),
+            "p99_ms": pct(99),
+            "max_ms": round(1000 * lat[-1], 3) if lat else None
+        }
+
+
+def build_profile(args):
+
+    if args.profile == "ramp":
+        return simulator.ramp(args.rate, args.peak, args.duration)
+
+    if args.profile == "bursty":
+        return simulator.bursty(args.rate, args.peak, args.burst_period, args.burst_seconds)
+
+    if args.profile == "sine":
+        return simulator.sine(args.rate, args.peak - args.rate, args.burst_period)
+
+    return simulator.constant(args.rate)
+
+
+def build_request(target, logs, batch_size):
+
+    if target == "paste":
+        return "/paste-log", {"log": next(logs)}
+
+    if target == "stream":
+        return "/stream-log", {"log": next(logs)}
+
+    batch = [json.loads(next(logs)) for _ in range(batch_size)]
+    return "/api/analyze-logs", {"logs": batch}
+
+
+async def send(client, sem, stats, path, body, intended):
+
+    async with sem:
+
+        try:
+            response = await client.post(path, json=body)
+        except httpx.HTTPError as e:
+            stats.fail(type(e).__name__)
+            return
+
+        # latency from the intended send time, so queueing in the client counts
+        latency = time.perf_counter() - intended
+
+        if response.status_code >= 400:
+            stats.fail(f"HTTP {response.status_code}")
+        else:
+            stats.ok(latency)
+
+
+async def drive(client, target, args, stats, started):
+
+    if args.replay:
+        logs = simulator.replay_file(args.replay)
+    else:
+        # analyze-logs only understands CloudTrail records
+        kind = "cloudtrail" if target == "analyze" else args.kind
+        logs = simulator.synth_events(kind, args.seed)
+
+    sem = asyncio.Semaphore(args.concurrency)
+    tasks = []
+
+    for offset in simulator.schedule(build_profile(args), args.duration):
+
+        intended = started + offset
+        delay = intended - time.perf_counter()
+
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        path, body = build_request(target, logs, args.batch_size)
+        stats.sent += 1
+        tasks.append(asyncio.create_task(send(client, sem, stats, path, body, intended)))
+
+    await asyncio.gather(*tasks)
+
+
+async def listen(ws_url, stats, stop: asyncio.Event):
+
+    try:
+        async with websockets.connect(ws_url) as ws:
+            while not stop.is_set():
+                try:
+                    await asyncio.wait_for(ws.recv(), timeout=0.5)
+                    stats.receive()
+                except asyncio.TimeoutError:
+                    continue
+    except Exception as e:
+        stats.fail(type(e).__name__)
+
+
+async def server_stats(client):
+
+    snapshot = {}
+
+    for path in ("/pipeline-stats", "/queue-stats"):
+        try:
+            response = await client.get(path)
+            snapshot[path] = response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            snapshot[path] = {"error": str(e)}
+
+    return snapshot
+
+
+async def run(args):
+
+    targets = [t.strip() for t in args.targets.split(",") if t.strip()]
+    stats = {t: TargetStats(t) for t in targets}
+    limits = httpx.Limits(max_connections=args.concurrency * len(targets))
+
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+
+        stop = asyncio.Event()
+        listener = None
+
+        if "ws" in targets:
+            ws_url = args.base_url.replace("http", "ws", 1) + "/ws/alerts"
+            listener = asyncio.create_task(listen(ws_url, stats["ws"], stop))
+
+        started = time.perf_counter()
+
+        await asyncio.gather(*[
+            drive(client, t, args, stats[t], started) for t in targets if t != "ws"
+        ])
+
+        elapsed = time.perf_counter() - started
+
+        # give workers a moment to flush, then stop listening
+        await asyncio.sleep(args.drain)
+        stop.set()
+
+        if listener:
+            await listener
+
+        return {
+            "config": vars(args),
+            "elapsed_s": round(elapsed, 3),
+            "targets": {t: s.report(elapsed) for t, s in stats.items()},
+            "server": await server_stats(client)
+        }
+
+
+def parse_args(argv=None):
+
+    parser = argparse.ArgumentParser(description="IAMpact ingest load generator")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--targets", default="paste,analyze,ws",
+                        help="comma list of paste, analyze, stream, ws")
+    parser.add_argument("--profile", choices=["constant", "ramp", "bursty", "sine"], default="constant")
+    parser.add_argument("--rate", type=float, default=50.0, help="base events/sec per target")
+    parser.add_argument("--peak", type=float, default=500.0, help="ramp end / burst / sine peak rate")
+    parser.add_argument("--burst-period", type=float, default=10.0, help="burst / sine period")
+    parser.add_argument("--burst-seconds", type=float, default=2.0)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--kind", choices=["cloudtrail", "authlog", "mixed"], default="cloudtrail")
+    parser.add_argument("--replay", help="file of CloudTrail JSON or log lines to replay")
+    parser.add_argument("--batch-size", type=int, default=50, help="events per analyze-logs call")
+    parser.add_argument("--concurrency", type=int, default=64, help="max in-flight requests per target")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--drain", type=float, default=2.0, help="seconds to wait for pushes after sending")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", help="write the JSON report here")
+
+    args = parser.parse_args(argv)
+
+    if args.replay and "analyze" in [t.strip() for t in args.targets.split(",")]:
+        check_replay_json(parser, args.replay)
+
+    return args
+
+
+def check_replay_json(parser, path):
+    """analyze-logs takes CloudTrail records only; refuse plain log lines."""
+
+    for number, line in enumerate(simulator.replay_file(path, loop=False), 1):
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+
+        if not isinstance(record, dict):
+            parser.error(
+                f"--replay {path}: line {number} is not a JSON record, which the "
+                "analyze target cannot send; replay it with --targets paste,stream"
+            )
+
+
+def main(argv=None):
+
+    args = parse_args(argv)
+    report = asyncio.run(run(args))
+
+    text = json.dumps(report, indent=2, default=str)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
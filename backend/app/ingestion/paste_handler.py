@@ -0,0 +1,68 @@
+import orjson
+
+
+def _records(payload):
+    """Raw log strings from a parsed JSON document."""
+
+    if isinstance(payload, dict):
+        # a CloudTrail delivery file: {"Records": [...]}
+        records = payload.get("Records")
+        if isinstance(records, list):
+            return [orjson.dumps(record).decode() for record in records]
+        return [orjson.dumps(payload).decode()]
+
+    if isinstance(payload, list):
+        return [
+            item if isinstance(item, str) else orjson.dumps(item).decode()
+            for item in payload
+        ]
+
+    return [str(payload)]
+
+
+def split_paste(text: str):
+    """Split pasted text into individual raw logs.
+
+    Accepts a CloudTrail document ({"Records": [...]}), a JSON array, one
+    JSON object per line, or plain log lines. Blank lines are dropped.
+    """
+
+    stripped = text.strip()
+
+    if not stripped:
+        return []
+
+    if stripped[0] in "{[":
+        try:
+            return _records(orjson.loads(stripped))
+        except orjson.JSONDecodeError:
+            pass        # NDJSON, or lines that merely start with a brace
+
+    return [line.strip() for line in stripped.splitlines() if line.strip()]
+
+
+def split_document(data: bytes):
+    """Raw logs in a whole JSON document (CloudTrail file or JSON array)."""
+
+    return _records(orjson.loads(data))
+
+
+def split_line(line: str):
+    """Raw logs in one line of a line-oriented upload (NDJSON or plain text).
+
+    Raises ValueError for a line that starts like JSON but does not parse,
+    so uploads can count it as an error instead of scoring garbage.
+    """
+
+    line = line.strip()
+
+    if not line:
+        return []
+
+    if line[0] == "{":
+        try:
+            return _records(orjson.loads(line))
+        except orjson.JSONDecodeError as e:
+            raise ValueError(f"malformed JSON: {e}") from None
+
+    return [line]
@@ -1,6 +1,141 @@
+import itertools
+import json
+import math
+import random
 import time
+from datetime import datetime, timedelta
+
 
 def stream_logs(logs, delay=1):
     for log in logs:
         yield log
-        time.sleep(delay)
\ No newline at end of file
+        time.sleep(delay)
+
+
+# ---------------- SYNTHETIC EVENTS ----------------
+
+USERS = ["admin", "cloud-admin", "auditor", "backup", "deploy-bot", "dev-alice", "dev-bob", "root"]
+
+ACTIONS = [
+    ("ListUsers", 30), ("GetUser", 25), ("DescribeInstances", 20), ("ConsoleLogin", 8),
+    ("AssumeRole", 6), ("CreateAccessKey", 3), ("AttachRolePolicy", 2), ("AttachUserPolicy", 2),
+    ("CreateUser", 1), ("DeleteTrail", 0.5), ("StopLogging", 0.5)
+]
+
+REGIONS = ["us-east-1", "us-west-2", "eu-west-1", "ap-south-1"]
+
+INTERNAL_IPS = ["10.0.1.15", "10.0.2.33", "172.16.4.20", "192.168.1.20"]
+EXTERNAL_IPS = ["45.67.89.10", "185.220.101.45", "103.21.244.7", "198.51.100.23"]
+
+
+def synth_cloudtrail_event(rng: random.Random, when: datetime = None):
+
+    names, weights = zip(*ACTIONS)
+    action = rng.choices(names, weights=weights)[0]
+    failed = rng.random() < 0.05
+
+    event = {
+        "eventTime": (when or datetime.utcnow()).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "eventSource": "iam.amazonaws.com",
+        "eventName": action,
+        "sourceIPAddress": rng.choice(EXTERNAL_IPS if rng.random() < 0.2 else INTERNAL_IPS),
+        "awsRegion": rng.choice(REGIONS),
+        "userIdentity": {"userName": rng.choice(USERS)},
+        "eventID": "%032x" % rng.getrandbits(128)
+    }
+
+    if failed:
+        event["errorCode"] = "AccessDenied"
+
+    return event
+
+
+def synth_authlog_line(rng: random.Random, when: datetime = None):
+
+    when = when or datetime.utcnow()
+    user = rng.choice(USERS)
+    ip = rng.choice(EXTERNAL_IPS + INTERNAL_IPS)
+    pid = rng.randint(1000, 65000)
+
+    if rng.random() < 0.7:
+        message = f"Failed password for {user} from {ip} port {rng.randint(1024, 65535)} ssh2"
+    else:
+        message = f"Accepted publickey for {user} from {ip} port {rng.randint(1024, 65535)} ssh2"
+
+    return f"{when.strftime('%b %d %H:%M:%S')} bastion sshd[{pid}]: {message}"
+
+
+def synth_events(kind="cloudtrail", seed=42):
+    """Endless iterator of synthetic raw logs (str) of the given kind."""
+
+    rng = random.Random(seed)
+    start = datetime.utcnow()
+
+    for i in itertools.count():
+
+        when = start + timedelta(milliseconds=i)
+
+        if kind == "authlog" or (kind == "mixed" and rng.random() < 0.5):
+            yield synth_authlog_line(rng, when)
+        else:
+            yield json.dumps(synth_cloudtrail_event(rng, when))
+
+
+def replay_file(path, loop=True):
+    """Replay raw logs from a file: CloudTrail JSON ({"Records": [...]} or a
+    list), JSON lines, or plain auth.log lines."""
+
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+
+    try:
+        payload = json.loads(text)
+        records = payload.get("Records", [payload]) if isinstance(payload, dict) else payload
+        logs = [json.dumps(record) for record in records]
+    except ValueError:
+        logs = [line for line in text.splitlines() if line.strip()]
+
+    if not logs:
+        return iter(())
+
+    return itertools.cycle(logs) if loop else iter(logs)
+
+
+# ---------------- RATE PROFILES ----------------
+# A profile maps seconds-since-start -> target events/sec.
+
+def constant(rate):
+    return lambda t: rate
+
+
+def ramp(start_rate, end_rate, duration):
+    return lambda t: start_rate + (end_rate - start_rate) * min(t / duration, 1.0)
+
+
+def bursty(base_rate, burst_rate, period=10.0, burst_seconds=2.0):
+    return lambda t: burst_rate if (t % period) < burst_seconds else base_rate
+
+
+def sine(mean_rate, amplitude, period=60.0):
+    return lambda t: max(0.0, mean_rate + amplitude * math.sin(2 * math.pi * t / period))
+
+
+def schedule(profile, duration, step=0.01):
+    """Yield intended send offsets (seconds) for a rate profile.
+
+    Offsets come from integrating the rate, so callers can send on an
+    absolute timetable and measure latency from the intended send time
+    (no coordinated omission when the target slows down).
+    """
+
+    t = 0.0
+    credit = 0.0
+
+    while t < duration:
+        credit += profile(t) * step
+
+        while credit >= 1.0:
+            credit -= 1.0
+            yield t
+
+        t += step
@@ -0,0 +1,401 @@
+import asyncio
+import gzip
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from datetime import datetime
+from pathlib import Path
+
+import aiofiles
+from fastapi import Request
+from multipart.multipart import MultipartParser, parse_options_header
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.ingestion.paste_handler import split_document, split_line
+from app.services.event_queue import enqueue_batch, queue_depth
+
+
+MAX_ERROR_SAMPLES = 20
+FORM_OVERHEAD = 64 << 10     # boundaries and part headers around the file
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+class _MultipartEvents:
+    """Collects the events of a streaming multipart parse between writes.
+
+    The parser's callbacks are synchronous, so they only record what
+    happened; the spooler then awaits the file writes for each chunk.
+    """
+
+    def __init__(self):
+        self.events = []
+        self._field = b""
+        self._value = b""
+        self._headers = {}
+
+    def callbacks(self):
+        return {
+            "on_part_begin": self._part_begin,
+            "on_header_field": self._header_field,
+            "on_header_value": self._header_value,
+            "on_header_end": self._header_end,
+            "on_headers_finished": self._headers_finished,
+            "on_part_data": self._part_data,
+            "on_part_end": self._part_end
+        }
+
+    def drain(self):
+        events, self.events = self.events, []
+        return events
+
+    def _part_begin(self):
+        self._headers = {}
+
+    def _header_field(self, data, start, end):
+        self._field += data[start:end]
+
+    def _header_value(self, data, start, end):
+        self._value += data[start:end]
+
+    def _header_end(self):
+        self._headers[self._field.lower()] = self._value
+        self._field = self._value = b""
+
+    def _headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition"))
+        self.events.append(("begin", options))
+
+    def _part_data(self, data, start, end):
+        self.events.append(("data", data[start:end]))
+
+    def _part_end(self):
+        self.events.append(("end", None))
+
+
+class UploadJob:
+    """Progress of one spooled upload; counters are written by a single worker thread."""
+
+    def __init__(self, filename: str, path: Path):
+        self.id = uuid.uuid4().hex
+        self.filename = filename
+        self.path = path
+        self.size_bytes = 0
+        self.status = "receiving"
+        self.created_at = datetime.utcnow()
+        self.started_at = None
+        self.finished_at = None
+
+        self.bytes_read = 0
+        self.rows_processed = 0
+        self.rows_failed = 0
+        self.throttled_seconds = 0.0
+        self.errors = deque(maxlen=MAX_ERROR_SAMPLES)
+        self.error = None
+
+        self._started = None
+
+    def fail_row(self, where, message):
+        self.rows_failed += 1
+        self.errors.append({"at": where, "error": message})
+
+    def elapsed(self):
+
+        if self.started_at is None:
+            return 0.0
+
+        if self.finished_at is not None:
+            return (self.finished_at - self.started_at).total_seconds()
+
+        return time.monotonic() - self._started
+
+    def to_dict(self):
+
+        elapsed = self.elapsed()
+        rate = self.rows_processed / elapsed if elapsed else 0.0
+        byte_rate = self.bytes_read / elapsed if elapsed else 0.0
+        remaining = max(self.size_bytes - self.bytes_read, 0)
+
+        return {
+            "job_id": self.id,
+            "filename": self.filename,
+            "status": self.status,
+            "size_bytes": self.size_bytes,
+            "bytes_read": self.bytes_read,
+            "progress": round(self.bytes_read / self.size_bytes, 4) if self.size_bytes else 0.0,
+            "rows_processed": self.rows_processed,
+            "rows_failed": self.rows_failed,
+            "rows_per_sec": round(rate, 1),
+            # bytes left at the current byte rate; rows per byte vary too much to count rows
+            "eta_seconds": round(remaining / byte_rate, 1) if byte_rate and self.status == "running" else None,
+            "throttled_seconds": round(self.throttled_seconds, 1),
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "error": self.error,
+            "error_samples": list(self.errors)
+        }
+
+
+class UploadJobManager:
+    """Spools uploads to disk and feeds them to the events queue in the background.
+
+    The request only streams the file to a spool file and returns a job id;
+    a background task then reads the file (plain or .gz; NDJSON, log lines,
+    or a whole CloudTrail document) and bulk-enqueues `batch_size` raw logs
+    at a time, so the worker pool scores them like any other ingest. While
+    the queue holds more than `max_pending` unprocessed events the job
+    waits, which keeps a multi-GB upload from burying live traffic.
+    """
+
+    def __init__(self, spool_dir, batch_size=2000, max_bytes=10 << 30, max_jobs=2,
+                 max_pending=200000, document_max_bytes=256 << 20, history=200):
+        self.spool_dir = Path(spool_dir)
+        self.batch_size = batch_size
+        self.max_bytes = max_bytes
+        self.max_pending = max_pending
+        self.document_max_bytes = document_max_bytes
+        self.history = history
+
+        self._jobs = OrderedDict()
+        self._tasks = set()
+        self._stopping = False
+        self._slots = asyncio.Semaphore(max_jobs)
+        self._lock = threading.Lock()
+
+    # ---------------- request side ----------------
+
+    async def spool(self, request: Request, field: str = "file"):
+        """Stream the `field` file of a multipart body to disk and schedule
+        processing; returns the job.
+
+        The body is parsed as it arrives and the file part written straight
+        to the spool file, so an upload touches the disk once instead of
+        going through Starlette's temporary file first. A Content-Length
+        above the limit is refused before anything is read, and a body
+        without one stops being read once the file passes `max_bytes`.
+        """
+
+        content_type, options = parse_options_header(request.headers.get("content-type"))
+
+        if content_type != b"multipart/form-data" or b"boundary" not in options:
+            raise ValueError(f"Expected a multipart/form-data body with a '{field}' file")
+
+        declared = request.headers.get("content-length", "")
+
+        if declared.isdigit() and int(declared) > self.max_bytes + FORM_OVERHEAD:
+            raise UploadTooLarge(f"Upload exceeds {self.max_bytes} bytes")
+
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+
+        parts = _MultipartEvents()
+        parser = MultipartParser(options[b"boundary"], parts.callbacks())
+        job = out = None
+
+        try:
+            async for chunk in request.stream():
+
+                parser.write(chunk)
+
+                for event, value in parts.drain():
+
+                    if event == "begin" and job is None and value.get(b"name") == field.encode():
+                        name = Path(value.get(b"filename", b"").decode("utf-8", "replace") or "upload.log").name
+                        job = UploadJob(name, self.spool_dir / f"{uuid.uuid4().hex}-{name}")
+                        self._remember(job)
+                        out = await aiofiles.open(job.path, "wb")
+
+                    elif event == "data" and out is not None:
+                        job.size_bytes += len(value)
+                        if job.size_bytes > self.max_bytes:
+                            raise UploadTooLarge(f"Upload exceeds {self.max_bytes} bytes")
+                        await out.write(value)
+
+                    elif event == "end" and out is not None:
+                        await out.close()
+                        out = None
+
+            parser.finalize()
+
+            if job is None:
+                raise ValueError(f"No '{field}' file in the upload")
+
+            if out is not None:
+                raise ValueError("Upload ended in the middle of the file")
+
+        except BaseException as e:
+            if out is not None:
+                await out.close()
+            if job is not None:
+                job.status, job.error = "failed", str(e) or type(e).__name__
+                job.finished_at = datetime.utcnow()
+                job.path.unlink(missing_ok=True)
+            raise
+
+        job.status = "queued"
+        task = asyncio.create_task(self._run(job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+        return job
+
+    def _remember(self, job):
+
+        with self._lock:
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.history:
+                self._jobs.popitem(last=False)
+
+    def get(self, job_id):
+
+        job = self._jobs.get(job_id)
+        return job.to_dict() if job else None
+
+    def list(self):
+
+        return [job.to_dict() for job in reversed(list(self._jobs.values()))]
+
+    # ---------------- background side ----------------
+
+    async def _run(self, job: UploadJob):
+
+        async with self._slots:
+
+            job.status = "running"
+            job.started_at = datetime.utcnow()
+            job._started = time.monotonic()
+
+            try:
+                await asyncio.to_thread(self._process, job)
+                job.status = "done"
+            except asyncio.CancelledError:
+                job.status = "cancelled"
+                raise
+            except Exception as e:
+                job.status, job.error = "failed", str(e)
+                print(f"❌ Upload job {job.id} failed:", e)
+            finally:
+                job.finished_at = datetime.utcnow()
+                job.path.unlink(missing_ok=True)
+
+    def _wait_for_queue(self, job):
+
+        while True:
+            db = SessionLocal()
+            try:
+                pending = queue_depth(db)["pending"]
+            finally:
+                db.close()
+
+            if pending <= self.max_pending:
+                return
+
+            if self._stopping:
+                raise RuntimeError("Server shutting down")
+
+            time.sleep(1.0)
+            job.throttled_seconds += 1.0
+
+    def _flush(self, job, batch):
+
+        if not batch:
+            return
+
+        if self._stopping:
+            raise RuntimeError("Server shutting down")
+
+        self._wait_for_queue(job)
+        enqueue_batch(batch)
+        job.rows_processed += len(batch)
+
+    def _process(self, job: UploadJob):
+
+        gzipped = job.filename.endswith(".gz")
+
+        with open(job.path, "rb") as raw:
+
+            stream = gzip.GzipFile(fileobj=raw) if gzipped else raw
+            first = stream.readline()
+            head = first.lstrip()
+
+            if head[:1] == b"[" or (head[:1] == b"{" and not _parses(first)):
+                self._process_document(job, stream, first, raw)
+                return
+
+            batch = []
+            line_no = 0
+            line = first
+
+            while line:
+                line_no += 1
+                try:
+                    batch.extend(split_line(line.decode("utf-8", "replace")))
+                except ValueError as e:
+                    job.fail_row(f"line {line_no}", str(e))
+
+                if len(batch) >= self.batch_size:
+                    self._flush(job, batch)
+                    batch = []
+                    job.bytes_read = raw.tell()
+
+                line = stream.readline()
+
+            self._flush(job, batch)
+            job.bytes_read = job.size_bytes
+
+    def _process_document(self, job, stream, first, raw):
+
+        if job.size_bytes > self.document_max_bytes:
+            raise ValueError(
+                f"JSON documents above {self.document_max_bytes} bytes must be uploaded as NDJSON"
+            )
+
+        records = split_document(first + stream.read())
+        job.bytes_read = raw.tell()
+
+        for start in range(0, len(records), self.batch_size):
+            self._flush(job, records[start:start + self.batch_size])
+
+        job.bytes_read = job.size_bytes
+
+    async def stop(self):
+
+        # running jobs end at their next batch; the thread cannot be cancelled
+        self._stopping = True
+
+        for task in list(self._tasks):
+            task.cancel()
+
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self):
+
+        by_status = {}
+
+        for job in list(self._jobs.values()):
+            by_status[job.status] = by_status.get(job.status, 0) + 1
+
+        return {"jobs": by_status, "active_tasks": len(self._tasks)}
+
+
+def _parses(line: bytes):
+
+    try:
+        split_line(line.decode("utf-8", "replace"))
+        return True
+    except ValueError:
+        return False
+
+
+upload_jobs = UploadJobManager(
+    settings.UPLOAD_SPOOL_DIR,
+    batch_size=settings.UPLOAD_BATCH_SIZE,
+    max_bytes=settings.UPLOAD_MAX_BYTES,
+    max_jobs=settings.UPLOAD_MAX_CONCURRENT_JOBS,
+    max_pending=settings.UPLOAD_MAX_PENDING_EVENTS,
+    document_max_bytes=settings.UPLOAD_DOCUMENT_MAX_BYTES
+)
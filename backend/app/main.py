@@ -1,9 +1,23 @@
+import asyncio
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.routes.analyze import router as analyze_router
 from app.core.database import Base, engine
-from app.api.routes import upload, alerts
+from app.api.routes import upload, alerts, dashboard, admin, ai, incidents, events
 from app.websocket.live_alerts import router as ws_router
+from app.services.metrics_service import install_counters
+from app.services.event_search import install_search_indexes
+from app.core.telemetry import RequestMetricsMiddleware, instrument_engine, metrics_response
+from app.core.profiler import ProfilingMiddleware, profile_sync_routes, profiler
+from app.core.config import settings
+from app.services.event_queue import install_queue_schema, worker_pool
+from app.services.pipeline_service import realtime_engine
+from app.ingestion.file_ingestion import file_ingestion
+from app.ingestion.uplod_handler import upload_jobs
+from app.services.analysis_pool import analysis_pool
+from app.detection.baselines import baseline_store
+from app.ai.reasoning import reasoning_service
 from app.api.routes.analyze import router as analyze_router
 
 
@@ -18,11 +32,63 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(RequestMetricsMiddleware)
+app.add_middleware(
+    ProfilingMiddleware,
+    profiler=profiler,
+    token=settings.PROFILER_TOKEN,
+    paths=[p.strip() for p in settings.PROFILER_PATHS.split(",") if p.strip()]
+)
+
+# statement timings for /metrics
+instrument_engine(engine)
 
 # create tables (MVP ONLY)
 Base.metadata.create_all(bind=engine)
+install_queue_schema(engine)
+install_counters(engine)
+install_search_indexes(engine)
 
 app.include_router(upload.router)
 app.include_router(alerts.router)
+app.include_router(dashboard.router)
 app.include_router(ws_router)
-app.include_router(analyze_router)
\ No newline at end of file
+app.include_router(admin.router)
+app.include_router(ai.router)
+app.include_router(incidents.router)
+app.include_router(events.router)
+app.include_router(analyze_router)
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return metrics_response()
+
+
+# after every route is registered: sync routes run in the threadpool
+profile_sync_routes(app, profiler)
+
+
+@app.on_event("startup")
+async def start_workers():
+    baseline_store.load()
+    app.state.baseline_autosave = asyncio.create_task(
+        baseline_store.run_autosave(settings.BASELINE_SAVE_INTERVAL)
+    )
+    await reasoning_service.start()
+    await analysis_pool.start()
+    await worker_pool.start()
+    await realtime_engine.start()
+    await file_ingestion.start()
+
+
+@app.on_event("shutdown")
+async def stop_workers():
+    await upload_jobs.stop()
+    await file_ingestion.stop()
+    await realtime_engine.stop()
+    await worker_pool.stop()
+    await analysis_pool.stop()
+    await reasoning_service.stop()
+    app.state.baseline_autosave.cancel()
+    baseline_store.save()
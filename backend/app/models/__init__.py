@@ -1 +1,5 @@
-from app.models.alert import Alert
\ No newline at end of file
+from app.models.alert import Alert
+from app.models.data_version import DataVersion
+from app.models.event import Event
+from app.models.reasoning_cache import ReasoningCache
+from app.models.incident import Incident
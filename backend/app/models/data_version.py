@@ -0,0 +1,14 @@
+from sqlalchemy import Column, String, BigInteger, DateTime
+from datetime import datetime
+
+from app.core.database import Base
+
+
+class DataVersion(Base):
+    __tablename__ = "data_versions"
+
+    name = Column(String(50), primary_key=True)
+
+    version = Column(BigInteger, nullable=False, default=0)
+
+    updated_at = Column(DateTime, default=datetime.utcnow)
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, Text, JSON, DateTime, Boolean
+from sqlalchemy import Column, Integer, Text, DateTime, Boolean, Index, text
+from sqlalchemy.dialects.postgresql import JSONB
 from datetime import datetime
 
 from app.core.database import Base
@@ -11,8 +12,21 @@ class Event(Base):
 
     raw_log = Column(Text)
 
-    normalized = Column(JSON)
+    # JSONB so field filters can use the search indexes (see event_search)
+    normalized = Column(JSONB)
 
     processed = Column(Boolean, default=False)
 
-    created_at = Column(DateTime, default=datetime.utcnow)
\ No newline at end of file
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    processed_at = Column(DateTime, nullable=True)
+
+    error = Column(Text, nullable=True)
+
+    # failed claims; at QUEUE_MAX_ATTEMPTS the event is dead-lettered
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+
+    __table_args__ = (
+        # keeps queue claims and lag queries on a small index as history grows
+        Index("ix_events_pending", "id", postgresql_where=text("processed = false")),
+    )
@@ -0,0 +1,35 @@
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, UniqueConstraint, Index
+from datetime import datetime
+
+from app.core.database import Base
+
+
+class Incident(Base):
+    __tablename__ = "incidents"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    # sha256 of the configured grouping fields (see INCIDENT_KEY)
+    group_key = Column(String(64), nullable=False)
+    window_start = Column(DateTime, nullable=False)
+
+    user = Column(String)
+    src_ip = Column(String)
+    event_type = Column(String)
+    priority = Column(String)
+
+    event_count = Column(Integer, nullable=False, default=1)
+    max_score = Column(Float, nullable=False, default=0)
+
+    first_seen = Column(DateTime, default=datetime.utcnow)
+    last_seen = Column(DateTime, default=datetime.utcnow)
+
+    # the one Alert row written for this incident
+    alert_id = Column(Integer, ForeignKey("alerts.id"), nullable=True)
+
+    status = Column(String, default="OPEN")
+
+    __table_args__ = (
+        UniqueConstraint("group_key", "window_start", name="uq_incidents_group_window"),
+        Index("ix_incidents_last_seen", "last_seen"),
+    )
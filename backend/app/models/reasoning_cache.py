@@ -0,0 +1,17 @@
+from sqlalchemy import Column, String, Text, DateTime
+from datetime import datetime
+
+from app.core.database import Base
+
+
+class ReasoningCache(Base):
+    __tablename__ = "ai_reasoning_cache"
+
+    # sha256 of the normalized alert signature
+    signature = Column(String(64), primary_key=True)
+
+    reasoning = Column(Text, nullable=False)
+
+    model = Column(String(100))
+
+    created_at = Column(DateTime, default=datetime.utcnow)
@@ -34,17 +34,58 @@ from datetime import datetime
 import pandas as pd
 
 
+# Tried in order; the first format that parses a whole sample wins and is
+# cached per source, so each later batch is parsed with one known format.
+TIME_FORMATS = [
+    "%Y-%m-%dT%H:%M:%SZ",
+    "%Y-%m-%dT%H:%M:%S.%fZ",
+    "%Y-%m-%dT%H:%M:%S%z",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%d %H:%M:%S.%f",
+    "%Y-%m-%d"
+]
+
+EPOCH_SECONDS = "epoch_s"
+EPOCH_MILLIS = "epoch_ms"
+ISO8601 = "ISO8601"
+
+NULL_STRINGS = ["nan", "none", "", "null"]
+
+FLAG_COLUMNS = ["is_failure", "is_login", "is_iam", "is_ec2", "is_s3"]
+
+_format_cache = {}
+
+
+def _epoch_format(number):
+    # epoch millis are >= 1e11 for any date after 1973
+    return EPOCH_MILLIS if abs(number) >= 1e11 else EPOCH_SECONDS
+
+
 def parse_time(value):
     if isinstance(value, datetime):
         return value
 
-    try:
-        return datetime.strptime(str(value), "%Y-%m-%d %H:%M:%S")
-    except:
+    if value is None or pd.isna(value):
+        return None
+
+    if isinstance(value, (int, float)):
+        unit = "ms" if _epoch_format(value) == EPOCH_MILLIS else "s"
+        return pd.to_datetime(value, unit=unit).to_pydatetime()
+
+    value = str(value).strip()
+
+    for fmt in TIME_FORMATS:
         try:
-            return datetime.strptime(str(value), "%Y-%m-%d")
-        except:
-            return datetime.now()
+            parsed = datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+
+        if parsed.tzinfo is not None:
+            parsed = pd.Timestamp(parsed).tz_convert(None).to_pydatetime()
+
+        return parsed
+
+    return None
 
 
 def clean_value(value, default="Unknown"):
@@ -53,7 +94,7 @@ def clean_value(value, default="Unknown"):
 
     value = str(value).strip()
 
-    if value.lower() in ["nan", "none", "", "null"]:
+    if value.lower() in NULL_STRINGS:
         return default
 
     return value
@@ -78,4 +119,122 @@ def adapt_event(row):
         "is_iam": row.get("is_iam", 0),
         "is_ec2": row.get("is_ec2", 0),
         "is_s3": row.get("is_s3", 0)
-    }
\ No newline at end of file
+    }
+
+
+# ---------------------- BATCH ADAPTER ----------------------
+
+def infer_time_format(values, sample_size=50, min_match=0.9):
+    """Pick the first known format that parses (almost) all of a sample."""
+
+    sample = pd.Series(values).dropna().head(sample_size)
+
+    if sample.empty:
+        return None
+
+    numeric = pd.to_numeric(sample, errors="coerce")
+
+    if numeric.notna().mean() >= min_match:
+        return _epoch_format(numeric.dropna().iloc[0])
+
+    sample = sample.astype(str).str.strip()
+
+    for fmt in TIME_FORMATS:
+        parsed = pd.to_datetime(sample, format=fmt, errors="coerce", utc="%z" in fmt)
+
+        if parsed.notna().mean() >= min_match:
+            return fmt
+
+    # mixed ISO-8601 variants (with and without fractions / offsets)
+    parsed = pd.to_datetime(sample, format=ISO8601, errors="coerce", utc=True)
+
+    if parsed.notna().mean() >= min_match:
+        return ISO8601
+
+    return None
+
+
+def _parse_with_format(series, fmt):
+
+    if fmt in (EPOCH_SECONDS, EPOCH_MILLIS):
+        unit = "ms" if fmt == EPOCH_MILLIS else "s"
+        return pd.to_datetime(pd.to_numeric(series, errors="coerce"), unit=unit, errors="coerce")
+
+    text = series.astype("string").str.strip()
+
+    if fmt is None or fmt == ISO8601:
+        parsed = pd.to_datetime(text, format=ISO8601, errors="coerce", utc=True)
+    else:
+        parsed = pd.to_datetime(text, format=fmt, errors="coerce", utc="%z" in fmt)
+
+    if getattr(parsed.dt, "tz", None) is not None:
+        parsed = parsed.dt.tz_convert(None)
+
+    return parsed
+
+
+def parse_time_column(series, source=None):
+    """Parse a whole timestamp column at once.
+
+    The format is inferred from a sample the first time a source is seen and
+    cached. Rows the cached format rejects get one ISO-8601 retry (sources
+    drift between `Z` and offset forms); anything still unparsed is NaT.
+    """
+
+    fmt = _format_cache.get(source)
+
+    if fmt is None:
+        fmt = infer_time_format(series)
+
+        if source is not None and fmt is not None:
+            _format_cache[source] = fmt
+
+    parsed = _parse_with_format(series, fmt)
+
+    retry = parsed.isna() & series.notna()
+
+    if retry.any() and fmt not in (None, ISO8601):
+        parsed[retry] = _parse_with_format(series[retry], None)
+
+    return parsed
+
+
+def clean_column(series, default="Unknown"):
+    """Vectorized clean_value: strip, and map null-like strings to default."""
+
+    text = series.astype("string").str.strip()
+    missing = text.isna() | text.str.lower().isin(NULL_STRINGS)
+
+    return text.where(~missing, default).astype(object)
+
+
+def adapt_frame(df, source=None):
+    """Adapt a whole DataFrame of CloudTrail rows in column operations.
+
+    Returns (events, rejected): rows whose eventtime cannot be parsed are
+    moved to `rejected` with a reason instead of being stamped with now().
+    """
+
+    event_time = parse_time_column(df["eventtime"], source)
+    user = clean_column(df["useridentityusername"])
+
+    events = pd.DataFrame({
+        "event_time": event_time,
+        "event_name": clean_column(df["eventname"]).str.lower(),
+
+        "user": user,
+        "user_identity": user,
+
+        "source_ip": clean_column(df["sourceipaddress"]),
+        "aws_region": clean_column(df["awsregion"]),
+        "event_source": clean_column(df["eventsource"])
+    }, index=df.index)
+
+    for col in FLAG_COLUMNS:
+        events[col] = df[col] if col in df.columns else 0
+
+    bad = event_time.isna()
+
+    rejected = df[bad].assign(reject_reason="unparseable eventtime")
+
+    return events[~bad], rejected
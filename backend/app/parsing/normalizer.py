@@ -1,8 +1,38 @@
-from app.parsing.parser import detect_log_type, extract_ip
+import json
+
+from app.parsing.parser import detect_log_type, extract_ip, parse_cloudtrail_event, AUTH_FAILURE_RE
+
+
+def _parse_json_event(raw_log: str):
+
+    if not raw_log.lstrip().startswith("{"):
+        return None
+
+    try:
+        event = json.loads(raw_log)
+    except ValueError:
+        return None
+
+    if isinstance(event, dict) and detect_log_type(event) != "unknown":
+        return event
+
+    return None
 
 
 def normalize_log(raw_log: str):
 
+    # CloudTrail records arrive as one JSON object per log
+    event = _parse_json_event(raw_log)
+
+    if event is not None:
+
+        normalized = parse_cloudtrail_event(event)
+        normalized.pop("raw_event", None)
+        normalized["event_type"] = normalized["action"]
+        normalized["raw"] = raw_log
+
+        return normalized
+
     log_type = detect_log_type(raw_log)
 
     normalized = {
@@ -14,8 +44,14 @@ def normalize_log(raw_log: str):
     if log_type == "LINUX_AUTH":
 
         normalized["event_type"] = "FAILED_LOGIN"
+        normalized["result"] = "FAILED"
+
+        match = AUTH_FAILURE_RE.search(raw_log)
+
+        if match and match.group("user"):
+            normalized["user"] = match.group("user")
 
         if "root" in raw_log:
             normalized["user"] = "root"
 
-    return normalized
\ No newline at end of file
+    return normalized
@@ -2,6 +2,12 @@ import re
 import ipaddress
 
 
+AUTH_FAILURE_RE = re.compile(
+    r"(?:Failed password|authentication failure|Invalid user)"
+    r"(?: for)?(?: invalid user)? ?(?P<user>[^\s;]+)?"
+)
+
+
 def extract_ip(value):
     if not value:
         return "unknown"
@@ -23,6 +29,9 @@ def extract_ip(value):
 
 
 def detect_log_type(event):
+    if isinstance(event, str):
+        return "LINUX_AUTH" if AUTH_FAILURE_RE.search(event) else "unknown"
+
     if not isinstance(event, dict):
         return "unknown"
 
@@ -37,6 +46,23 @@ def detect_log_type(event):
     return "unknown"
 
 
+# request parameters naming the principal (and policy) of IAM / STS calls;
+# the identity graph in detection/correlation_engine builds edges from them
+IAM_PARAMS = ("roleArn", "roleName", "userName", "groupName", "policyArn", "policyName")
+
+
+def iam_params(event):
+
+    params = event.get("requestParameters")
+
+    if not isinstance(params, dict):
+        return None
+
+    found = {key: params[key] for key in IAM_PARAMS if params.get(key)}
+
+    return found or None
+
+
 def parse_cloudtrail_event(event):
     user_identity = event.get("userIdentity", {})
 
@@ -46,11 +72,13 @@ def parse_cloudtrail_event(event):
             "userName",
             user_identity.get("arn", "unknown")
         ),
+        "user_arn": user_identity.get("arn"),
         "action": event.get("eventName", "unknown"),
         "src_ip": extract_ip(event.get("sourceIPAddress", "unknown")),
         "region": event.get("awsRegion", "unknown"),
         "result": "FAILED" if event.get("errorCode") else "SUCCESS",
         "error_code": event.get("errorCode"),
+        "iam_params": iam_params(event),
         "log_type": detect_log_type(event),
         "raw_event": event
     }
\ No newline at end of file
@@ -0,0 +1,65 @@
+from datetime import date, datetime
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from app.core.config import settings
+
+
+# Written by backend/utils/archive.py: <ARCHIVE_DIR>/alerts/day=YYYY-MM-DD/*.parquet
+
+def _archive_root():
+
+    return Path(settings.ARCHIVE_DIR) / "alerts"
+
+
+def archived_days():
+
+    root = _archive_root()
+
+    if not root.exists():
+        return []
+
+    days = []
+
+    for folder in root.iterdir():
+        if folder.is_dir() and folder.name.startswith("day="):
+            try:
+                days.append(date.fromisoformat(folder.name[4:]))
+            except ValueError:
+                continue
+
+    return sorted(days)
+
+
+def read_archived_alerts(since: datetime, until: datetime, limit: int):
+    """Archived alerts with since <= timestamp < until, newest first."""
+
+    days = [day for day in archived_days() if since.date() <= day <= until.date()]
+    files = [str(path) for day in days for path in (_archive_root() / f"day={day}").glob("*.parquet")]
+
+    if not files:
+        return []
+
+    dataset = ds.dataset(files, format="parquet")
+    stamp = dataset.schema.field("timestamp").type
+
+    table = dataset.to_table(
+        filter=(ds.field("timestamp") >= pa.scalar(since, type=stamp))
+        & (ds.field("timestamp") < pa.scalar(until, type=stamp))
+    )
+
+    rows = table.sort_by([("timestamp", "descending")]).slice(0, limit).to_pylist()
+
+    for row in rows:
+        row["archived"] = True
+
+    return rows
+
+
+def reaches_archive(since: datetime):
+
+    days = archived_days()
+
+    return bool(days) and since.date() <= days[-1]
@@ -3,20 +3,25 @@ from app.models.alert import Alert
 from datetime import datetime
 
 
-def create_alert(db: Session, event: dict):
+def build_alert(event: dict):
 
-    alert = Alert(
+    return Alert(
         timestamp=datetime.utcnow(),
         src_ip=event.get("src_ip"),
         user=event.get("user"),
         event_type=event.get("event_type"),
-        severity=event.get("severity"),
+        severity=event.get("severity") or event.get("priority"),
         risk_score=event.get("risk_score"),
         status="OPEN"
     )
 
+
+def create_alert(db: Session, event: dict):
+
+    alert = build_alert(event)
+
     db.add(alert)
     db.commit()
     db.refresh(alert)
 
-    return alert
\ No newline at end of file
+    return alert
@@ -0,0 +1,137 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from app.parsing.parser import parse_cloudtrail_event
+from app.detection.risk_engine import calculate_risk
+from app.detection.baselines import baseline_store
+from app.ai.explain import generate_explanation
+from app.core.config import settings
+
+
+def analyze_records(logs, explain: bool = True):
+    """Parse, baseline-annotate and score raw CloudTrail records, in order."""
+
+    results = []
+
+    for log in logs:
+
+        parsed = parse_cloudtrail_event(log)
+
+        # compare against learned baselines without learning from ad-hoc input
+        scored = calculate_risk(baseline_store.annotate(parsed))
+
+        if explain:
+            scored["explanation"] = generate_explanation(scored)
+
+        results.append(scored)
+
+    return results
+
+
+# ---------------- worker process side ----------------
+
+def _init_worker():
+
+    # the modules above are imported by now; only the baselines need loading
+    baseline_store.refresh()
+
+
+def _warm():
+
+    return os.getpid()
+
+
+def _analyze_shard(logs, explain):
+
+    # the API process snapshots its baselines every BASELINE_SAVE_INTERVAL,
+    # so workers annotate against a copy at most that old
+    baseline_store.refresh()
+    return analyze_records(logs, explain)
+
+
+class AnalysisPool:
+    """Pre-warmed process pool for large ad-hoc analysis batches.
+
+    Batches above `inline_max` records are cut into `shard_size` shards,
+    scored in worker processes and merged back in input order, so a
+    200k-record request no longer holds the event loop (and every
+    WebSocket with it). Smaller batches run inline, where pickling would
+    cost more than it saves. Workers are spawned (not forked from the
+    threaded server) and warmed at start-up.
+    """
+
+    def __init__(self, workers: int = 2, inline_max: int = 2000, shard_size: int = 5000):
+        self.workers = workers
+        self.inline_max = inline_max
+        self.shard_size = shard_size
+        self._pool = None
+
+        self.pooled_batches = 0
+        self.restarts = 0
+
+    async def start(self):
+
+        if self.workers <= 0 or self._pool is not None:
+            return
+
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker
+        )
+
+        # the executor spawns lazily; one task per worker starts them all now
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self._pool, _warm) for _ in range(self.workers)))
+
+    async def stop(self):
+
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def use_pool(self, count: int):
+
+        return self._pool is not None and count > self.inline_max
+
+    async def analyze(self, logs, explain: bool = True):
+        """Scored events for `logs` in input order; callers check use_pool() first."""
+
+        loop = asyncio.get_running_loop()
+        shards = [logs[i:i + self.shard_size] for i in range(0, len(logs), self.shard_size)]
+
+        try:
+            parts = await asyncio.gather(*(
+                loop.run_in_executor(self._pool, _analyze_shard, shard, explain)
+                for shard in shards
+            ))
+        except BrokenProcessPool:
+            # a worker died (OOM, kill); replace the pool and finish this
+            # batch in a thread so the request still succeeds
+            print("❌ Analysis worker died, restarting the pool")
+            self.restarts += 1
+            await self.stop()
+            await self.start()
+            return await asyncio.to_thread(analyze_records, logs, explain)
+
+        self.pooled_batches += 1
+        return [event for part in parts for event in part]
+
+    def stats(self):
+        return {
+            "workers": self.workers if self._pool is not None else 0,
+            "inline_max": self.inline_max,
+            "shard_size": self.shard_size,
+            "pooled_batches": self.pooled_batches,
+            "restarts": self.restarts
+        }
+
+
+analysis_pool = AnalysisPool(
+    workers=settings.ANALYZE_POOL_WORKERS,
+    inline_max=settings.ANALYZE_INLINE_MAX,
+    shard_size=settings.ANALYZE_SHARD_SIZE
+)
@@ -0,0 +1,113 @@
+import math
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from itertools import islice
+
+from app.ai.explain import generate_explanation
+from app.core.admission import Overloaded
+from app.core.config import settings
+
+
+class AnalysisStore:
+    """Server-side home for the heavy parts of ad-hoc analysis results.
+
+    Compact /api/analyze-logs responses carry only scores and reason codes;
+    the scored event (with its raw CloudTrail record) is kept here by alert
+    ID, and the explanation is generated on first request and memoized.
+
+    Every id handed out stays valid for `ttl` seconds: entries are never
+    evicted early, so one request's batch cannot push out ids another
+    request just returned. At `max_entries` live entries, put_many()
+    refuses the whole batch with Overloaded until enough of them expire.
+
+    The store is per worker process. An id only resolves on the worker
+    that ran the analysis, so with several API workers the lazy endpoints
+    need sticky routing (or a single worker).
+    """
+
+    def __init__(self, ttl: float = 3600.0, max_entries: int = 50000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()     # alert_id -> (expires, event, explanation)
+        self._lock = threading.Lock()
+
+    def _expire(self, now):
+
+        # every entry lives `ttl`, so insertion order is expiry order
+        while self._entries:
+            alert_id, entry = next(iter(self._entries.items()))
+            if entry[0] >= now:
+                break
+            del self._entries[alert_id]
+
+    def put_many(self, events):
+        """Store `events` and return their alert IDs, all or none."""
+
+        if not events:
+            return []
+
+        now = time.monotonic()
+        expires = now + self.ttl
+        alert_ids = [uuid.uuid4().hex for _ in events]
+
+        with self._lock:
+            self._expire(now)
+
+            short = len(self._entries) + len(events) - self.max_entries
+
+            if short > 0:
+                if len(events) > self.max_entries:
+                    retry_after = self.ttl
+                else:
+                    # until the `short` oldest entries have expired
+                    oldest = next(islice(self._entries.values(), short - 1, None))
+                    retry_after = oldest[0] - now
+                raise Overloaded("analysis-store", max(1, math.ceil(retry_after)))
+
+            for alert_id, event in zip(alert_ids, events):
+                self._entries[alert_id] = [expires, event, None]
+
+        return alert_ids
+
+    def _get(self, alert_id):
+
+        entry = self._entries.get(alert_id)
+
+        if entry is None:
+            return None
+
+        if entry[0] < time.monotonic():
+            del self._entries[alert_id]
+            return None
+
+        return entry
+
+    def raw_event(self, alert_id):
+
+        with self._lock:
+            entry = self._get(alert_id)
+            return entry[1].get("raw_event") if entry else None
+
+    def explanation(self, alert_id):
+
+        with self._lock:
+            entry = self._get(alert_id)
+
+            if entry is None:
+                return None
+
+            if entry[2] is None:
+                entry[2] = {
+                    **generate_explanation(entry[1]),
+                    "reasons": entry[1].get("reasons", [])
+                }
+
+            return entry[2]
+
+    def stats(self):
+        return {"entries": len(self._entries), "max_entries": self.max_entries, "ttl_seconds": self.ttl}
+
+
+analysis_store = AnalysisStore(settings.ANALYSIS_STORE_TTL, settings.ANALYSIS_STORE_MAX_ENTRIES)
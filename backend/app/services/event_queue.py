@@ -0,0 +1,337 @@
+import asyncio
+import time
+from datetime import datetime
+
+from sqlalchemy import case, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.core.admission import LowRiskSampler, paste_admission
+from app.core.cache import bump_data_version
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.profiler import profiler
+from app.ai.reasoning import reasoning_service
+from app.core.websocket_manager import manager
+from app.models.event import Event
+from app.services.incident_service import incident_key, record_alerts
+from app.services.pipeline_service import score_log, alert_payload
+
+
+# create_all never alters an existing events table, so the queue columns
+# added after the first release are installed here (idempotent)
+QUEUE_DDL = [
+    "ALTER TABLE events ADD COLUMN IF NOT EXISTS processed_at TIMESTAMP",
+    "ALTER TABLE events ADD COLUMN IF NOT EXISTS error TEXT",
+    "ALTER TABLE events ADD COLUMN IF NOT EXISTS attempts INTEGER NOT NULL DEFAULT 0",
+    "CREATE INDEX IF NOT EXISTS ix_events_pending ON events (id) WHERE processed = false",
+]
+
+
+def install_queue_schema(engine):
+
+    with engine.begin() as conn:
+        for ddl in QUEUE_DDL:
+            conn.exec_driver_sql(ddl)
+
+
+# ---------------- PRODUCER SIDE ----------------
+
+def enqueue_event(db: Session, raw_log: str):
+
+    event = Event(raw_log=raw_log, processed=False)
+
+    db.add(event)
+    db.commit()
+
+    return event.id
+
+
+def enqueue_events(db: Session, raw_logs):
+
+    raw_logs = list(raw_logs)
+
+    if not raw_logs:
+        return 0
+
+    now = datetime.utcnow()
+
+    db.execute(
+        insert(Event),
+        [{"raw_log": raw, "processed": False, "created_at": now} for raw in raw_logs]
+    )
+    db.commit()
+
+    return len(raw_logs)
+
+
+def enqueue_batch(raw_logs):
+    """Blocking sink for file ingestion: one bulk insert per batch."""
+
+    db = SessionLocal()
+
+    try:
+        return enqueue_events(db, raw_logs)
+    finally:
+        db.close()
+
+
+# ---------------- CONSUMER SIDE ----------------
+
+def claim_batch(db: Session, size: int):
+    """Lock up to `size` pending events; rows held by other workers are skipped.
+
+    Events of a failed batch are retried one at a time, so a single poison
+    event is dead-lettered without taking its batch neighbours along.
+    """
+
+    stmt = (
+        select(Event)
+        .where(Event.processed.is_(False))
+        .order_by(Event.id)
+        .limit(size)
+        .with_for_update(skip_locked=True)
+    )
+
+    events = db.execute(stmt).scalars().all()
+
+    if events and events[0].attempts:
+        return events[:1]
+
+    return events
+
+
+def record_failure(db: Session, ids, error, now, max_attempts):
+    """Count a failed attempt for `ids`; returns how many were dead-lettered.
+
+    Dead-lettered events leave the queue as processed with the error kept,
+    so they stay searchable instead of being claimed (and fed to the
+    baselines) forever.
+    """
+
+    exhausted = Event.attempts + 1 >= max_attempts
+
+    rows = db.execute(
+        update(Event)
+        .where(Event.id.in_(ids))
+        .values(
+            attempts=Event.attempts + 1,
+            processed=exhausted,
+            processed_at=case((exhausted, now), else_=None),
+            error=case((exhausted, f"dead-lettered after {max_attempts} attempts: {error}"[:2000]), else_=Event.error)
+        )
+        .returning(Event.processed)
+    ).scalars().all()
+
+    db.commit()
+
+    return sum(1 for processed in rows if processed)
+
+
+def under_pressure(events, now):
+    """True while the queue lags or /paste-log is close to its admission limit."""
+
+    oldest = events[0].created_at
+    lag = (now - oldest).total_seconds() if oldest else 0.0
+
+    return lag > settings.SHED_QUEUE_LAG_SECONDS or paste_admission.under_pressure()
+
+
+def process_batch(db: Session, size: int, sampler: LowRiskSampler = None):
+    """Claim a batch, run normalize -> score -> alert/incident, and mark it processed.
+
+    Everything commits in one transaction, so a crashed worker simply
+    releases its locks and the batch is picked up again. A batch that
+    raises is rolled back and its attempts counted (see record_failure),
+    so it cannot be re-claimed forever. Under pressure, LOW events are
+    still normalized and stored (and feed the baselines), but only those
+    `sampler` keeps go on to the alert/incident writes.
+    """
+
+    events = claim_batch(db, size)
+
+    if not events:
+        db.rollback()
+        return [], 0, 0
+
+    ids = [event.id for event in events]
+
+    try:
+        return _process_claimed(db, events, sampler)
+    except Exception as e:
+        db.rollback()
+        dead = record_failure(db, ids, e, datetime.utcnow(), settings.QUEUE_MAX_ATTEMPTS)
+        if dead:
+            print(f"☠️ Dead-lettered {dead} events after {settings.QUEUE_MAX_ATTEMPTS} failed attempts:", e)
+        raise
+
+
+def _process_claimed(db: Session, events, sampler: LowRiskSampler = None):
+
+    scored_events = []
+    scored_rows = []
+    failed = 0
+    now = datetime.utcnow()
+    shedding = sampler is not None and under_pressure(events, now)
+
+    for event in events:
+
+        try:
+            scored = score_log(event.raw_log, pipeline="queue")
+            event.normalized = {k: v for k, v in scored.items() if k != "raw"}
+
+            if shedding and not sampler.keep(scored):
+                event.normalized["sampled_out"] = True
+            else:
+                scored_events.append(scored)
+                scored_rows.append(event)
+
+        except Exception as e:
+            event.error = str(e)
+            failed += 1
+
+        event.processed = True
+        event.processed_at = now
+
+    # repeats of an open incident update it in place instead of adding alerts
+    new_alerts, incident_updates, incident_ids = record_alerts(db, scored_events, now)
+
+    # events folded into an open incident get no alert of their own; the
+    # incident id is what links them to it. Reassigned, not mutated: the
+    # JSONB column does not track in-place changes after a flush.
+    for event, scored in zip(scored_rows, scored_events):
+        incident_id = incident_ids.get(incident_key(scored))
+        if incident_id is not None:
+            event.normalized = {**event.normalized, "incident_id": incident_id}
+
+    if new_alerts:
+        bump_data_version(db, "alerts")
+
+    # flush assigns alert ids; build payloads before commit expires them
+    db.flush()
+    payloads = [alert_payload(alert, incident_id) for alert, _, incident_id in new_alerts]
+
+    db.commit()
+
+    for payload, (_, scored, _) in zip(payloads, new_alerts):
+        reasoning_service.submit(payload["id"], scored)
+
+    payloads.extend(incident_updates)
+
+    return payloads, len(events), failed
+
+
+def queue_depth(db: Session):
+
+    depth, oldest = db.execute(
+        select(func.count(Event.id), func.min(Event.created_at))
+        .where(Event.processed.is_(False))
+    ).one()
+
+    lag = (datetime.utcnow() - oldest).total_seconds() if oldest else 0.0
+
+    return {
+        "pending": depth,
+        "oldest_pending_at": oldest.isoformat() if oldest else None,
+        "lag_seconds": round(lag, 3)
+    }
+
+
+class EventWorkerPool:
+    """Async workers draining the `events` table with SKIP LOCKED claims.
+
+    DB work runs in a thread per batch so the event loop stays free; more
+    throughput comes from more workers here or more API processes, since
+    claims never overlap.
+    """
+
+    def __init__(self, workers: int, batch_size: int, poll_interval: float):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._tasks = []
+        self._running = False
+        self.sampler = LowRiskSampler("queue", settings.SHED_LOW_SAMPLE_EVERY)
+
+        self.batches = 0
+        self.processed = 0
+        self.failed = 0
+        self.batch_seconds = 0.0
+
+    def _run_batch(self):
+
+        db = SessionLocal()
+
+        try:
+            if profiler.should_sample():
+                with profiler.profile("queue batch"):
+                    return process_batch(db, self.batch_size, self.sampler)
+            return process_batch(db, self.batch_size, self.sampler)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def _worker(self, worker_id: int):
+
+        while self._running:
+
+            started = time.perf_counter()
+
+            try:
+                payloads, claimed, failed = await asyncio.to_thread(self._run_batch)
+            except Exception as e:
+                print(f"❌ Queue worker {worker_id} error:", e)
+                await asyncio.sleep(self.poll_interval)
+                continue
+
+            if not claimed:
+                await asyncio.sleep(self.poll_interval)
+                continue
+
+            self.batches += 1
+            self.processed += claimed
+            self.failed += failed
+            self.batch_seconds += time.perf_counter() - started
+
+            for payload in payloads:
+                await manager.broadcast(payload)
+
+    async def start(self):
+
+        if self._running:
+            return
+
+        self._running = True
+        self._tasks = [
+            asyncio.create_task(self._worker(i)) for i in range(self.workers)
+        ]
+
+    async def stop(self):
+
+        self._running = False
+
+        for task in self._tasks:
+            task.cancel()
+
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self):
+
+        return {
+            "workers": self.workers,
+            "batch_size": self.batch_size,
+            "batches": self.batches,
+            "processed": self.processed,
+            "failed": self.failed,
+            "avg_batch_ms": round(1000 * self.batch_seconds / self.batches, 3) if self.batches else 0.0,
+            "shedding": self.sampler.stats()
+        }
+
+
+worker_pool = EventWorkerPool(
+    workers=settings.QUEUE_WORKERS,
+    batch_size=settings.QUEUE_BATCH_SIZE,
+    poll_interval=settings.QUEUE_POLL_INTERVAL
+)
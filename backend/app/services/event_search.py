@@ -0,0 +1,165 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, text, tuple_
+from sqlalchemy.orm import Session
+
+from app.models.event import Event
+
+
+# Normalized keys with their own (key, created_at) expression index; the
+# names CloudTrail uses are accepted as aliases.
+INDEXED_FIELDS = ("action", "user", "src_ip", "error_code")
+
+FIELD_ALIASES = {
+    "eventName": "action",
+    "userName": "user",
+    "userIdentity.userName": "user",
+    "userIdentity.arn": "user_arn",
+    "sourceIPAddress": "src_ip",
+    "errorCode": "error_code",
+    "awsRegion": "region"
+}
+
+MAX_LOOKBACK = timedelta(days=31)
+MIN_SUBSTRING = 3     # shorter patterns cannot use the trigram index
+
+SEARCH_DDL = """
+    ALTER TABLE events ALTER COLUMN normalized TYPE JSONB USING normalized::jsonb;
+"""
+
+INDEX_DDL = [
+    # containment (@>) on any normalized field
+    "CREATE INDEX IF NOT EXISTS ix_events_normalized_gin "
+    "ON events USING gin (normalized jsonb_path_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_events_created_at ON events (created_at)",
+] + [
+    f"CREATE INDEX IF NOT EXISTS ix_events_{field} "
+    f"ON events ((normalized ->> '{field}'), created_at)"
+    for field in INDEXED_FIELDS
+]
+
+TRGM_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_events_raw_log_trgm ON events USING gin (raw_log gin_trgm_ops)"
+]
+
+
+def install_search_indexes(engine):
+    """Convert `events.normalized` to JSONB (once) and create the search indexes."""
+
+    with engine.begin() as conn:
+
+        column_type = conn.execute(
+            text("""
+                SELECT data_type FROM information_schema.columns
+                WHERE table_name = 'events' AND column_name = 'normalized'
+            """)
+        ).scalar()
+
+        if column_type == "json":
+            conn.exec_driver_sql(SEARCH_DDL)
+
+        for ddl in INDEX_DDL:
+            conn.exec_driver_sql(ddl)
+
+    # pg_trgm may need rights the app user lacks; substring search still
+    # works without it, as a sequential scan
+    try:
+        with engine.begin() as conn:
+            for ddl in TRGM_DDL:
+                conn.exec_driver_sql(ddl)
+    except Exception as e:
+        print("⚠️ Trigram index on events.raw_log not installed:", e)
+
+
+def resolve_field(name: str):
+
+    return FIELD_ALIASES.get(name, name)
+
+
+def naive_utc(value: datetime):
+    """created_at is naive UTC; aware bounds (e.g. "...Z") are converted to match."""
+
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+    return value
+
+
+def encode_cursor(row):
+
+    return f"{row['created_at'].isoformat()}_{row['id']}"
+
+
+def decode_cursor(cursor: str):
+
+    try:
+        stamp, event_id = cursor.rsplit("_", 1)
+        return naive_utc(datetime.fromisoformat(stamp)), int(event_id)
+    except ValueError:
+        raise ValueError(f"Invalid cursor {cursor!r}") from None
+
+
+def search_events(
+    db: Session,
+    fields: dict = None,
+    contains: str = None,
+    since: datetime = None,
+    until: datetime = None,
+    cursor: str = None,
+    limit: int = 100,
+    include_raw: bool = False
+):
+    """Events matching every field filter and raw-log substring, newest first.
+
+    Indexed fields compile to `normalized ->> 'key' = value`, other fields
+    to a JSONB containment test on the GIN index, and `contains` to an
+    ILIKE on the trigram index. The time range is capped at MAX_LOOKBACK.
+    Pages continue from `cursor`, a (created_at, id) keyset position, so
+    rows sharing a timestamp or inserted out of id order are neither
+    skipped nor repeated.
+    """
+
+    until = naive_utc(until) or datetime.utcnow()
+    since = max(naive_utc(since) or until - timedelta(days=7), until - MAX_LOOKBACK)
+
+    if contains is not None and len(contains) < MIN_SUBSTRING:
+        raise ValueError(f"Substring search needs at least {MIN_SUBSTRING} characters")
+
+    columns = [Event.id, Event.created_at, Event.processed, Event.normalized]
+
+    if include_raw:
+        columns.append(Event.raw_log)
+
+    query = select(*columns).where(Event.created_at >= since, Event.created_at < until)
+
+    contained = {}
+
+    for name, value in (fields or {}).items():
+        key = resolve_field(name)
+        if key in INDEXED_FIELDS:
+            query = query.where(Event.normalized[key].astext == value)
+        else:
+            contained[key] = value
+
+    if contained:
+        query = query.where(Event.normalized.contains(contained))
+
+    if contains:
+        escaped = contains.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        query = query.where(Event.raw_log.ilike(f"%{escaped}%", escape="\\"))
+
+    if cursor is not None:
+        query = query.where(tuple_(Event.created_at, Event.id) < tuple_(*decode_cursor(cursor)))
+
+    rows = db.execute(
+        query.order_by(Event.created_at.desc(), Event.id.desc()).limit(limit)
+    ).mappings().all()
+
+    return {
+        "since": since.isoformat(),
+        "until": until.isoformat(),
+        "count": len(rows),
+        "next_cursor": encode_cursor(rows[-1]) if len(rows) == limit else None,
+        "events": [dict(row) for row in rows]
+    }
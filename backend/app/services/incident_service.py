@@ -0,0 +1,175 @@
+import hashlib
+import json
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, literal_column, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.incident import Incident
+from app.services.alert_service import build_alert
+
+
+INCIDENT_FIELDS = [name.strip() for name in settings.INCIDENT_KEY.split(",") if name.strip()]
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def _field(event: dict, name: str):
+
+    if name == "priority":
+        return event.get("priority") or event.get("severity")
+
+    if name == "event_type":
+        return event.get("event_type") or event.get("action")
+
+    return event.get(name)
+
+
+def incident_key(event: dict, fields=INCIDENT_FIELDS):
+
+    values = {name: _field(event, name) for name in fields}
+    digest = hashlib.sha256(json.dumps(values, sort_keys=True, default=str).encode()).hexdigest()
+
+    return digest
+
+
+def window_start(now: datetime, seconds: int):
+
+    elapsed = int((now - EPOCH).total_seconds())
+
+    return EPOCH + timedelta(seconds=elapsed - elapsed % seconds)
+
+
+def _group(events):
+    """Collapse a batch per incident key; the highest-scoring event represents it."""
+
+    groups = OrderedDict()
+
+    for event in events:
+
+        digest = incident_key(event)
+        score = float(event.get("risk_score") or 0)
+        group = groups.get(digest)
+
+        if group is None:
+            groups[digest] = {"event": event, "count": 1, "max_score": score}
+            continue
+
+        group["count"] += 1
+
+        if score > group["max_score"]:
+            group["max_score"] = score
+            group["event"] = event
+
+    return groups
+
+
+def incident_update_payload(row, event):
+
+    return {
+        "type": "incident_update",
+        "incident_id": row.id,
+        "user": event.get("user"),
+        "src_ip": event.get("src_ip"),
+        "event_type": _field(event, "event_type"),
+        "severity": _field(event, "priority"),
+        "event_count": row.event_count,
+        "max_score": row.max_score
+    }
+
+
+def record_alerts(db: Session, events, now: datetime = None):
+    """Turn scored events into alerts, folding repeats into incidents.
+
+    Returns (new_alerts, incident_updates, incident_ids): `new_alerts`
+    holds (Alert, event, incident_id) for incidents opened by this call
+    (one flushed Alert row each), `incident_updates` holds push payloads
+    for existing incidents whose count crossed a power of two, so an
+    attack of n events costs O(log n) pushes instead of n, and
+    `incident_ids` maps the incident_key() of every event to the incident
+    it was opened or folded into (empty without aggregation).
+    """
+
+    events = list(events)
+
+    if not events:
+        return [], [], {}
+
+    if not settings.INCIDENT_AGGREGATION:
+        new_alerts = [(build_alert(event), event, None) for event in events]
+        db.add_all([alert for alert, _, _ in new_alerts])
+        db.flush()
+        return new_alerts, [], {}
+
+    now = now or datetime.utcnow()
+    start = window_start(now, settings.INCIDENT_WINDOW_SECONDS)
+    groups = _group(events)
+
+    rows = [
+        {
+            "group_key": digest,
+            "window_start": start,
+            "user": group["event"].get("user"),
+            "src_ip": group["event"].get("src_ip"),
+            "event_type": _field(group["event"], "event_type"),
+            "priority": _field(group["event"], "priority"),
+            "event_count": group["count"],
+            "max_score": group["max_score"],
+            "first_seen": now,
+            "last_seen": now,
+            "status": "OPEN"
+        }
+        # a fixed lock order keeps concurrent workers from deadlocking
+        for digest, group in sorted(groups.items())
+    ]
+
+    stmt = insert(Incident).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_incidents_group_window",
+        set_={
+            "event_count": Incident.event_count + stmt.excluded.event_count,
+            "max_score": func.greatest(Incident.max_score, stmt.excluded.max_score),
+            "last_seen": stmt.excluded.last_seen
+        }
+    ).returning(
+        Incident.id,
+        Incident.group_key,
+        Incident.event_count,
+        Incident.max_score,
+        # xmax is 0 only for rows this statement inserted
+        literal_column("xmax = 0").label("inserted")
+    )
+
+    new_alerts = []
+    incident_updates = []
+    incident_ids = {}
+
+    for row in db.execute(stmt).all():
+
+        group = groups[row.group_key]
+        incident_ids[row.group_key] = row.id
+
+        if row.inserted:
+            new_alerts.append((build_alert(group["event"]), group["event"], row.id))
+
+        elif (row.event_count - group["count"]).bit_length() < row.event_count.bit_length():
+            incident_updates.append(incident_update_payload(row, group["event"]))
+
+    # every group was either inserted or folded into its window's incident;
+    # a missing row would leave its events pointing at no incident
+    if incident_ids.keys() != groups.keys():
+        raise RuntimeError(
+            f"Incident upsert returned {len(incident_ids)} rows for {len(groups)} incident keys"
+        )
+
+    if new_alerts:
+        db.add_all([alert for alert, _, _ in new_alerts])
+        db.flush()
+
+        for alert, _, incident_id in new_alerts:
+            db.execute(update(Incident).where(Incident.id == incident_id).values(alert_id=alert.id))
+
+    return new_alerts, incident_updates, incident_ids
@@ -0,0 +1,96 @@
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from common.counters import install_counters as _install_counters
+
+
+# window name -> (lookback interval, chart resolution)
+SERIES_WINDOWS = {
+    "1h": ("1 hour", "minute"),
+    "24h": ("24 hours", "hour"),
+    "7d": ("7 days", "hour")
+}
+
+
+def install_counters(engine):
+    """Create counter tables and the alerts trigger, backfilling once.
+
+    A statement-level trigger on `alerts` keeps per-minute counters up to
+    date, so dashboard polls read a tiny table instead of the alerts table.
+    """
+
+    with engine.begin() as conn:
+        _install_counters(
+            "alerts",
+            conn.exec_driver_sql,
+            lambda sql: conn.exec_driver_sql(sql).first() is not None
+        )
+
+
+def dashboard_counters(db: Session, source: str = "alerts"):
+
+    row = db.execute(
+        text("""
+            SELECT
+                COALESCE(SUM(events), 0) AS total,
+                COALESCE(SUM(events) FILTER (WHERE priority = 'CRITICAL'), 0) AS critical,
+                COALESCE(SUM(events) FILTER (WHERE priority = 'HIGH'), 0) AS high,
+                COALESCE(SUM(events) FILTER (WHERE priority = 'MEDIUM'), 0) AS medium,
+                COALESCE(SUM(events) FILTER (WHERE priority = 'LOW'), 0) AS low,
+                COALESCE(SUM(score_sum), 0) AS score_sum,
+                (SELECT COUNT(*) FROM metric_users WHERE source = :source) AS unique_users
+            FROM metric_counters
+            WHERE source = :source
+        """),
+        {"source": source}
+    ).mappings().one()
+
+    total = int(row["total"])
+
+    return {
+        "total": total,
+        "by_priority": {
+            "CRITICAL": int(row["critical"]),
+            "HIGH": int(row["high"]),
+            "MEDIUM": int(row["medium"]),
+            "LOW": int(row["low"])
+        },
+        "unique_users": int(row["unique_users"]),
+        "avg_score": float(row["score_sum"]) / total if total else 0.0
+    }
+
+
+def dashboard_series(db: Session, source: str = "alerts", window: str = "24h"):
+
+    if window not in SERIES_WINDOWS:
+        raise ValueError(f"Unsupported window: {window}")
+
+    lookback, resolution = SERIES_WINDOWS[window]
+
+    rows = db.execute(
+        text(f"""
+            SELECT date_trunc('{resolution}', bucket) AS ts,
+                   priority,
+                   SUM(events) AS events
+            FROM metric_counters
+            WHERE source = :source
+              AND bucket >= (now() AT TIME ZONE 'UTC') - interval '{lookback}'
+            GROUP BY 1, 2
+            ORDER BY 1
+        """),
+        {"source": source}
+    ).all()
+
+    points = {}
+
+    for ts, priority, events in rows:
+        point = points.setdefault(ts, {"timestamp": ts.isoformat(), "total": 0})
+        point[priority] = int(events)
+        point["total"] += int(events)
+
+    return {
+        "source": source,
+        "window": window,
+        "resolution": resolution,
+        "series": list(points.values())
+    }
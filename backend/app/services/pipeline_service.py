@@ -1,33 +1,147 @@
+import ipaddress
+
 from app.parsing.normalizer import normalize_log
 from app.detection.risk_engine import calculate_risk
-from app.services.alert_service import create_alert
+from app.detection.baselines import baseline_store
+from app.detection.correlation_engine import identity_graph
+from app.ai.reasoning import reasoning_service
+from app.services.incident_service import record_alerts
 from app.core.websocket_manager import manager
+from app.core.cache import bump_data_version
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.realtime_engine import RealtimeEngine, Stage
+from app.core.telemetry import timed_stage
 
 
-async def process_event(raw_log: str, db):
+def score_log(raw_log: str, pipeline: str = "inline"):
 
     # 1. Normalize
-    normalized = normalize_log(raw_log)
+    with timed_stage(pipeline, "normalize"):
+        normalized = normalize_log(raw_log)
+
+    # 2. Deviation from the identity's baseline, then risk scoring
+    with timed_stage(pipeline, "baseline"):
+        baseline_store.observe(normalized)
+
+    # escalation chains across identities (AssumeRole -> Attach*Policy -> ...)
+    with timed_stage(pipeline, "graph"):
+        identity_graph.observe(normalized)
 
-    # 2. Risk scoring
-    risk = calculate_risk(normalized)
-    normalized.update(risk)
+    with timed_stage(pipeline, "score"):
+        risk = calculate_risk(normalized)
+        normalized.update(risk)
 
-    # 3. Store in DB
-    alert = create_alert(db, normalized)
+    return normalized
 
-    # 4. REALTIME PUSH (WebSocket)
-    await manager.broadcast({
+
+def alert_payload(alert, incident_id=None):
+
+    payload = {
         "id": alert.id,
         "src_ip": alert.src_ip,
         "event_type": alert.event_type,
         "severity": alert.severity,
         "risk_score": alert.risk_score
-    })
+    }
 
-    # 5. Return response
-    return {
-        "alert_id": alert.id,
-        "severity": alert.severity,
-        "risk_score": alert.risk_score
-    }
\ No newline at end of file
+    if incident_id is not None:
+        payload["incident_id"] = incident_id
+
+    return payload
+
+
+def record_event(db, event: dict):
+    """Store one scored event; return its push payload, or None when it only
+    bumped an incident's counters below the next notification point."""
+
+    new_alerts, incident_updates, _ = record_alerts(db, [event])
+
+    if new_alerts:
+        bump_data_version(db, "alerts")
+
+    payloads = [alert_payload(alert, incident_id) for alert, _, incident_id in new_alerts]
+    db.commit()
+
+    # LLM reasoning is filled in later for alerts above the threshold
+    for payload in payloads:
+        reasoning_service.submit(payload["id"], event)
+
+    payloads.extend(incident_updates)
+
+    return payloads[0] if payloads else None
+
+
+# ---------------- STAGED REALTIME PIPELINE ----------------
+
+def enrich_event(event: dict):
+
+    ip = event.get("src_ip", "unknown")
+
+    try:
+        event["ip_scope"] = "private" if ipaddress.ip_address(ip).is_private else "external"
+    except ValueError:
+        event["ip_scope"] = "unknown"
+
+    return identity_graph.observe(baseline_store.observe(event))
+
+
+def persist_event(event: dict):
+
+    db = SessionLocal()
+
+    try:
+        return record_event(db, event)
+    finally:
+        db.close()
+
+
+async def broadcast_alert(payload: dict):
+
+    await manager.broadcast(payload)
+
+
+def _stage_settings(spec: str):
+
+    values = {}
+
+    for part in spec.split(","):
+        if "=" in part:
+            name, value = part.split("=", 1)
+            values[name.strip()] = int(value)
+
+    return values
+
+
+def build_realtime_engine():
+
+    concurrency = _stage_settings(settings.ENGINE_STAGE_CONCURRENCY)
+    in_process_pool = {
+        name.strip() for name in settings.ENGINE_PROCESS_STAGES.split(",") if name.strip()
+    }
+    # enrich updates the in-memory baselines, so it must run in this process
+    in_process_pool.discard("enrich")
+
+    def stage(name, func, **kwargs):
+        return Stage(
+            name=name,
+            func=func,
+            concurrency=concurrency.get(name, 1),
+            cpu_bound=name in in_process_pool,
+            queue_size=settings.ENGINE_QUEUE_SIZE,
+            **kwargs
+        )
+
+    return RealtimeEngine(
+        [
+            stage("normalize", normalize_log),
+            stage("enrich", enrich_event),
+            stage("score", calculate_risk),
+            stage("persist", persist_event, blocking=True),
+            stage("broadcast", broadcast_alert)
+        ],
+        process_workers=settings.ENGINE_PROCESS_WORKERS
+    )
+
+
+realtime_engine = build_realtime_engine()
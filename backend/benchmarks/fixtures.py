@@ -0,0 +1,100 @@
+import json
+import random
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from app.ingestion import simulator
+
+
+# Deterministic synthetic inputs; the same (size, seed) always yields the
+# same data so runs are comparable against a saved baseline.
+
+MALFORMED_IPS = ["5.205", "-", "unknown", "10.0.1", "300.1.2.3", " 45.67.89.10 ", "nan"]
+
+
+def cloudtrail_events(size, seed=42):
+    rng = random.Random(seed)
+    start = datetime(2026, 1, 1)
+    return [simulator.synth_cloudtrail_event(rng, start + timedelta(seconds=i)) for i in range(size)]
+
+
+def raw_logs(size, seed=42):
+    """Mixed raw strings as they reach normalize_log: CloudTrail JSON and auth.log lines."""
+
+    rng = random.Random(seed)
+    start = datetime(2026, 1, 1)
+    logs = []
+
+    for i in range(size):
+        when = start + timedelta(seconds=i)
+        if rng.random() < 0.5:
+            logs.append(simulator.synth_authlog_line(rng, when))
+        else:
+            logs.append(json.dumps(simulator.synth_cloudtrail_event(rng, when)))
+
+    return logs
+
+
+def ip_values(size, seed=42):
+    rng = random.Random(seed)
+    pool = simulator.INTERNAL_IPS + simulator.EXTERNAL_IPS + MALFORMED_IPS
+    return [rng.choice(pool) for _ in range(size)]
+
+
+def parsed_events(size, seed=42):
+    from app.parsing.parser import parse_cloudtrail_event
+    return [parse_cloudtrail_event(event) for event in cloudtrail_events(size, seed)]
+
+
+def adapter_rows(size, seed=42):
+    """Rows shaped like the preprocessed CSV consumed by adapter.adapt_event."""
+
+    rows = []
+
+    for event in cloudtrail_events(size, seed):
+        action = event["eventName"]
+        rows.append({
+            "eventtime": event["eventTime"].replace("T", " ").rstrip("Z"),
+            "eventname": action,
+            "useridentityusername": event["userIdentity"]["userName"],
+            "sourceipaddress": event["sourceIPAddress"],
+            "awsregion": event["awsRegion"],
+            "eventsource": event["eventSource"],
+            "is_failure": int("errorCode" in event),
+            "is_login": int(action == "ConsoleLogin"),
+            "is_iam": 1,
+            "is_ec2": int(action == "DescribeInstances"),
+            "is_s3": 0
+        })
+
+    return rows
+
+
+def enriched_frame(size, seed=42):
+    """DataFrame with the columns the Flask loaders insert into enriched_logs."""
+
+    rng = random.Random(seed)
+    rows = []
+
+    for event in cloudtrail_events(size, seed):
+        failed = "errorCode" in event
+        score = rng.randint(0, 100)
+        rows.append({
+            "eventID": event["eventID"],
+            "timestamp": event["eventTime"].replace("T", " ").rstrip("Z"),
+            "user": event["userIdentity"]["userName"],
+            "action": event["eventName"],
+            "src_ip": event["sourceIPAddress"],
+            "result": "Failure" if failed else "Success",
+            "result_flag": int(failed),
+            "alert_score": score,
+            "prelim_priority": "high" if score >= 70 else "medium" if score >= 40 else "low",
+            "country": rng.choice(["US", "IN", "DE", "RU", "CN"]),
+            "ti_country": None,
+            "ti_score": rng.randint(0, 100)
+        })
+
+    df = pd.DataFrame(rows)
+    df["ti_country"] = df["country"]
+    return df
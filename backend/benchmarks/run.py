@@ -0,0 +1,314 @@
+"""
+run.py – micro-benchmarks for parsing, scoring and loading
+
+Run from backend/:
+
+    python -m benchmarks.run --size 5000 --repeats 7
+    python -m benchmarks.run --db                       # include DB loaders
+    python -m benchmarks.run --save-baseline            # record a new baseline
+    python -m benchmarks.run --baseline benchmarks/baseline.json --threshold 0.15
+
+Every run writes a JSON report to benchmarks/results/. With a baseline,
+each benchmark's median time per op is compared against it and the run
+exits non-zero when any benchmark got slower than the threshold allows.
+
+The --db loaders insert the fixture rows into the database configured in
+backend/utils/db_config.py (DB_* env vars) – point it at a scratch database.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from benchmarks import fixtures
+
+
+BENCH_DIR = Path(__file__).resolve().parent
+RESULTS_DIR = BENCH_DIR / "results"
+BASELINE_PATH = BENCH_DIR / "baseline.json"
+REPO_ROOT = BENCH_DIR.parents[1]
+
+BENCHMARKS = {}
+
+
+def benchmark(name, db=False):
+    """Register a setup function: setup(size, seed) -> zero-arg callable doing `size` ops."""
+
+    def register(setup):
+        BENCHMARKS[name] = {"setup": setup, "db": db}
+        return setup
+
+    return register
+
+
+# ---------------- PARSING / SCORING ----------------
+
+@benchmark("parser.parse_cloudtrail_event")
+def bench_parse_cloudtrail(size, seed):
+    from app.parsing.parser import parse_cloudtrail_event
+    events = fixtures.cloudtrail_events(size, seed)
+    return lambda: [parse_cloudtrail_event(e) for e in events]
+
+
+@benchmark("parser.extract_ip")
+def bench_extract_ip(size, seed):
+    from app.parsing.parser import extract_ip
+    values = fixtures.ip_values(size, seed)
+    return lambda: [extract_ip(v) for v in values]
+
+
+@benchmark("normalizer.normalize_log")
+def bench_normalize_log(size, seed):
+    from app.parsing.normalizer import normalize_log
+    logs = fixtures.raw_logs(size, seed)
+    return lambda: [normalize_log(log) for log in logs]
+
+
+@benchmark("risk_engine.calculate_risk")
+def bench_calculate_risk(size, seed):
+    from app.detection.risk_engine import calculate_risk
+    events = fixtures.parsed_events(size, seed)
+    return lambda: [calculate_risk(e) for e in events]
+
+
+@benchmark("adapter.adapt_event")
+def bench_adapt_event(size, seed):
+    from app.parsing.adapter import adapt_event
+    rows = fixtures.adapter_rows(size, seed)
+    return lambda: [adapt_event(row) for row in rows]
+
+
+@benchmark("ti_enrich.normalize_ip")
+def bench_normalize_ip(size, seed):
+    from backend.utils.ti_enrich import normalize_ip
+    values = fixtures.ip_values(size, seed)
+    return lambda: [normalize_ip(v) for v in values]
+
+
+# ---------------- LOADERS (need a database) ----------------
+
+@benchmark("load_to_db.insert_logs", db=True)
+def bench_insert_logs(size, seed):
+    from backend.utils.load_to_db import insert_logs
+    from backend.utils.dimension_cache import clear_dimension_caches
+    df = fixtures.enriched_frame(size, seed)
+    runs = iter(range(1_000_000))
+
+    def run():
+        # measure a cold dimension cache every repeat; fresh event ids so
+        # the rows are inserted rather than skipped as replays
+        clear_dimension_caches()
+        insert_logs(df.assign(eventID=df["eventID"] + f"-{next(runs)}"))
+
+    return run
+
+
+@benchmark("load_to_db.insert_logs (replay)", db=True)
+def bench_insert_logs_replay(size, seed):
+    from backend.utils.load_to_db import insert_logs
+    df = fixtures.enriched_frame(size, seed).assign(eventID=lambda d: d["eventID"] + "-replay")
+
+    # every repeat after the first load is a replay skipped by the dedupe filter
+    insert_logs(df)
+    return lambda: insert_logs(df)
+
+
+@benchmark("db_init.load_data", db=True)
+def bench_load_data(size, seed):
+    from backend.db_init import load_data
+    from backend.utils.dimension_cache import clear_dimension_caches
+    path = Path(tempfile.mkdtemp()) / "enriched_logs.csv"
+    fixtures.enriched_frame(size, seed).to_csv(path, index=False)
+
+    def run():
+        # repeats after the first measure a replay of the same file
+        clear_dimension_caches()
+        load_data(path)
+
+    return run
+
+
+# ---------------- RUNNER ----------------
+
+def time_benchmark(fn, size, repeats, warmup):
+
+    # the loaders print progress; keep the benchmark output readable
+    with contextlib.redirect_stdout(io.StringIO()):
+
+        for _ in range(warmup):
+            fn()
+
+        timings = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - started)
+
+    median = statistics.median(timings)
+
+    return {
+        "size": size,
+        "repeats": repeats,
+        "min_s": round(min(timings), 6),
+        "median_s": round(median, 6),
+        "stdev_s": round(statistics.stdev(timings), 6) if len(timings) > 1 else 0.0,
+        "per_op_us": round(1e6 * median / size, 4),
+        "ops_per_s": round(size / median, 1) if median else None
+    }
+
+
+def git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                             capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold):
+    """Return (rows, regressions) comparing per-op medians against a baseline."""
+
+    rows = []
+    regressions = []
+
+    for name, current in results.items():
+
+        previous = baseline.get("results", {}).get(name)
+
+        if not previous or not previous.get("per_op_us"):
+            rows.append((name, current["per_op_us"], None, None, "new"))
+            continue
+
+        ratio = current["per_op_us"] / previous["per_op_us"]
+
+        if ratio > 1 + threshold:
+            status = "REGRESSION"
+            regressions.append(name)
+        elif ratio < 1 - threshold:
+            status = "faster"
+        else:
+            status = "ok"
+
+        rows.append((name, current["per_op_us"], previous["per_op_us"], ratio, status))
+
+    return rows, regressions
+
+
+def print_table(results, rows=None):
+
+    if rows is None:
+        for name, r in results.items():
+            print(f"{name:<34} {r['per_op_us']:>12.3f} us/op {r['ops_per_s']:>14,.0f} ops/s")
+        return
+
+    for name, current, previous, ratio, status in rows:
+        if previous is None:
+            print(f"{name:<34} {current:>12.3f} us/op {'':>14} {status}")
+        else:
+            print(f"{name:<34} {current:>12.3f} us/op {previous:>10.3f} base {ratio:>6.2f}x  {status}")
+
+
+def parse_args(argv=None):
+
+    parser = argparse.ArgumentParser(description="IAMpact micro-benchmarks")
+    parser.add_argument("--size", type=int, default=5000, help="fixture size (ops per repeat)")
+    parser.add_argument("--db-size", type=int, default=1000, help="fixture size for the DB loaders")
+    parser.add_argument("--repeats", type=int, default=7)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db", action="store_true", help="also benchmark the database loaders")
+    parser.add_argument("-k", "--filter", help="only run benchmarks whose name contains this")
+    parser.add_argument("--baseline", default=str(BASELINE_PATH))
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="allowed slowdown vs baseline (0.15 = 15%%)")
+    parser.add_argument("--save-baseline", action="store_true", help="write this run as the new baseline")
+    parser.add_argument("--out", help="report path (default benchmarks/results/<timestamp>.json)")
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+
+    args = parse_args(argv)
+
+    # the Flask-side utilities are imported as backend.*
+    if str(REPO_ROOT) not in sys.path:
+        sys.path.append(str(REPO_ROOT))
+
+    results = {}
+
+    for name, spec in BENCHMARKS.items():
+
+        if spec["db"] and not args.db:
+            continue
+        if args.filter and args.filter not in name:
+            continue
+
+        size = args.db_size if spec["db"] else args.size
+
+        try:
+            fn = spec["setup"](size, args.seed)
+            results[name] = time_benchmark(fn, size, args.repeats, args.warmup)
+        except Exception as e:
+            print(f"❌ {name} failed:", e)
+            results[name] = {"error": str(e)}
+
+    measured = {name: r for name, r in results.items() if "error" not in r}
+
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "size": args.size,
+            "db_size": args.db_size if args.db else None,
+            "repeats": args.repeats,
+            "seed": args.seed
+        },
+        "results": results
+    }
+
+    out = Path(args.out) if args.out else RESULTS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2))
+
+    baseline_path = Path(args.baseline)
+    regressions = []
+
+    if args.save_baseline:
+        baseline_path.write_text(json.dumps(report, indent=2))
+        print_table(measured)
+        print(f"✅ Baseline saved → {baseline_path}")
+
+    elif baseline_path.exists():
+        baseline = json.loads(baseline_path.read_text())
+        rows, regressions = compare(measured, baseline, args.threshold)
+        print_table(measured, rows)
+
+    else:
+        print_table(measured)
+        print(f"⚠️ No baseline at {baseline_path}; run with --save-baseline to create one")
+
+    print(f"📄 Report → {out}")
+
+    failed = len(measured) != len(results)
+
+    if regressions:
+        print(f"❌ {len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+
+    return 1 if regressions or failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,6 @@
+"""Code shared by both halves of the backend.
+
+The Flask app imports these modules as `backend.common.*` (run from the
+repo root) and the FastAPI app as `common.*` (run from backend/), so
+nothing in here may import either app; use relative imports only.
+"""
@@ -0,0 +1,175 @@
+"""Per-minute dashboard counters kept by statement-level insert triggers.
+
+Both apps count into the same `metric_counters` / `metric_users` tables,
+each for its own fact table, so the DDL and the install procedure live
+here once.
+
+Each counter is spread over COUNTER_SLOTS rows (a writer picks one by its
+backend pid), so concurrent inserts into the same minute and priority do
+not all queue on one row lock. Readers SUM over the slots.
+"""
+
+from collections import namedtuple
+
+
+COUNTER_SLOTS = 8
+
+COUNTERS_DDL = """
+    CREATE TABLE IF NOT EXISTS metric_counters (
+        source VARCHAR(30) NOT NULL,
+        bucket TIMESTAMP NOT NULL,
+        priority VARCHAR(20) NOT NULL,
+        slot SMALLINT NOT NULL DEFAULT 0,
+        events BIGINT NOT NULL DEFAULT 0,
+        score_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+        PRIMARY KEY (source, bucket, priority, slot)
+    );
+
+    CREATE TABLE IF NOT EXISTS metric_users (
+        source VARCHAR(30) NOT NULL,
+        user_key VARCHAR(200) NOT NULL,
+        PRIMARY KEY (source, user_key)
+    );
+
+    -- tables created before counters had slots
+    DO $$
+    BEGIN
+        IF NOT EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'metric_counters' AND column_name = 'slot'
+        ) THEN
+            ALTER TABLE metric_counters ADD COLUMN slot SMALLINT NOT NULL DEFAULT 0;
+            ALTER TABLE metric_counters DROP CONSTRAINT metric_counters_pkey;
+            ALTER TABLE metric_counters ADD PRIMARY KEY (source, bucket, priority, slot);
+        END IF;
+    END $$;
+"""
+
+# source name -> the fact table it counts and the columns it reads
+CounterSource = namedtuple("CounterSource", "table priority score user")
+
+SOURCES = {
+    "alerts": CounterSource("alerts", "severity", "risk_score", '"user"'),
+    "enriched_logs": CounterSource("enriched_logs", "prelim_priority", "alert_score", "user_id::text"),
+}
+
+
+def _counts(source, rows, prefix, slot, accumulate):
+
+    spec = SOURCES[source]
+    events, score_sum = (
+        ("metric_counters.events + ", "metric_counters.score_sum + ") if accumulate else ("", "")
+    )
+
+    # rows are upserted in conflict-key order, so two statements touching
+    # the same counters lock them in the same order and cannot deadlock
+    return f"""
+        INSERT INTO metric_counters (source, bucket, priority, slot, events, score_sum)
+        SELECT '{source}',
+               date_trunc('minute', COALESCE({prefix}timestamp, (now() AT TIME ZONE 'UTC'))),
+               UPPER(COALESCE({prefix}{spec.priority}, 'LOW')),
+               {slot},
+               COUNT(*),
+               COALESCE(SUM({prefix}{spec.score}), 0)
+        FROM {rows}
+        GROUP BY 2, 3
+        ORDER BY 2, 3
+        ON CONFLICT (source, bucket, priority, slot) DO UPDATE SET
+            events = {events}EXCLUDED.events,
+            score_sum = {score_sum}EXCLUDED.score_sum;
+
+        INSERT INTO metric_users (source, user_key)
+        SELECT DISTINCT '{source}', {prefix}{spec.user}
+        FROM {rows}
+        WHERE {prefix}{spec.user} IS NOT NULL
+        ORDER BY 2
+        ON CONFLICT DO NOTHING;
+    """
+
+
+def trigger_name(source):
+
+    return f"{source}_counters"
+
+
+def _function_body(source):
+
+    return f"""
+        BEGIN
+            {_counts(source, "new_rows n", "n.", f"mod(pg_backend_pid(), {COUNTER_SLOTS})", accumulate=True)}
+
+            RETURN NULL;
+        END;
+    """
+
+
+def function_ddl(source):
+    """Trigger function bumping `source`'s counters."""
+
+    return f"""
+        CREATE OR REPLACE FUNCTION {source}_bump_counters() RETURNS trigger AS $fn${_function_body(source)}$fn$
+        LANGUAGE plpgsql;
+    """
+
+
+def trigger_ddl(source):
+    """Trigger function and statement-level trigger bumping `source`'s counters."""
+
+    return f"""
+        {function_ddl(source)}
+
+        CREATE TRIGGER {trigger_name(source)}
+            AFTER INSERT ON {SOURCES[source].table}
+            REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION {source}_bump_counters();
+    """
+
+
+def backfill_sql(source):
+    """Recount `source` from its fact table, replacing its existing counters."""
+
+    return f"""
+        DELETE FROM metric_counters WHERE source = '{source}';
+        {_counts(source, SOURCES[source].table, "", "0", accumulate=False)}
+    """
+
+
+def install_counters(source, execute, exists):
+    """Create the counter tables and `source`'s trigger, backfilling once.
+
+    `execute(sql)` runs statements and `exists(sql)` says whether a query
+    returned a row, so both the SQLAlchemy and the psycopg2 side can drive
+    it inside their own transaction. Returns True when this call installed
+    the trigger.
+
+    Installers of both apps are serialized by an advisory lock held until
+    the caller commits. Trigger functions already installed (either app's)
+    are replaced when their body differs from this version, so a schema
+    change never leaves an old function writing to the new table. The
+    table lock blocks inserts while the backfill runs, so nothing is
+    counted twice.
+    """
+
+    def found(name):
+        return f"SELECT 1 FROM pg_trigger WHERE tgname = '{trigger_name(name)}'"
+
+    def current(name):
+        return (
+            f"SELECT 1 FROM pg_proc WHERE proname = '{name}_bump_counters' "
+            f"AND prosrc = $fn${_function_body(name)}$fn$"
+        )
+
+    execute("SELECT pg_advisory_xact_lock(hashtext('metric_counters'))")
+    execute(COUNTERS_DDL)
+
+    for name in SOURCES:
+        if exists(found(name)) and not exists(current(name)):
+            execute(function_ddl(name))
+
+    if exists(found(source)):
+        return False
+
+    execute(f"LOCK TABLE {SOURCES[source].table} IN SHARE ROW EXCLUSIVE MODE")
+    execute(backfill_sql(source))
+    execute(trigger_ddl(source))
+    return True
@@ -0,0 +1,238 @@
+import asyncio
+import heapq
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+
+class ProfileSession:
+
+    def __init__(self, session_id, label, thread_id, task=None):
+        self.id = session_id
+        self.label = label
+        self.thread_id = thread_id
+        # on an event loop thread, only samples taken while this task runs count
+        self.task = task
+        self.loop = task.get_loop() if task is not None else None
+        self.started_at = datetime.utcnow()
+        self.started = time.perf_counter()
+        self.duration = 0.0
+        self.samples = Counter()
+
+    def summary(self):
+        return {
+            "id": self.id,
+            "label": self.label,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round(1000 * self.duration, 3),
+            "samples": sum(self.samples.values())
+        }
+
+
+def _frame_name(code):
+    # folded-stack frames must not contain ';'
+    path = code.co_filename.replace(os.sep, "/").rsplit("/", 2)[-2:]
+    return f"{code.co_name} ({'/'.join(path)}:{code.co_firstlineno})".replace(";", ":")
+
+
+def _fold(frame):
+    stack = []
+
+    while frame is not None:
+        stack.append(_frame_name(frame.f_code))
+        frame = frame.f_back
+
+    stack.reverse()
+    return ";".join(stack)
+
+
+class SamplingProfiler:
+    """Opt-in wall-clock sampling profiler for requests and pipeline batches.
+
+    While at least one session is open, a daemon thread snapshots the
+    stack of each profiled thread every `interval` seconds. Finished
+    sessions compete for a bounded min-heap so only the `top_n` slowest
+    are kept. Nothing runs and nothing is allocated until a session is
+    started: the hot-path cost while disabled is one attribute check.
+
+    A session opened for an asyncio task keeps only the samples taken
+    while that task is the one running on the loop, so concurrent requests
+    do not show up in each other's profiles. `follow()` moves a session to
+    the thread that actually does the work (e.g. a threadpool endpoint).
+    """
+
+    def __init__(self, enabled=False, sample_rate=0.01, interval=0.005, top_n=20):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.top_n = top_n
+
+        self._ids = itertools.count(1)
+        self._active = {}
+        self._kept = []              # min-heap of (duration, id, session)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+        self.sessions_started = 0
+        self.samples_taken = 0
+
+    # ---------------- control ----------------
+
+    def configure(self, enabled=None, sample_rate=None, interval=None, top_n=None):
+
+        with self._lock:
+            if enabled is not None:
+                self.enabled = enabled
+            if sample_rate is not None:
+                self.sample_rate = min(max(sample_rate, 0.0), 1.0)
+            if interval is not None:
+                self.interval = max(interval, 0.001)
+            if top_n is not None:
+                self.top_n = max(top_n, 1)
+                while len(self._kept) > self.top_n:
+                    heapq.heappop(self._kept)
+
+    def should_sample(self):
+        return self.enabled and random.random() < self.sample_rate
+
+    # ---------------- sessions ----------------
+
+    def start(self, label, thread_id=None, task=None):
+
+        session = ProfileSession(next(self._ids), label, thread_id or threading.get_ident(), task)
+
+        with self._lock:
+            self._active[session.id] = session
+            self.sessions_started += 1
+
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._sample_loop, name="sampling-profiler", daemon=True)
+                self._thread.start()
+
+        self._wakeup.set()
+        return session
+
+    def stop(self, session):
+
+        session.duration = time.perf_counter() - session.started
+
+        with self._lock:
+            self._active.pop(session.id, None)
+
+            entry = (session.duration, session.id, session)
+            if len(self._kept) < self.top_n:
+                heapq.heappush(self._kept, entry)
+            elif session.duration > self._kept[0][0]:
+                heapq.heapreplace(self._kept, entry)
+
+        return session
+
+    @contextmanager
+    def profile(self, label):
+
+        session = self.start(label)
+
+        try:
+            yield session
+        finally:
+            self.stop(session)
+
+    @contextmanager
+    def follow(self, session):
+        """Sample the calling thread for `session` until the block exits."""
+
+        previous = session.thread_id, session.task
+        session.thread_id, session.task = threading.get_ident(), None
+
+        try:
+            yield session
+        finally:
+            session.thread_id, session.task = previous
+
+    def _sample_loop(self):
+
+        own = threading.get_ident()
+
+        while True:
+
+            with self._lock:
+                active = list(self._active.values())
+                if not active:
+                    self._wakeup.clear()
+
+            if not active:
+                # idle until the next session starts
+                self._wakeup.wait()
+                continue
+
+            frames = sys._current_frames()
+
+            for session in active:
+                if session.task is not None and asyncio.current_task(session.loop) is not session.task:
+                    continue
+                frame = frames.get(session.thread_id)
+                if frame is not None and session.thread_id != own:
+                    session.samples[_fold(frame)] += 1
+                    self.samples_taken += 1
+
+            del frames
+            time.sleep(self.interval)
+
+    # ---------------- export ----------------
+
+    def profiles(self):
+
+        with self._lock:
+            kept = sorted(self._kept, reverse=True)
+
+        return [session.summary() for _, _, session in kept]
+
+    def get(self, session_id):
+
+        with self._lock:
+            for _, sid, session in self._kept:
+                if sid == session_id:
+                    return session
+
+        return None
+
+    def folded(self, session_id=None):
+        """Collapsed stacks ("frame;frame;frame count" per line) for
+        flamegraph.pl, speedscope or inferno; all kept profiles if no id."""
+
+        if session_id is not None:
+            session = self.get(session_id)
+            if session is None:
+                return None
+            samples = session.samples
+        else:
+            with self._lock:
+                samples = Counter()
+                for _, _, session in self._kept:
+                    samples.update(session.samples)
+
+        return "\n".join(f"{stack} {count}" for stack, count in samples.most_common()) + "\n"
+
+    def clear(self):
+
+        with self._lock:
+            self._kept = []
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "interval_ms": round(1000 * self.interval, 3),
+            "top_n": self.top_n,
+            "active_sessions": len(self._active),
+            "kept_profiles": len(self._kept),
+            "sessions_started": self.sessions_started,
+            "samples_taken": self.samples_taken
+        }
@@ -0,0 +1,113 @@
+import hashlib
+import threading
+import time
+
+
+class ResponseCache:
+    """TTL cache for rendered JSON responses, invalidated by data versions.
+
+    Versions come from the `data_versions` table (bumped by every ingest
+    path) and are re-read at most once per poll interval, so the number of
+    pollers does not change how often the database is queried. Each app
+    passes in how it reads them; `local_epoch(name)` adds this process' own
+    bumps, which are visible before the next poll.
+
+    Concurrent misses on one key are coalesced so a burst of pollers runs
+    one query. Per-key locks are dropped together with their entry, so
+    there are never more of them than entries plus builds in flight.
+    """
+
+    def __init__(self, ttl, version_poll_interval, max_entries, local_epoch=lambda name: 0):
+        self.ttl = ttl
+        self.version_poll_interval = version_poll_interval
+        self.max_entries = max_entries
+        self.local_epoch = local_epoch
+        self._entries = {}
+        self._key_locks = {}
+        self._lock = threading.Lock()
+        self._versions = {}
+        self._versions_checked = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    def version_of(self, depends_on, fetch_versions):
+        """Version tuple of `depends_on`; `fetch_versions()` returns
+        {name: version}, or None to keep the last known versions."""
+
+        now = time.monotonic()
+        if now - self._versions_checked >= self.version_poll_interval:
+            self._versions_checked = now
+            versions = fetch_versions()
+            if versions is not None:
+                self._versions = versions
+
+        return tuple(
+            (name, self._versions.get(name, 0), self.local_epoch(name))
+            for name in depends_on
+        )
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._key_locks.clear()
+
+    def _lookup(self, key, version):
+        entry = self._entries.get(key)
+        if entry and entry["version"] == version and entry["expires"] > time.monotonic():
+            return entry
+        return None
+
+    def _store(self, key, entry):
+        # caller holds self._lock
+        if key not in self._entries and len(self._entries) >= self.max_entries:
+            oldest = min(self._entries, key=lambda k: self._entries[k]["expires"])
+            del self._entries[oldest]
+            self._key_locks.pop(oldest, None)
+        self._entries[key] = entry
+
+    def get_or_build(self, key, version, build):
+        """Return a cached entry, or build one with `build()`.
+
+        `build` returns the entry's fields, at least "body" (bytes); an
+        "etag" is added. Entries with a "status" other than 200 are
+        returned but not stored.
+        """
+        entry = self._lookup(key, version)
+        if entry:
+            self.hits += 1
+            return entry
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            entry = self._lookup(key, version)
+            if entry:
+                self.hits += 1
+                return entry
+
+            self.misses += 1
+
+            try:
+                entry = dict(build(), version=version, expires=time.monotonic() + self.ttl)
+                entry["etag"] = hashlib.sha1(entry["body"]).hexdigest()
+
+                if entry.get("status", 200) == 200:
+                    with self._lock:
+                        self._store(key, entry)
+            finally:
+                # nothing cached under the key (error, non-200): its lock goes too
+                with self._lock:
+                    if key not in self._entries:
+                        self._key_locks.pop(key, None)
+
+            return entry
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "key_locks": len(self._key_locks),
+            "hits": self.hits,
+            "misses": self.misses,
+            "versions": dict(self._versions)
+        }
@@ -2,6 +2,11 @@ import psycopg2
 import pandas as pd
 from psycopg2.extras import execute_values
 from pathlib import Path
+from backend.utils.data_versions import bump_data_version
+from backend.utils.stats_engine import ensure_counters
+from backend.utils.dimension_cache import users_cache, actions_cache, ips_cache, clear_dimension_caches
+from backend.utils.heavy_hitters import record_ingest
+from backend.utils.event_dedupe import ensure_event_key, drop_seen, remember
 
 # ----------------------------
 # CONFIGURATION
@@ -26,98 +31,110 @@ def get_conn():
 # ----------------------------
 # MAIN LOADER
 # ----------------------------
-def load_data():
-    print("🚀 Loading dataset:", DATA_PATH)
-    df = pd.read_csv(DATA_PATH)
+def load_data(path=DATA_PATH):
+    print("🚀 Loading dataset:", path)
+    df = pd.read_csv(path)
     print(f"✅ Loaded {len(df)} rows")
 
     conn = get_conn()
     cur = conn.cursor()
 
-    # 1️⃣ Insert unique users
-    print("🧑 Adding users...")
-    users = df["user"].dropna().unique().tolist()
-    execute_values(
-        cur,
-        "INSERT INTO users (username) VALUES %s ON CONFLICT DO NOTHING;",
-        [(u,) for u in users]
-    )
+    # 0️⃣ Make sure dashboard counters are maintained for new rows
+    ensure_counters(cur)
+    ensure_event_key(cur)
     conn.commit()
 
-    # 2️⃣ Insert unique actions
-    print("⚙️ Adding actions...")
-    actions = df["action"].dropna().unique().tolist()
-    execute_values(
-        cur,
-        "INSERT INTO actions (action_name) VALUES %s ON CONFLICT DO NOTHING;",
-        [(a,) for a in actions]
-    )
-    conn.commit()
+    # Skip rows an earlier (or overlapping) load already inserted
+    df = drop_seen(cur, df)
+    if df.empty:
+        print("✅ Nothing new to load")
+        cur.close()
+        conn.close()
+        return
 
-    # 3️⃣ Insert unique IP details (deduplicate fully)
-    print("🌍 Adding IP details...")
-    ips = (
-        df[["src_ip", "country", "ti_score"]]
-        .dropna(subset=["src_ip"])
-        .drop_duplicates(subset=["src_ip"])
-    )
-
-    # Insert IP details safely (no batch conflict)
-    for _, row in ips.iterrows():
-        cur.execute(
-            """
-            INSERT INTO ip_details (src_ip, country, ti_score)
-            VALUES (%s, %s, %s)
-            ON CONFLICT (src_ip)
-            DO UPDATE SET
-                country = EXCLUDED.country,
-                ti_score = EXCLUDED.ti_score;
-            """,
-            (row["src_ip"], row["country"], int(row["ti_score"]))
+    try:
+        # 1️⃣ Resolve users and actions (only keys not yet cached hit the DB)
+        print("🧑 Adding users...")
+        user_map = users_cache.resolve(cur, df["user"].tolist())
+
+        print("⚙️ Adding actions...")
+        action_map = actions_cache.resolve(cur, df["action"].tolist())
+
+        # 2️⃣ Upsert IP details in one batch (refreshes country / TI score)
+        print("🌍 Adding IP details...")
+        ips = (
+            df[["src_ip", "country", "ti_score"]]
+            .dropna(subset=["src_ip"])
+            .drop_duplicates(subset=["src_ip"])
+        )
+        ip_map = ips_cache.upsert(
+            cur,
+            [
+                (ip, country, None if pd.isna(score) else int(score))
+                for ip, country, score in ips.itertuples(index=False)
+            ],
+            columns=("country", "ti_score")
         )
-    conn.commit()
 
-    # 4️⃣ Insert enriched logs (fact table)
-    print("🧩 Adding enriched logs...")
-    for _, row in df.iterrows():
-        cur.execute(
-            """
-            INSERT INTO enriched_logs (
-                timestamp, user_id, action_id, ip_id, result, result_flag,
-                alert_score, prelim_priority, ti_country
-            )
-            SELECT
-                %s,
-                u.user_id,
-                a.action_id,
-                i.ip_id,
-                %s,
-                %s,
-                %s,
-                %s,
-                %s
-            FROM users u, actions a, ip_details i
-            WHERE u.username = %s
-            AND a.action_name = %s
-            AND i.src_ip = %s;
-            """,
-            (
+        # 3️⃣ Insert enriched logs (fact table) with resolved ids
+        print("🧩 Adding enriched logs...")
+        records = []
+        for _, row in df.iterrows():
+            uid = user_map.get(row["user"])
+            aid = action_map.get(row["action"])
+            iid = ip_map.get(row["src_ip"])
+            if uid is None or aid is None or iid is None:
+                continue
+            records.append((
                 row["timestamp"],
+                uid,
+                aid,
+                iid,
                 row["result"],
                 row.get("result_flag", 0),
                 row.get("alert_score", 0),
                 row.get("prelim_priority", "low"),
                 row["country"],
-                row["user"],
-                row["action"],
-                row["src_ip"]
-            )
+                row["event_key"]
+            ))
+
+        # Rows a concurrent load inserted first are skipped by the conflict
+        # clause, so only the returned keys were written by this load
+        inserted = execute_values(
+            cur,
+            """
+            INSERT INTO enriched_logs (
+                timestamp, user_id, action_id, ip_id, result, result_flag,
+                alert_score, prelim_priority, ti_country, event_key
+            ) VALUES %s
+            ON CONFLICT (event_key) DO NOTHING
+            RETURNING event_key;
+            """,
+            records,
+            page_size=1000,
+            fetch=True
         )
+        inserted = {key for (key,) in inserted}
+        print(f"✅ Inserted {len(inserted)} of {len(df)} rows")
 
-    conn.commit()
-    cur.close()
-    conn.close()
-    print("✅ All data successfully inserted into normalized tables!")
+        # 4️⃣ Update streaming top users / IPs before the version bump commits,
+        # so insights cached under the new version already see these rows
+        df = df[df["event_key"].isin(inserted)]
+        record_ingest(df)
+
+        bump_data_version(cur, "enriched_logs")
+        conn.commit()
+        cur.close()
+        conn.close()
+        print("✅ All data successfully inserted into normalized tables!")
+    except Exception:
+        # ids resolved in the rolled-back transaction may not exist
+        clear_dimension_caches()
+        conn.close()            # discards the open transaction
+        raise
+
+    # 5️⃣ Remember the inserted rows in the dedupe filter
+    remember(df)
 
 # ----------------------------
 # ENTRY POINT
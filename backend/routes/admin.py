@@ -0,0 +1,49 @@
+from flask import Blueprint, Response, jsonify, request
+from backend.utils.profiler import profiler, is_admin
+
+admin_bp = Blueprint("admin", __name__)
+
+@admin_bp.before_request
+def require_admin():
+    """Reject calls without a valid X-Admin-Token."""
+    if not is_admin(request.headers.get("X-Admin-Token")):
+        return jsonify({"error": "Admin token required"}), 403
+
+@admin_bp.route("/admin/profiler", methods=["GET"])
+def profiler_status():
+    """Profiler settings plus the kept (slowest) profiles."""
+    return jsonify({**profiler.stats(), "profiles": profiler.profiles()})
+
+@admin_bp.route("/admin/profiler", methods=["POST"])
+def configure_profiler():
+    """Toggle profiling / change sample rate, interval or top-N."""
+    body = request.get_json(silent=True) or {}
+    try:
+        profiler.configure(
+            enabled=body.get("enabled"),
+            sample_rate=None if body.get("sample_rate") is None else float(body["sample_rate"]),
+            interval=None if body.get("interval") is None else float(body["interval"]),
+            top_n=None if body.get("top_n") is None else int(body["top_n"])
+        )
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(profiler.stats())
+
+@admin_bp.route("/admin/profiler/flamegraph.folded", methods=["GET"])
+def download_all_profiles():
+    """All kept profiles merged, in collapsed-stack format."""
+    return Response(profiler.folded(), mimetype="text/plain")
+
+@admin_bp.route("/admin/profiler/profiles/<int:profile_id>.folded", methods=["GET"])
+def download_profile(profile_id):
+    """One kept profile in collapsed-stack format."""
+    folded = profiler.folded(profile_id)
+    if folded is None:
+        return jsonify({"error": "Profile not found (evicted or never kept)"}), 404
+    return Response(folded, mimetype="text/plain")
+
+@admin_bp.route("/admin/profiler/profiles", methods=["DELETE"])
+def clear_profiles():
+    """Drop all kept profiles."""
+    profiler.clear()
+    return jsonify({"status": "cleared"})
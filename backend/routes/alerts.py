@@ -1,15 +1,30 @@
-from flask import Blueprint, jsonify
+from datetime import datetime
+from flask import Blueprint, jsonify, request
 from backend.utils.db_config import get_connection
+from backend.utils.response_cache import cached_json
+from backend.utils.archive import union_archive
 import pandas as pd
 
 alerts_bp = Blueprint("alerts", __name__)
 
 @alerts_bp.route("/api/alerts/", methods=["GET"])
+@cached_json("alerts")
 def get_alerts():
     conn = get_connection()
     if not conn:
         return jsonify({"status": "error", "message": "DB connection failed"}), 500
 
+    try:
+        # Optional ?since=&until= (ISO) reach into the Parquet archive
+        since = request.args.get("since")
+        until = request.args.get("until")
+        since = datetime.fromisoformat(since) if since else None
+        until = datetime.fromisoformat(until) if until else None
+        limit = min(int(request.args.get("limit", 100)), 1000)
+    except ValueError as e:
+        conn.close()
+        return jsonify({"status": "error", "message": f"Bad query parameter: {e}"}), 400
+
     try:
         query = """
         SELECT e.id,
@@ -23,13 +38,17 @@ def get_alerts():
         LEFT JOIN users u ON e.user_id = u.user_id
         LEFT JOIN actions a ON e.action_id = a.action_id
         LEFT JOIN ip_details i ON e.ip_id = i.ip_id
+        WHERE (%(since)s::timestamp IS NULL OR e.timestamp >= %(since)s)
+          AND (%(until)s::timestamp IS NULL OR e.timestamp < %(until)s)
         ORDER BY e.timestamp DESC
-        LIMIT 100;
+        LIMIT %(limit)s;
         """
 
-        df = pd.read_sql(query, conn)
+        df = pd.read_sql(query, conn, params={"since": since, "until": until, "limit": limit})
         conn.close()
 
+        df = union_archive("enriched_logs", df, since, until, limit)
+
         # --- Friendly display names ---
         display_names = {
             "backup": "Backup Service Account",
@@ -46,7 +65,7 @@ def get_alerts():
 
             alerts.append({
                 "id": int(row["id"]),
-                "timestamp": str(row["timestamp"]) if row["timestamp"] else "—",
+                "timestamp": str(row["timestamp"]) if pd.notna(row["timestamp"]) else "—",
                 "user": user,
                 "action": row["action"] or "—",
                 "prelim_priority": row["prelim_priority"] or "LOW",
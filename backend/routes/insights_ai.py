@@ -1,9 +1,51 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request
 from backend.utils.db_config import get_connection
+from backend.utils.response_cache import cached_json
+from backend.utils.heavy_hitters import heavy_hitters, WINDOWS
 import pandas as pd
 
 ai_bp = Blueprint("ai_bp", __name__)
 
+# 🧩 Map technical usernames to readable display names
+DISPLAY_NAMES = {
+    "backup": "Backup Service Account",
+    "Level6": "Production IAM Role",
+    "securityMonkey": "Security Monitor Bot",
+    "admin": "Admin Account"
+}
+
+def display_name(raw_user):
+    raw_user = raw_user or "Unknown"
+    return DISPLAY_NAMES.get(raw_user.strip(), raw_user.capitalize())  # fallback to capitalized name
+
+def streaming_insights(window="all", limit=20):
+    """Insights from the streaming top-K trackers (no fact-table scan)."""
+    store = heavy_hitters.refresh()
+    insights = []
+    for raw_user, total_score, _ in store.top("user_risk", limit, window):
+        events = store.estimate("user_events", raw_user, window)
+        high = store.estimate("user_high", raw_user, window)
+        avg = total_score / events if events else 0
+        user = display_name(raw_user)
+        if avg > 0.8:
+            rec = f"🚨 High risk activity detected for {user}. Recommend MFA review or session lockdown."
+        elif high >= 1:
+            rec = f"⚠️ Review {user}'s actions — {int(high)} high-priority alerts."
+        else:
+            rec = f"✅ Normal pattern detected for {user}, no immediate action required."
+        insights.append({
+            "user": user,
+            "recommendation": rec,
+            "events": int(events),
+            "total_score": round(total_score, 4)
+        })
+    for ip, count, _ in store.top("ip_events", 5, window):
+        insights.append({
+            "ip": ip,
+            "recommendation": f"🌐 {ip} is among the noisiest sources ({int(count)} events)."
+        })
+    return insights
+
 def generate_agentic_insights():
     """Simple AI-like heuristic for now. Later replaced with real model."""
     conn = get_connection()
@@ -19,18 +61,9 @@ def generate_agentic_insights():
     df = pd.read_sql(query, conn)
     conn.close()
 
-    # 🧩 Map technical usernames to readable display names
-    display_names = {
-        "backup": "Backup Service Account",
-        "Level6": "Production IAM Role",
-        "securityMonkey": "Security Monitor Bot",
-        "admin": "Admin Account"
-    }
-
     insights = []
     for _, row in df.iterrows():
-        raw_user = row["username"] or "Unknown"
-        user = display_names.get(raw_user.strip(), raw_user.capitalize())  # fallback to capitalized name
+        user = display_name(row["username"])
 
         score = float(row["alert_score"]) if row["alert_score"] is not None else 0
         priority = row["prelim_priority"] or "LOW"
@@ -56,11 +89,36 @@ def generate_agentic_insights():
     return insights
 
 
+@ai_bp.route("/api/insights/top", methods=["GET"])
+@cached_json("insights_top")
+def get_top_entities():
+    """Top noisy IPs / risky users for window=1h|24h|all."""
+    window = request.args.get("window", "1h")
+    if window not in WINDOWS:
+        return jsonify({"error": f"Unsupported window: {window}"}), 400
+    limit = min(request.args.get("limit", 10, type=int), 100)
+    store = heavy_hitters.refresh()
+    def rows(name, key):
+        return [{key: k, "value": round(v, 4), "max_error": round(e, 4)} for k, v, e in store.top(name, limit, window)]
+    return jsonify({
+        "window": window,
+        "risky_users": rows("user_risk", "user"),
+        "noisy_users": rows("user_events", "user"),
+        "noisy_ips": rows("ip_events", "ip"),
+        "risky_ips": rows("ip_risk", "ip")
+    })
+
+
 @ai_bp.route("/api/insights/agentic", methods=["GET"])
+@cached_json("insights_agentic")
 def get_agentic_insights():
+    window = request.args.get("window", "all")
+    if window not in WINDOWS:
+        return jsonify({"status": "error", "message": f"Unsupported window: {window}"}), 400
     try:
-        data = generate_agentic_insights()
-        return jsonify({"status": "success", "insights": data})
+        # Streaming trackers first; SQL scan only before anything was recorded
+        data = streaming_insights(window) if heavy_hitters.refresh().events else generate_agentic_insights()
+        return jsonify({"status": "success", "window": window, "insights": data})
     except Exception as e:
         print("❌ Agentic AI Error:", e)
         return jsonify({"status": "error", "message": str(e)})
@@ -12,5 +12,9 @@ CREATE TABLE IF NOT EXISTS enriched_logs (
     alert_score FLOAT,
     prelim_priority VARCHAR(50),
     ti_country VARCHAR(10),
-    ti_asn VARCHAR(50)
+    ti_asn VARCHAR(50),
+    event_key VARCHAR(64)
 );
+
+-- eventID (or content hash) of the source event; makes reloads idempotent
+CREATE UNIQUE INDEX IF NOT EXISTS ux_enriched_logs_event_key ON enriched_logs (event_key);
@@ -0,0 +1,237 @@
+import argparse
+import os
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from backend.utils.batch_metrics import export_batch_metrics
+from backend.utils.db_config import get_connection
+from backend.utils.data_versions import bump_data_version
+from backend.utils.event_dedupe import ARCHIVED_KEYS_DDL
+
+# ----------------------------
+# CONFIGURATION
+# ----------------------------
+ARCHIVE_DIR = Path(os.getenv("ARCHIVE_DIR", Path(__file__).resolve().parents[1] / "data" / "archive"))
+RETAIN_DAYS = int(os.getenv("RETAIN_DAYS", "30"))
+COMPRESSION = "zstd"
+
+# table -> statements for moving one day [start, end) out of Postgres.
+# "move" deletes and returns the rows in one statement, so a row is either
+# still hot or in the archive, never both and never neither.
+TABLES = {
+    "enriched_logs": {
+        "ddl": "CREATE INDEX IF NOT EXISTS ix_enriched_logs_timestamp ON enriched_logs (timestamp);"
+               + ARCHIVED_KEYS_DDL,
+        # the moved keys stay behind as tombstones, so replays stay idempotent
+        "move": """
+            WITH moved AS (
+                DELETE FROM enriched_logs
+                WHERE timestamp >= %(start)s AND timestamp < %(end)s
+                RETURNING *
+            ), tombstones AS (
+                INSERT INTO archived_event_keys (event_key)
+                SELECT event_key FROM moved WHERE event_key IS NOT NULL
+                ON CONFLICT DO NOTHING
+            )
+            SELECT m.id, m.timestamp, u.username, a.action_name AS action, i.src_ip,
+                   m.result, m.result_flag, m.alert_score, m.prelim_priority,
+                   m.ti_country, m.event_key
+            FROM moved m
+            LEFT JOIN users u ON m.user_id = u.user_id
+            LEFT JOIN actions a ON m.action_id = a.action_id
+            LEFT JOIN ip_details i ON m.ip_id = i.ip_id;
+        """,
+    },
+    "alerts": {
+        "ddl": "CREATE INDEX IF NOT EXISTS ix_alerts_timestamp ON alerts (timestamp);",
+        # incidents keep their counters but lose the link to an archived alert
+        "before": """
+            UPDATE incidents SET alert_id = NULL
+            WHERE alert_id IN (
+                SELECT id FROM alerts WHERE timestamp >= %(start)s AND timestamp < %(end)s
+            );
+        """,
+        "before_requires": "incidents",
+        "move": """
+            WITH moved AS (
+                DELETE FROM alerts
+                WHERE timestamp >= %(start)s AND timestamp < %(end)s
+                RETURNING *
+            )
+            SELECT * FROM moved;
+        """,
+    },
+}
+
+# ----------------------------
+# WRITE SIDE
+# ----------------------------
+def _day_dir(table, day):
+    return ARCHIVE_DIR / table / f"day={day.isoformat()}"
+
+
+def _write_part(table, day, columns, rows):
+    """Write one zstd Parquet part for `day`; returns its path once durable."""
+    folder = _day_dir(table, day)
+    folder.mkdir(parents=True, exist_ok=True)
+    path = folder / f"part-{int(time.time() * 1000)}-{uuid.uuid4().hex[:8]}.parquet"
+    tmp = path.with_suffix(".tmp")
+
+    frame = pd.DataFrame.from_records(rows, columns=columns)
+    pq.write_table(pa.Table.from_pandas(frame, preserve_index=False), tmp, compression=COMPRESSION)
+    with open(tmp, "rb") as f:
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return path
+
+
+def _table_exists(cur, name):
+    cur.execute("SELECT to_regclass(%s);", (name,))
+    return cur.fetchone()[0] is not None
+
+
+def archive_table(conn, table, retain_days=RETAIN_DAYS):
+    """Move whole days older than `retain_days` to Parquet, one transaction per day.
+
+    Days are found by walking min(timestamp) on the timestamp index, so the
+    job never scans the hot part of the table. If the Parquet write or the
+    commit fails, the part file is removed and the rows stay in Postgres.
+    Metric counters are left alone, so dashboard totals still cover the
+    archived history.
+    """
+    spec = TABLES[table]
+    cutoff = datetime.combine(date.today() - timedelta(days=retain_days), datetime.min.time())
+    cur = conn.cursor()
+
+    if not _table_exists(cur, table):
+        cur.close()
+        return {"table": table, "days": 0, "rows": 0}
+
+    cur.execute(spec["ddl"])
+    conn.commit()
+    run_before = "before" in spec and _table_exists(cur, spec["before_requires"])
+
+    days = moved = 0
+    while True:
+        cur.execute(f"SELECT min(timestamp) FROM {table} WHERE timestamp < %s;", (cutoff,))
+        oldest = cur.fetchone()[0]
+        if oldest is None:
+            break
+
+        day = oldest.date()
+        window = {"start": datetime.combine(day, datetime.min.time())}
+        window["end"] = window["start"] + timedelta(days=1)
+
+        path = None
+        try:
+            if run_before:
+                cur.execute(spec["before"], window)
+            cur.execute(spec["move"], window)
+            columns = [col[0] for col in cur.description]
+            rows = cur.fetchall()
+            if rows:
+                path = _write_part(table, day, columns, rows)
+                bump_data_version(cur, table)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            if path is not None:
+                path.unlink(missing_ok=True)
+            raise
+
+        days += 1
+        moved += len(rows)
+        print(f"🧊 Archived {len(rows)} {table} rows from {day}")
+
+    cur.close()
+    return {"table": table, "days": days, "rows": moved}
+
+
+def run_retention(tables=tuple(TABLES), retain_days=RETAIN_DAYS):
+    conn = get_connection()
+    if not conn:
+        return []
+    try:
+        return [archive_table(conn, table, retain_days) for table in tables]
+    finally:
+        conn.close()
+
+# ----------------------------
+# READ SIDE
+# ----------------------------
+def archived_days(table):
+    """Sorted dates that have at least one Parquet part."""
+    root = ARCHIVE_DIR / table
+    if not root.exists():
+        return []
+    days = []
+    for folder in root.iterdir():
+        if folder.is_dir() and folder.name.startswith("day="):
+            try:
+                days.append(date.fromisoformat(folder.name[4:]))
+            except ValueError:
+                continue
+    return sorted(days)
+
+
+def read_archive(table, since, until=None, columns=None):
+    """Archived rows with since <= timestamp < until, as a DataFrame.
+
+    Only the day folders inside the range are opened, and the timestamp
+    filter is pushed down to the Parquet row groups.
+    """
+    until = until or datetime.utcnow()
+    files = [
+        str(path)
+        for day in archived_days(table)
+        if since.date() <= day <= until.date()
+        for path in _day_dir(table, day).glob("*.parquet")
+    ]
+    if not files:
+        return pd.DataFrame(columns=columns)
+
+    dataset = ds.dataset(files, format="parquet")
+    stamp = dataset.schema.field("timestamp").type
+    condition = (
+        (ds.field("timestamp") >= pa.scalar(since, type=stamp))
+        & (ds.field("timestamp") < pa.scalar(until, type=stamp))
+    )
+    return dataset.to_table(columns=columns, filter=condition).to_pandas()
+
+
+def union_archive(table, hot, since, until=None, limit=None, order_by="timestamp"):
+    """Merge hot rows with archived rows when [since, until) reaches the archive.
+
+    Newest first, trimmed to `limit`.
+    """
+    days = archived_days(table)
+    if since is None or not days or since.date() > days[-1]:
+        return hot
+
+    cold = read_archive(table, since, until, columns=list(hot.columns) if len(hot.columns) else None)
+    if cold.empty:
+        return hot
+
+    merged = cold if hot.empty else pd.concat([hot, cold], ignore_index=True)
+    merged = merged.sort_values(order_by, ascending=False, kind="stable")
+    return merged.head(limit) if limit else merged
+
+# ----------------------------
+# ENTRY POINT
+# ----------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move cold rows to day-partitioned Parquet")
+    parser.add_argument("--days", type=int, default=RETAIN_DAYS, help="keep this many days hot")
+    parser.add_argument("--table", action="append", choices=sorted(TABLES), help="default: all")
+    args = parser.parse_args()
+
+    for result in run_retention(args.table or tuple(TABLES), args.days):
+        print(f"✅ {result['table']}: {result['rows']} rows from {result['days']} days archived")
+    export_batch_metrics("archive")
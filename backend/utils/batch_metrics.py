@@ -0,0 +1,58 @@
+import os
+import shutil
+from pathlib import Path
+
+# ----------------------------
+# CONFIGURATION
+# ----------------------------
+# Batch runs never serve /metrics, so whatever they observed (TI lookups,
+# TI cache hits, DB statement timings) is handed over when they finish:
+# written for node_exporter's textfile collector and/or pushed to a
+# Pushgateway. Neither set = nothing is exported.
+METRICS_TEXTFILE_DIR = os.getenv("METRICS_TEXTFILE_DIR", "")
+METRICS_PUSHGATEWAY = os.getenv("METRICS_PUSHGATEWAY", "")      # host:port
+
+
+# ----------------------------
+# MULTIPROCESS COLLECTION
+# ----------------------------
+def collect_worker_metrics(directory):
+    """Have this process and its workers write metrics to `directory`.
+
+    Must run before prometheus_client is imported anywhere in the
+    process: it picks its value store on import, and workers inherit the
+    setting through the environment. The directory is emptied so counts
+    start from zero for this run.
+    """
+    directory = Path(directory)
+    shutil.rmtree(directory, ignore_errors=True)
+    directory.mkdir(parents=True)
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = str(directory)
+
+
+# ----------------------------
+# EXPORT
+# ----------------------------
+def export_batch_metrics(job):
+    """Publish the run's metrics under `job`; never fails the run itself."""
+    if not (METRICS_TEXTFILE_DIR or METRICS_PUSHGATEWAY):
+        return
+
+    from prometheus_client import REGISTRY, CollectorRegistry, push_to_gateway, write_to_textfile
+
+    registry = REGISTRY
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+
+    job = f"iampact_{job}"
+
+    try:
+        if METRICS_TEXTFILE_DIR:
+            # written to a temp file and renamed, so the collector never reads half a file
+            write_to_textfile(os.path.join(METRICS_TEXTFILE_DIR, f"{job}.prom"), registry)
+        if METRICS_PUSHGATEWAY:
+            push_to_gateway(METRICS_PUSHGATEWAY, job=job, registry=registry)
+    except OSError as e:
+        print(f"⚠️ Could not export batch metrics for {job}: {e}")
@@ -0,0 +1,62 @@
+import threading
+
+from backend.utils.db_config import get_connection
+
+# ----------------------------
+# Data Version Store
+# ----------------------------
+# Every ingest path bumps a per-table version row inside its own transaction.
+# Readers (response caches) compare versions to decide whether cached
+# responses built from that table are still valid.
+DATA_VERSIONS_DDL = """
+    CREATE TABLE IF NOT EXISTS data_versions (
+        name VARCHAR(50) PRIMARY KEY,
+        version BIGINT NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT now()
+    );
+"""
+
+_local_epochs = {}
+_local_lock = threading.Lock()
+
+
+def bump_data_version(cur, name="enriched_logs"):
+    """Mark a table as changed. Runs inside the caller's transaction."""
+    cur.execute(DATA_VERSIONS_DDL)
+    cur.execute(
+        """
+        INSERT INTO data_versions (name, version) VALUES (%s, 1)
+        ON CONFLICT (name) DO UPDATE SET
+            version = data_versions.version + 1,
+            updated_at = now();
+        """,
+        (name,)
+    )
+    with _local_lock:
+        _local_epochs[name] = _local_epochs.get(name, 0) + 1
+
+
+def local_epoch(name):
+    """In-process change counter, so same-process writes invalidate at once."""
+    return _local_epochs.get(name, 0)
+
+
+def fetch_data_versions():
+    """Return {name: version} for every tracked table, or None on failure."""
+    conn = get_connection()
+    if not conn:
+        return None
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT to_regclass('data_versions');")
+        if cur.fetchone()[0] is None:
+            return {}
+        cur.execute("SELECT name, version FROM data_versions;")
+        versions = dict(cur.fetchall())
+        cur.close()
+        return versions
+    except Exception as e:
+        print("⚠️ Data version check failed:", e)
+        return None
+    finally:
+        conn.close()
@@ -1,5 +1,6 @@
 import os
 import psycopg2
+from backend.utils.telemetry import TimedConnection
 
 # ----------------------------
 # Database Configuration
@@ -18,7 +19,7 @@ DB_CONFIG = {
 def get_connection():
     """Establish and return a PostgreSQL connection."""
     try:
-        conn = psycopg2.connect(**DB_CONFIG)
+        conn = psycopg2.connect(**DB_CONFIG, connection_factory=TimedConnection)
         return conn
     except Exception as e:
         print("❌ Database connection failed:", e)
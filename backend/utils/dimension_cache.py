@@ -0,0 +1,138 @@
+import os
+import threading
+from collections import OrderedDict
+
+from psycopg2.extras import execute_values
+
+# ----------------------------
+# Configuration
+# ----------------------------
+DIMENSION_CACHE_SIZE = int(os.getenv("DIMENSION_CACHE_SIZE", "100000"))
+UPSERT_PAGE_SIZE = 10000
+
+
+def _is_missing(key):
+    # None, NaN (NaN != NaN) and empty strings never get a dimension row
+    return key is None or key != key or key == ""
+
+
+class DimensionCache:
+    """Bounded LRU of natural key -> surrogate id for one dimension table.
+
+    Keys already seen are answered from memory; unseen keys are resolved
+    with a single batched INSERT ... ON CONFLICT ... RETURNING, so the cost
+    of a batch grows with its new keys, not with the size of the table.
+    One instance per table is shared by every loader run in the process.
+    """
+
+    def __init__(self, table, key_column, id_column, max_size=DIMENSION_CACHE_SIZE):
+        self.table = table
+        self.key_column = key_column
+        self.id_column = id_column
+        self.max_size = max_size
+        self._ids = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _remember(self, pairs):
+        with self._lock:
+            for key, id_ in pairs:
+                self._ids[key] = id_
+                self._ids.move_to_end(key)
+            while len(self._ids) > self.max_size:
+                self._ids.popitem(last=False)
+
+    def resolve(self, cur, keys):
+        """Return {key: id} for every non-missing key, creating rows as needed."""
+        resolved = {}
+        unseen = []
+        with self._lock:
+            for key in set(keys):
+                if _is_missing(key):
+                    continue
+                id_ = self._ids.get(key)
+                if id_ is None:
+                    unseen.append(key)
+                else:
+                    self._ids.move_to_end(key)
+                    resolved[key] = id_
+        self.hits += len(resolved)
+        self.misses += len(unseen)
+
+        if unseen:
+            # DO UPDATE (a no-op) instead of DO NOTHING so existing rows are
+            # returned too, in the same round trip. Keys go in sorted order:
+            # the update locks existing rows, and concurrent loaders locking
+            # the same rows in different orders could deadlock.
+            rows = execute_values(
+                cur,
+                f"""
+                INSERT INTO {self.table} ({self.key_column}) VALUES %s
+                ON CONFLICT ({self.key_column})
+                DO UPDATE SET {self.key_column} = EXCLUDED.{self.key_column}
+                RETURNING {self.key_column}, {self.id_column};
+                """,
+                [(key,) for key in sorted(unseen, key=str)],
+                page_size=UPSERT_PAGE_SIZE,
+                fetch=True
+            )
+            self._remember(rows)
+            resolved.update(rows)
+
+        return resolved
+
+    def upsert(self, cur, rows, columns):
+        """Batched upsert of (key, *attributes) rows; returns {key: id}.
+
+        Used when attribute columns must be refreshed (e.g. IP country and
+        TI score), which resolve() deliberately never touches.
+        """
+        unique = {}
+        for row in rows:
+            if not _is_missing(row[0]):
+                unique[row[0]] = tuple(row)
+        rows = [unique[key] for key in sorted(unique, key=str)]     # lock order, see resolve()
+        if not rows:
+            return {}
+
+        updates = ", ".join(f"{col} = EXCLUDED.{col}" for col in columns)
+        returned = execute_values(
+            cur,
+            f"""
+            INSERT INTO {self.table} ({self.key_column}, {", ".join(columns)}) VALUES %s
+            ON CONFLICT ({self.key_column}) DO UPDATE SET {updates}
+            RETURNING {self.key_column}, {self.id_column};
+            """,
+            rows,
+            page_size=UPSERT_PAGE_SIZE,
+            fetch=True
+        )
+        self._remember(returned)
+        return dict(returned)
+
+    def clear(self):
+        with self._lock:
+            self._ids.clear()
+
+    def stats(self):
+        return {
+            "table": self.table,
+            "size": len(self._ids),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# ----------------------------
+# Shared Instances
+# ----------------------------
+users_cache = DimensionCache("users", "username", "user_id")
+actions_cache = DimensionCache("actions", "action_name", "action_id")
+ips_cache = DimensionCache("ip_details", "src_ip", "ip_id")
+
+
+def clear_dimension_caches():
+    """Forget all cached ids, e.g. after a rolled-back transaction."""
+    for cache in (users_cache, actions_cache, ips_cache):
+        cache.clear()
@@ -0,0 +1,282 @@
+import fcntl
+import hashlib
+import math
+import os
+import pickle
+import threading
+from contextlib import contextmanager
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# ----------------------------
+# CONFIGURATION
+# ----------------------------
+SNAPSHOT_PATH = Path(__file__).resolve().parents[1] / "data" / "event_dedupe.pkl"
+RETAIN_DAYS = 14                      # one filter per event day, newest 14 kept
+DAY_CAPACITY = 200_000                # events per day before the error rate degrades
+ERROR_RATE = 0.01                     # ~240 KB per day at these settings
+
+ID_COLUMNS = ["eventID", "event_id"]
+CONTENT_COLUMNS = ["timestamp", "user", "action", "src_ip", "result"]
+
+EVENT_KEY_DDL = """
+    ALTER TABLE enriched_logs ADD COLUMN IF NOT EXISTS event_key VARCHAR(64);
+    CREATE UNIQUE INDEX IF NOT EXISTS ux_enriched_logs_event_key ON enriched_logs (event_key);
+"""
+
+# Keys of rows moved to the Parquet archive. The unique index only sees hot
+# rows, so without these a replay of an archived day would load it again.
+ARCHIVED_KEYS_DDL = """
+    CREATE TABLE IF NOT EXISTS archived_event_keys (
+        event_key VARCHAR(64) PRIMARY KEY
+    );
+"""
+
+SKIP_ARCHIVED_DDL = """
+    CREATE OR REPLACE FUNCTION enriched_logs_skip_archived() RETURNS trigger AS $$
+    BEGIN
+        IF NEW.event_key IS NOT NULL AND EXISTS (
+            SELECT 1 FROM archived_event_keys WHERE event_key = NEW.event_key
+        ) THEN
+            RETURN NULL;
+        END IF;
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    CREATE TRIGGER enriched_logs_skip_archived
+        BEFORE INSERT ON enriched_logs
+        FOR EACH ROW EXECUTE FUNCTION enriched_logs_skip_archived();
+"""
+
+SKIP_ARCHIVED_FOUND = "SELECT 1 FROM pg_trigger WHERE tgname = 'enriched_logs_skip_archived';"
+
+
+def ensure_event_key(cur):
+    """Add the natural key column and its unique index (idempotent).
+
+    Rows loaded before the column existed keep a NULL key and are never
+    treated as duplicates. Inserts of archived keys are skipped by a row
+    trigger, whichever loader sends them; it is looked up again once the
+    lock is held, as another loader may have installed it meanwhile.
+    """
+    cur.execute(EVENT_KEY_DDL)
+    cur.execute(ARCHIVED_KEYS_DDL)
+
+    cur.execute(SKIP_ARCHIVED_FOUND)
+    if cur.fetchone():
+        return
+
+    cur.execute("LOCK TABLE enriched_logs IN SHARE ROW EXCLUSIVE MODE;")
+    cur.execute(SKIP_ARCHIVED_FOUND)
+    if not cur.fetchone():
+        cur.execute(SKIP_ARCHIVED_DDL)
+
+# ----------------------------
+# KEYS
+# ----------------------------
+def _digest(value):
+    return hashlib.blake2b(value.encode("utf-8", "replace"), digest_size=16).hexdigest()
+
+
+def event_keys(df: pd.DataFrame) -> pd.Series:
+    """32-hex key per row: the source's event id when it has one, otherwise a
+    hash of the row content (so the same log line always maps to one key)."""
+    present = [col for col in CONTENT_COLUMNS if col in df.columns]
+    content = df[present].astype(str).agg("|".join, axis=1) if present else pd.Series("", index=df.index)
+    keys = ("c:" + content).map(_digest)
+
+    for col in ID_COLUMNS:
+        if col in df.columns:
+            ids = df[col].dropna().astype(str)
+            ids = ids[ids != ""]
+            keys.loc[ids.index] = ("id:" + ids).map(_digest)
+            break
+
+    return keys
+
+
+def _split(keys):
+    """Two 64-bit hashes per key for double hashing (the key is already a digest)."""
+    h1 = np.fromiter((int(k[:16], 16) for k in keys), dtype=np.uint64, count=len(keys))
+    h2 = np.fromiter((int(k[16:], 16) | 1 for k in keys), dtype=np.uint64, count=len(keys))
+    return h1, h2
+
+
+def _days(df: pd.DataFrame) -> np.ndarray:
+    today = date.today().toordinal()
+    if "timestamp" not in df.columns:
+        return np.full(len(df), today, dtype=np.int64)
+    # UTC event days, whether the column is naive, tz-aware or mixed strings
+    ts = pd.to_datetime(df["timestamp"], errors="coerce", utc=True).dt.tz_localize(None)
+    days = (ts - pd.Timestamp("0001-01-01")).dt.days + 1
+    return days.fillna(today).astype(np.int64).to_numpy()
+
+# ----------------------------
+# FILTERS
+# ----------------------------
+class BloomFilter:
+    """Bit-array Bloom filter with vectorised add / lookup over key batches."""
+
+    def __init__(self, capacity=DAY_CAPACITY, error_rate=ERROR_RATE):
+        self.size = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+        self.count = 0
+
+    def _positions(self, h1, h2):
+        i = np.arange(self.hashes, dtype=np.uint64)
+        return (h1[:, None] + i[None, :] * h2[:, None]) % np.uint64(self.size)
+
+    def add(self, h1, h2):
+        pos = self._positions(h1, h2)
+        masks = np.left_shift(np.uint8(1), (pos & np.uint64(7)).astype(np.uint8))
+        np.bitwise_or.at(self.bits, (pos >> np.uint64(3)).astype(np.intp), masks)
+        self.count += len(h1)
+
+    def contains(self, h1, h2):
+        pos = self._positions(h1, h2)
+        bytes_ = self.bits[(pos >> np.uint64(3)).astype(np.intp)]
+        return ((bytes_ >> (pos & np.uint64(7)).astype(np.uint8)) & 1).all(axis=1)
+
+
+class DedupeFilter:
+    """Event keys seen by earlier loads, in one Bloom filter per event day.
+
+    A miss means the event is new for sure; a hit only means "maybe seen",
+    so hits are confirmed against the unique index in one query per batch
+    and false positives are never dropped. Days older than the retained
+    range are unknown and always confirmed. Like the heavy-hitter store the
+    state lives in a pickled snapshot shared by the loader processes.
+    """
+
+    def __init__(self, path=SNAPSHOT_PATH, retain_days=RETAIN_DAYS):
+        self.path = Path(path)
+        self.retain_days = retain_days
+        self.days = {}                # day ordinal -> BloomFilter
+        self.horizon = None           # days before this were pruned
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    def maybe_seen(self, keys, days):
+        maybe = np.zeros(len(keys), dtype=bool)
+        if not len(keys):
+            return maybe
+        h1, h2 = _split(keys)
+        for day in np.unique(days):
+            rows = days == day
+            bloom = self.days.get(int(day))
+            if bloom is not None:
+                maybe[rows] = bloom.contains(h1[rows], h2[rows])
+            elif self.horizon is not None and day < self.horizon:
+                maybe[rows] = True
+        return maybe
+
+    def add(self, keys, days):
+        if not len(keys):
+            return
+        h1, h2 = _split(keys)
+        for day in np.unique(days):
+            rows = days == day
+            if self.horizon is not None and day < self.horizon:
+                continue
+            self.days.setdefault(int(day), BloomFilter()).add(h1[rows], h2[rows])
+        while len(self.days) > self.retain_days:
+            oldest = min(self.days)
+            del self.days[oldest]
+            self.horizon = max(self.horizon or 0, oldest + 1)
+
+    # ---- persistence ----
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump({"days": self.days, "horizon": self.horizon}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self.path)
+
+    def refresh(self):
+        """Reload the snapshot if another process updated it."""
+        with self._lock:
+            try:
+                mtime = self.path.stat().st_mtime_ns
+            except FileNotFoundError:
+                return self
+            if mtime != self._mtime:
+                with open(self.path, "rb") as f:
+                    state = pickle.load(f)
+                self.days, self.horizon = state["days"], state["horizon"]
+                self._mtime = mtime
+        return self
+
+
+@contextmanager
+def _snapshot_lock(path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_suffix(".lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+dedupe_filter = DedupeFilter()
+
+# ----------------------------
+# LOADER HOOKS
+# ----------------------------
+def drop_seen(cur, df: pd.DataFrame) -> pd.DataFrame:
+    """Return the rows of `df` not loaded before, with an `event_key` column.
+
+    Duplicates inside the batch are dropped first; Bloom hits are confirmed
+    with a single `= ANY(...)` lookup against the hot and the archived keys
+    instead of one query per event.
+    """
+    total = len(df)
+    df = df.assign(event_key=event_keys(df)).drop_duplicates(subset=["event_key"])
+
+    try:
+        dedupe_filter.refresh()
+        maybe = dedupe_filter.maybe_seen(df["event_key"].tolist(), _days(df))
+    except Exception as e:
+        # the unique index still rejects replays, only more slowly
+        print("⚠️ Dedupe filter unavailable:", e)
+        maybe = np.ones(len(df), dtype=bool)
+
+    seen = set()
+    if maybe.any():
+        keys = df["event_key"][maybe].tolist()
+        cur.execute(
+            """
+            SELECT event_key FROM enriched_logs WHERE event_key = ANY(%s)
+            UNION ALL
+            SELECT event_key FROM archived_event_keys WHERE event_key = ANY(%s)
+            """,
+            (keys, keys)
+        )
+        seen = {row[0] for row in cur.fetchall()}
+
+    fresh = df[~df["event_key"].isin(seen)]
+    if len(fresh) < total:
+        print(
+            f"♻️ Skipped {total - len(fresh)} duplicate rows "
+            f"({total - len(df)} repeated in batch, {len(seen)} already loaded, "
+            f"{int(maybe.sum())} filter hits checked)"
+        )
+    return fresh
+
+
+def remember(df: pd.DataFrame):
+    """Add loaded rows to the filter; call after the insert committed."""
+    if df.empty:
+        return
+    try:
+        with _snapshot_lock(dedupe_filter.path):
+            dedupe_filter.refresh()
+            dedupe_filter.add(df["event_key"].tolist(), _days(df))
+            dedupe_filter.save()
+    except Exception as e:
+        print("⚠️ Dedupe filter update failed:", e)
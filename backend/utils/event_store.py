@@ -0,0 +1,150 @@
+"""
+event_store.py – columnar, day-partitioned Parquet store for pipeline outputs
+
+Each enrichment stage writes its frame once; analysis reads back only the
+columns and days it needs instead of re-parsing CSVs:
+
+    data/events/<stage>/day=YYYY-MM-DD/part-*.parquet
+"""
+
+import uuid
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+from pyarrow import fs
+
+STORE_ROOT = Path(__file__).resolve().parents[1] / "data" / "events"
+
+# Low-cardinality string columns stored dictionary-encoded
+DICTIONARY_COLUMNS = ["user", "action", "src_ip", "country", "ti_country", "ti_asn",
+                      "result", "prelim_priority", "final_priority"]
+
+UNKNOWN_DAY = "unknown"
+
+_OPS = {
+    "==": lambda f, v: f == v,
+    "!=": lambda f, v: f != v,
+    "<": lambda f, v: f < v,
+    "<=": lambda f, v: f <= v,
+    ">": lambda f, v: f > v,
+    ">=": lambda f, v: f >= v,
+    "in": lambda f, v: f.isin(list(v)),
+}
+
+_PARTITIONING = ds.partitioning(pa.schema([("day", pa.string())]), flavor="hive")
+
+
+def _stage_dir(stage, root=None):
+    return Path(root or STORE_ROOT) / stage
+
+
+# ---------------------- WRITER ----------------------
+def write_events(df: pd.DataFrame, stage: str, timestamp_col="timestamp", mode="replace", root=None):
+    """Write a stage's frame into day partitions.
+
+    mode="replace" rewrites only the days present in `df` (the batch scripts
+    recompute whole files, so re-runs must not duplicate rows);
+    mode="append" adds new part files next to existing ones.
+    """
+    if df.empty:
+        return 0
+
+    df = df.copy()
+    df[timestamp_col] = pd.to_datetime(df[timestamp_col], errors="coerce", utc=True).dt.tz_localize(None)
+    df["day"] = df[timestamp_col].dt.strftime("%Y-%m-%d").fillna(UNKNOWN_DAY)
+
+    for col in DICTIONARY_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    for col in DICTIONARY_COLUMNS:
+        if col in table.column_names:
+            idx = table.schema.get_field_index(col)
+            table = table.set_column(idx, col, pc.dictionary_encode(table.column(col)))
+
+    out_dir = _stage_dir(stage, root)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    ds.write_dataset(
+        table,
+        str(out_dir),
+        format="parquet",
+        partitioning=_PARTITIONING,
+        basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+        existing_data_behavior="delete_matching" if mode == "replace" else "overwrite_or_ignore",
+        file_options=ds.ParquetFileFormat().make_write_options(compression="zstd"),
+    )
+    print(f"🗄️ Stored {len(df)} rows → {out_dir}")
+    return len(df)
+
+
+# ---------------------- READER ----------------------
+def open_dataset(stage: str, root=None):
+    """Open a stage as a memory-mapped Arrow dataset (lazy, nothing read yet)."""
+    path = _stage_dir(stage, root)
+    if not path.exists():
+        return None
+    return ds.dataset(
+        str(path),
+        format="parquet",
+        partitioning=_PARTITIONING,
+        filesystem=fs.LocalFileSystem(use_mmap=True),
+    )
+
+
+def build_filter(filters=None, start=None, end=None, timestamp_col="timestamp"):
+    """Turn [(column, op, value), ...] plus a time range into an Arrow expression.
+
+    Bounds on `start`/`end` also constrain the `day` partition key, so whole
+    days outside the range are pruned without opening their files.
+    """
+    expr = None
+
+    def _and(e):
+        nonlocal expr
+        expr = e if expr is None else expr & e
+
+    for column, op, value in filters or []:
+        if op not in _OPS:
+            raise ValueError(f"Unsupported filter operator: {op}")
+        _and(_OPS[op](ds.field(column), value))
+
+    if start is not None:
+        start = pd.Timestamp(start)
+        _and(ds.field("day") >= start.strftime("%Y-%m-%d"))
+        _and(ds.field(timestamp_col) >= pa.scalar(start.to_pydatetime(), pa.timestamp("ns")))
+    if end is not None:
+        end = pd.Timestamp(end)
+        _and(ds.field("day") <= end.strftime("%Y-%m-%d"))
+        _and(ds.field(timestamp_col) < pa.scalar(end.to_pydatetime(), pa.timestamp("ns")))
+
+    return expr
+
+
+def read_events(stage: str, columns=None, filters=None, start=None, end=None,
+                timestamp_col="timestamp", root=None) -> pd.DataFrame:
+    """Read a stage with column projection and predicate pushdown.
+
+    >>> read_events("enriched", columns=["user", "src_ip", "alert_score"],
+    ...             filters=[("prelim_priority", "==", "HIGH")],
+    ...             start="2026-01-01", end="2026-04-01")
+    """
+    dataset = open_dataset(stage, root)
+    if dataset is None:
+        return pd.DataFrame(columns=columns or [])
+
+    expr = build_filter(filters, start, end, timestamp_col)
+    table = dataset.to_table(columns=columns, filter=expr)
+    return table.to_pandas()
+
+
+def list_days(stage: str, root=None):
+    """Days currently stored for a stage, oldest first."""
+    path = _stage_dir(stage, root)
+    if not path.exists():
+        return []
+    return sorted(p.name.split("=", 1)[1] for p in path.glob("day=*") if p.is_dir())
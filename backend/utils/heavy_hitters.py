@@ -0,0 +1,254 @@
+import fcntl
+import hashlib
+import os
+import pickle
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# ----------------------------
+# CONFIGURATION
+# ----------------------------
+SNAPSHOT_PATH = Path(__file__).resolve().parents[1] / "data" / "heavy_hitters.pkl"
+BUCKET_SECONDS = 300                  # 5-minute buckets...
+BUCKETS = 288                         # ...covering the last 24h
+CAPACITY = 200                        # space-saving counters per bucket
+CMS_WIDTH = 512
+CMS_DEPTH = 4
+
+WINDOWS = {"1h": 3600, "24h": 86400, "all": None}
+
+# tracker name -> (key column, what is added per row)
+TRACKERS = {
+    "user_events": ("user", "count"),
+    "user_risk": ("user", "alert_score"),
+    "user_high": ("user", "high"),
+    "ip_events": ("src_ip", "count"),
+    "ip_risk": ("src_ip", "alert_score")
+}
+
+# ----------------------------
+# SKETCHES
+# ----------------------------
+class CountMinSketch:
+    """Point estimates (never under-counted) for any key in fixed memory."""
+
+    def __init__(self, width=CMS_WIDTH, depth=CMS_DEPTH):
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.float64)
+        self._rows = np.arange(depth)
+
+    def _columns(self, key):
+        digest = hashlib.blake2b(str(key).encode("utf-8", "replace"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.width for i in range(self.depth)]
+
+    def add(self, key, value=1.0):
+        self.table[self._rows, self._columns(key)] += value
+
+    def estimate(self, key):
+        return float(self.table[self._rows, self._columns(key)].min())
+
+    def merge(self, other):
+        self.table += other.table
+
+
+class SpaceSaving:
+    """Top-K heavy hitters (Metwally et al.): `capacity` counters, each with
+    an over-estimation bound; any key heavier than total/capacity is kept."""
+
+    def __init__(self, capacity=CAPACITY):
+        self.capacity = capacity
+        self.counters = {}          # key -> [count, error]
+
+    def add(self, key, value=1.0):
+        counter = self.counters.get(key)
+        if counter is not None:
+            counter[0] += value
+        elif len(self.counters) < self.capacity:
+            self.counters[key] = [value, 0.0]
+        else:
+            victim = min(self.counters, key=lambda k: self.counters[k][0])
+            floor = self.counters.pop(victim)[0]
+            self.counters[key] = [floor + value, floor]
+
+    def merge(self, other):
+        for key, (count, error) in other.counters.items():
+            mine = self.counters.setdefault(key, [0.0, 0.0])
+            mine[0] += count
+            mine[1] += error
+        if len(self.counters) > self.capacity:
+            keep = sorted(self.counters.items(), key=lambda kv: kv[1][0], reverse=True)[:self.capacity]
+            self.counters = dict(keep)
+
+    def top(self, n):
+        ranked = sorted(self.counters.items(), key=lambda kv: kv[1][0], reverse=True)[:n]
+        return [(key, count, error) for key, (count, error) in ranked]
+
+
+class WindowedTopK:
+    """Ring of time buckets, each with a SpaceSaving summary and a CMS, plus
+    an all-time pair. A window query merges at most BUCKETS small summaries,
+    so its cost does not depend on how many events were ingested.
+
+    Buckets are keyed by event time and windows are anchored to the newest
+    one seen."""
+
+    def __init__(self, bucket_seconds=BUCKET_SECONDS, buckets=BUCKETS):
+        self.bucket_seconds = bucket_seconds
+        self.buckets = buckets
+        self.slots = [None] * buckets     # (bucket_start, SpaceSaving, CountMinSketch)
+        self.total = (SpaceSaving(), CountMinSketch())
+
+    def _slot(self, start):
+        index = (start // self.bucket_seconds) % self.buckets
+        slot = self.slots[index]
+        if slot is None or slot[0] < start:
+            slot = self.slots[index] = (start, SpaceSaving(), CountMinSketch())
+        elif slot[0] > start:
+            return None                   # older than the ring covers
+        return slot
+
+    def add(self, key, bucket_start, value):
+        self.total[0].add(key, value)
+        self.total[1].add(key, value)
+        slot = self._slot(int(bucket_start))
+        if slot is not None:
+            slot[1].add(key, value)
+            slot[2].add(key, value)
+
+    def newest(self):
+        """End of the newest bucket holding events (None while empty)."""
+        starts = [s[0] for s in self.slots if s is not None]
+        return max(starts) + self.bucket_seconds if starts else None
+
+    def _window(self, seconds, now):
+        if seconds is None:
+            return [self.total]
+        # windows end at the newest event, not the wall clock, so a load of
+        # historical logs still has a "last hour"
+        end = now or self.newest()
+        if end is None:
+            return []
+        cutoff = end - seconds
+        return [(s[1], s[2]) for s in self.slots if s is not None and s[0] + self.bucket_seconds > cutoff]
+
+    def top(self, n, seconds=None, now=None):
+        merged = SpaceSaving(CAPACITY)
+        for summary, _ in self._window(seconds, now):
+            merged.merge(summary)
+        return merged.top(n)
+
+    def estimate(self, key, seconds=None, now=None):
+        return sum(cms.estimate(key) for _, cms in self._window(seconds, now))
+
+# ----------------------------
+# STORE
+# ----------------------------
+class HeavyHitterStore:
+    """Trackers updated by the loaders and read by the insights endpoints.
+
+    Loaders and the web app are separate processes, so the store lives in a
+    pickled snapshot: ingest updates it under a file lock, readers reload it
+    only when its mtime changes.
+    """
+
+    def __init__(self, path=SNAPSHOT_PATH):
+        self.path = Path(path)
+        self.trackers = {name: WindowedTopK() for name in TRACKERS}
+        self.events = 0
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    def record_frame(self, df: pd.DataFrame):
+        """Fold a batch of enriched rows in (pre-aggregated per bucket and key)."""
+        if df.empty:
+            return
+        ts = pd.to_datetime(df["timestamp"], errors="coerce", utc=True)
+        # unit-agnostic (pandas may store ns or us); rows without a usable
+        # timestamp go with the batch's newest one, so they don't drag the
+        # windows of a historical load forward to the wall clock
+        epoch = (ts - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(seconds=1)
+        fallback = epoch.max() if ts.notna().any() else int(time.time())
+        epoch = epoch.where(ts.notna(), fallback).astype("int64")
+        frame = pd.DataFrame({
+            "bucket": epoch // BUCKET_SECONDS * BUCKET_SECONDS,
+            "user": df["user"].fillna("unknown").astype(str),
+            "src_ip": df["src_ip"].fillna("unknown").astype(str),
+            "alert_score": pd.to_numeric(df["alert_score"], errors="coerce").fillna(0.0),
+            "high": (df["prelim_priority"].fillna("").astype(str).str.upper() == "HIGH").astype(float),
+            "count": 1.0
+        })
+        for name, (key, value) in TRACKERS.items():
+            totals = frame.groupby(["bucket", key])[value].sum()
+            tracker = self.trackers[name]
+            for (bucket, k), amount in totals.items():
+                if amount:
+                    tracker.add(k, bucket, float(amount))
+        self.events += len(df)
+
+    def top(self, name, n=10, window="all"):
+        return self.trackers[name].top(n, WINDOWS[window])
+
+    def estimate(self, name, key, window="all"):
+        return self.trackers[name].estimate(key, WINDOWS[window])
+
+    # ---- persistence ----
+    def _state(self):
+        return {"trackers": self.trackers, "events": self.events}
+
+    def _restore(self, state):
+        self.trackers = state["trackers"]
+        self.events = state["events"]
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump(self._state(), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self.path)
+
+    def refresh(self):
+        """Reload the snapshot if another process updated it."""
+        with self._lock:
+            try:
+                mtime = self.path.stat().st_mtime_ns
+            except FileNotFoundError:
+                return self
+            if mtime != self._mtime:
+                with open(self.path, "rb") as f:
+                    self._restore(pickle.load(f))
+                self._mtime = mtime
+        return self
+
+
+@contextmanager
+def _ingest_lock(path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_suffix(".lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+heavy_hitters = HeavyHitterStore()
+
+
+def record_ingest(df: pd.DataFrame):
+    """Called by the loaders after a successful insert."""
+    try:
+        with _ingest_lock(heavy_hitters.path):
+            heavy_hitters.refresh()
+            heavy_hitters.record_frame(df)
+            heavy_hitters.save()
+    except Exception as e:
+        # insights degrade to the SQL fallback; never fail the load
+        print("⚠️ Heavy-hitter update failed:", e)
@@ -1,7 +1,12 @@
 import psycopg2
-from psycopg2.extras import execute_batch
+from psycopg2.extras import execute_values
 import pandas as pd
 from backend.utils.db_config import DB_CONFIG
+from backend.utils.data_versions import bump_data_version
+from backend.utils.stats_engine import ensure_counters
+from backend.utils.dimension_cache import users_cache, actions_cache, ips_cache, clear_dimension_caches
+from backend.utils.heavy_hitters import record_ingest
+from backend.utils.event_dedupe import ensure_event_key, drop_seen, remember
 import traceback
 
 def setup_database():
@@ -9,11 +14,11 @@ def setup_database():
     try:
         # First try connecting to create the database
         conn = psycopg2.connect(
-            dbname="iampact",
-            user=DB_CONFIG["postgres"],
-            password=DB_CONFIG["changeme"],
-            host=DB_CONFIG["localhost"],
-            port=DB_CONFIG["5432"]
+            dbname="postgres",
+            user=DB_CONFIG["user"],
+            password=DB_CONFIG["password"],
+            host=DB_CONFIG["host"],
+            port=DB_CONFIG["port"]
         )
         conn.autocommit = True
         cur = conn.cursor()
@@ -68,9 +73,16 @@ def setup_database():
                 result_flag BOOLEAN,
                 alert_score FLOAT,
                 prelim_priority VARCHAR(50),
-                ti_country VARCHAR(10)
+                ti_country VARCHAR(10),
+                event_key VARCHAR(64)
             );
         """)
+
+        # Natural key for idempotent loads (also added to older tables)
+        ensure_event_key(cur)
+
+        # Materialized dashboard counters maintained on insert
+        ensure_counters(cur)
         
         conn.commit()
         print("✅ Database and normalized tables created successfully")
@@ -86,6 +98,7 @@ def insert_logs(logs_df: pd.DataFrame):
     """
     Inserts processed logs directly into the enriched_logs table.
     Uses the denormalized schema with raw values (not IDs).
+    Returns the number of rows inserted, or None if the insert failed.
     """
     try:
         # Ensure database and tables exist
@@ -95,41 +108,19 @@ def insert_logs(logs_df: pd.DataFrame):
         conn = psycopg2.connect(**DB_CONFIG)
         cur = conn.cursor()
 
-        # 1. Insert users and get mapping
-        print("Adding users...")
-        users = logs_df["user"].dropna().unique()
-        for user in users:
-            cur.execute(
-                "INSERT INTO users (username) VALUES (%s) ON CONFLICT (username) DO NOTHING;",
-                (user,)
-            )
-        
-        cur.execute("SELECT user_id, username FROM users;")
-        user_map = {username: uid for uid, username in cur.fetchall()}
-        
-        # 2. Insert actions and get mapping
-        print("Adding actions...")
-        actions = logs_df["action"].dropna().unique()
-        for action in actions:
-            cur.execute(
-                "INSERT INTO actions (action_name) VALUES (%s) ON CONFLICT (action_name) DO NOTHING;",
-                (action,)
-            )
-            
-        cur.execute("SELECT action_id, action_name FROM actions;")
-        action_map = {name: aid for aid, name in cur.fetchall()}
-        
-        # 3. Insert IP details and get mapping
-        print("Adding IP details...")
-        ips = logs_df[["src_ip"]].drop_duplicates()
-        for ip in ips["src_ip"]:
-            cur.execute(
-                "INSERT INTO ip_details (src_ip) VALUES (%s) ON CONFLICT (src_ip) DO NOTHING;",
-                (ip,)
-            )
-            
-        cur.execute("SELECT ip_id, src_ip FROM ip_details;")
-        ip_map = {ip: ipid for ipid, ip in cur.fetchall()}
+        # 0. Drop replayed rows (in-memory filter, one lookup for its hits)
+        logs_df = drop_seen(cur, logs_df)
+        if logs_df.empty:
+            print("✅ No new logs to insert (all rows were loaded before).")
+            cur.close()
+            conn.close()
+            return 0
+
+        # 1-3. Resolve user/action/IP ids (only unseen keys hit the DB)
+        print("Resolving users, actions and IP details...")
+        user_map = users_cache.resolve(cur, logs_df["user"].tolist())
+        action_map = actions_cache.resolve(cur, logs_df["action"].tolist())
+        ip_map = ips_cache.resolve(cur, logs_df["src_ip"].tolist())
         
         # 4. Prepare enriched logs with mapped IDs
         missing_user = set()
@@ -160,7 +151,8 @@ def insert_logs(logs_df: pd.DataFrame):
                         row.get("result_flag"),
                         row.get("alert_score"),
                         row.get("prelim_priority"),
-                        row.get("ti_country")
+                        row.get("ti_country"),
+                        row["event_key"]
                     )
                 )
 
@@ -177,18 +169,37 @@ def insert_logs(logs_df: pd.DataFrame):
         query = """
             INSERT INTO enriched_logs (
                 timestamp, user_id, action_id, ip_id, result,
-                result_flag, alert_score, prelim_priority, ti_country
+                result_flag, alert_score, prelim_priority, ti_country, event_key
             )
-            VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s);
+            VALUES %s
+            ON CONFLICT (event_key) DO NOTHING
+            RETURNING event_key;
         """
 
-        execute_batch(cur, query, records, page_size=1000)
+        # Rows another load inserted first are skipped by the conflict
+        # clause; only the keys returned here were written by this call
+        inserted = execute_values(cur, query, records, page_size=1000, fetch=True)
+        inserted = {key for (key,) in inserted}
+
+        # Streaming top users / IPs for the insights endpoints. Updated
+        # before the version bump commits: insights responses are cached
+        # per data version, so a snapshot written later would be missed
+        logs_df = logs_df[logs_df["event_key"].isin(inserted)]
+        record_ingest(logs_df)
+
+        bump_data_version(cur, "enriched_logs")
         conn.commit()
         cur.close()
         conn.close()
-        print(f"✅ {len(records)} logs successfully inserted into enriched_logs.")
+        print(f"✅ {len(inserted)} of {len(records)} logs inserted into enriched_logs.")
+
+        # Mark the rows as seen so a replay of this file is skipped in memory
+        remember(logs_df)
+        return len(inserted)
 
     except Exception as e:
+        # ids resolved in a rolled-back transaction may not exist
+        clear_dimension_caches()
         print(f"❌ Database insert error: {str(e)}")
         traceback.print_exc()
         if "relation" in str(e) and "does not exist" in str(e):
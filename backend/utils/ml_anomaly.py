@@ -1,8 +1,11 @@
+import fcntl
+from contextlib import contextmanager
 import pandas as pd, numpy as np
 from sklearn.ensemble import IsolationForest
 from sklearn.preprocessing import OneHotEncoder
 from pathlib import Path
 import joblib
+from backend.utils.event_store import write_events
 
 DATA = Path(__file__).resolve().parents[1] / "data" / "scored_logs.csv"
 MODEL = Path(__file__).resolve().parents[1] / "models"
@@ -11,9 +14,11 @@ IF_FILE = MODEL / "iforest.pkl"
 ENC_FILE = MODEL / "encoder.pkl"
 
 def load_df():
-    df = pd.read_csv(DATA)
+    return add_features(pd.read_csv(DATA))
+
+def add_features(df):
     df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
-    df["final_risk_score"] = pd.to_numeric(df["final_risk_score"], errors="coerce").fillna(0)
+    df["final_risk_score"] = pd.to_numeric(df.get("final_risk_score", 0), errors="coerce").fillna(0)
     df["ti_score"] = pd.to_numeric(df.get("ti_score", 0), errors="coerce").fillna(0)
     df["hour"] = df["timestamp"].dt.hour.fillna(0).astype(int)
     df["weekday"] = df["timestamp"].dt.weekday.fillna(0).astype(int)
@@ -42,16 +47,32 @@ def train_or_load(X):
         joblib.dump(clf, IF_FILE)
     return clf
 
-def main():
-    df = load_df()
-    X, cols = encode(df)
-    clf = train_or_load(X)
+@contextmanager
+def model_lock():
+    """Parallel pipeline partitions must not fit and dump the model at once."""
+    with open(MODEL / "model.lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+def score_frame(df):
+    """Add ml_score / ml_flag and fold them into final_risk_score."""
+    with model_lock():
+        X, cols = encode(df)
+        clf = train_or_load(X)
     scores = -clf.decision_function(X)
     norm = (scores - scores.min()) / (scores.max() - scores.min() + 1e-9)
     df["ml_score"] = norm
     df["ml_flag"] = (df["ml_score"] > 0.7).astype(int)
     df["final_risk_score"] += df["ml_score"] * 5
+    return df
+
+def main():
+    df = score_frame(load_df())
     df.to_csv(DATA, index=False)
+    write_events(df, stage="scored")
     print(f"✅ ML anomaly scores added → {DATA}")
 
 if __name__ == "__main__":
@@ -0,0 +1,364 @@
+"""
+pipeline_runner.py – resumable, parallel DAG runner for the offline pipeline
+
+Runs preprocess → ti_enrich → ml_anomaly → alert_score → load per input
+partition (one per input file, or one per day with --split-by-day):
+
+    python -m backend.utils.pipeline_runner data/raw/ --workers 4
+    python -m backend.utils.pipeline_runner data/raw/big.csv --split-by-day
+    python -m backend.utils.pipeline_runner data/raw/ --until alert_score --no-load
+
+Every partition × stage writes its output to the work directory
+atomically (temp file + rename), then a .done.json marker holding a
+fingerprint of the input file and every upstream stage. A re-run skips
+the tasks whose marker still matches, so after a crash or a failed
+partition only the unfinished work is redone:
+
+    <work>/<partition>/<stage>.parquet
+    <work>/<partition>/<stage>.done.json
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from backend.utils.batch_metrics import collect_worker_metrics, export_batch_metrics
+
+# ----------------------------
+# CONFIGURATION
+# ----------------------------
+WORK_DIR = Path(__file__).resolve().parents[1] / "data" / "pipeline"
+INPUT_SUFFIXES = (".csv", ".csv.gz", ".parquet")
+SPLIT_CHUNK_ROWS = 200_000
+TIMESTAMP_COLUMNS = ["timestamp", "eventTime"]
+
+# ----------------------------
+# STAGES
+# ----------------------------
+# Stage functions run in worker processes: they take the upstream frames
+# and return the stage's frame (None for sinks). Heavy imports stay inside
+# so the runner itself starts without sklearn / psycopg2.
+
+def preprocess_stage(df):
+    from backend.utils.preprocess_logs import clean_logs
+    return clean_logs(df)
+
+
+def ti_enrich_stage(df):
+    from backend.utils.ti_enrich import enrich_frame
+    return enrich_frame(df)
+
+
+def ml_anomaly_stage(df):
+    from backend.utils.ml_anomaly import add_features, score_frame
+    return score_frame(add_features(df))
+
+
+def alert_score_stage(df):
+    from backend.alert_score import fill_features, train_model
+    return train_model(fill_features(df))
+
+
+def load_stage(df):
+    from backend.utils.load_to_db import insert_logs
+    if insert_logs(df) is None:
+        raise RuntimeError("insert_logs failed (see log above)")
+
+
+@dataclass
+class Stage:
+    name: str
+    func: object
+    deps: tuple = ()
+    max_parallel: int = None      # None = as many as there are workers
+    output: bool = True           # sinks only leave a marker
+    publish: str = None           # event_store stage name for the output
+    version: str = "1"            # bump to invalidate existing checkpoints
+
+
+STAGES = [
+    Stage("preprocess", preprocess_stage),
+    # every worker would sleep on the same AbuseIPDB rate limit
+    Stage("ti_enrich", ti_enrich_stage, deps=("preprocess",), max_parallel=1, publish="enriched"),
+    Stage("ml_anomaly", ml_anomaly_stage, deps=("ti_enrich",), publish="scored"),
+    Stage("alert_score", alert_score_stage, deps=("ml_anomaly",), publish="final_alerts"),
+    Stage("load", load_stage, deps=("alert_score",), max_parallel=1, output=False),
+]
+
+
+def select_stages(stages, until=None, skip=()):
+    """Stages up to and including `until`, minus `skip` and whatever needs them."""
+    names = [s.name for s in stages]
+    if until is not None:
+        stages = stages[:names.index(until) + 1]
+    dropped = set(skip)
+    kept = []
+    for stage in stages:
+        if stage.name in dropped or dropped.intersection(stage.deps):
+            dropped.add(stage.name)
+        else:
+            kept.append(stage)
+    return kept
+
+# ----------------------------
+# PARTITIONS
+# ----------------------------
+@dataclass
+class Partition:
+    name: str
+    path: str
+    fingerprint: str = field(default="")
+
+    def __post_init__(self):
+        if not self.fingerprint:
+            st = os.stat(self.path)
+            self.fingerprint = f"{self.path}:{st.st_size}:{st.st_mtime_ns}"
+
+
+def _read(path):
+    path = Path(path)
+    if path.is_dir():
+        # a day partition: one part per input chunk, each with its own dtypes
+        # (int vs float with NULLs); pandas unifies them on concat
+        return pd.concat([pd.read_parquet(p) for p in sorted(path.glob("*.parquet"))], ignore_index=True)
+    return pd.read_parquet(path) if path.suffix == ".parquet" else pd.read_csv(path)
+
+
+def _write_parquet(df, path):
+    tmp = path.with_name(path.name + f".{os.getpid()}.tmp")
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), tmp, compression="zstd")
+    os.replace(tmp, path)
+
+
+def discover_inputs(inputs):
+    files = []
+    for item in inputs:
+        item = Path(item)
+        if item.is_dir():
+            files.extend(p for p in sorted(item.rglob("*")) if p.is_file() and str(p).endswith(INPUT_SUFFIXES))
+        else:
+            files.append(item)
+    return files
+
+
+def file_partitions(files):
+    parts = []
+    for path in files:
+        stem = path.name.split(".")[0]
+        digest = hashlib.sha1(str(path.resolve()).encode()).hexdigest()[:8]
+        parts.append(Partition(f"file={stem}-{digest}", str(path)))
+    return parts
+
+
+def split_by_day(files, work_dir):
+    """Re-partition the inputs into one Parquet folder per event day.
+
+    Runs once per set of inputs (same checkpoint rule as the stages); CSVs
+    are read in chunks so a multi-GB export never sits in memory whole.
+    """
+    split_dir = Path(work_dir) / "_split"
+    marker = split_dir / "split.done.json"
+    fingerprint = _hash([Partition("", str(p)).fingerprint for p in files])
+
+    if marker.exists() and json.loads(marker.read_text()).get("fingerprint") == fingerprint:
+        days = json.loads(marker.read_text())["days"]
+    else:
+        if split_dir.exists():
+            shutil.rmtree(split_dir)
+        split_dir.mkdir(parents=True)
+        days, parts = {}, 0
+        for path in files:
+            chunks = [_read(path)] if str(path).endswith(".parquet") else pd.read_csv(path, chunksize=SPLIT_CHUNK_ROWS)
+            for chunk in chunks:
+                column = next((c for c in TIMESTAMP_COLUMNS if c in chunk.columns), None)
+                stamps = pd.to_datetime(chunk[column], errors="coerce", utc=True) if column else None
+                keys = stamps.dt.strftime("%Y-%m-%d").fillna("unknown") if column else pd.Series("unknown", index=chunk.index)
+                for day, rows in chunk.groupby(keys):
+                    folder = split_dir / f"day={day}"
+                    folder.mkdir(exist_ok=True)
+                    days[day] = str(folder)
+                    _write_parquet(rows, folder / f"part-{parts:06d}.parquet")
+                    parts += 1
+        marker.write_text(json.dumps({"fingerprint": fingerprint, "days": days}))
+
+    return [Partition(f"day={day}", path) for day, path in sorted(days.items())]
+
+# ----------------------------
+# CHECKPOINTS
+# ----------------------------
+def _hash(parts):
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()
+
+
+def task_fingerprints(partition, stages):
+    prints = {}
+    for stage in stages:
+        upstream = [prints[dep] for dep in stage.deps] if stage.deps else [partition.fingerprint]
+        prints[stage.name] = _hash([stage.name, stage.version, *upstream])
+    return prints
+
+
+def _paths(work_dir, partition, stage):
+    folder = Path(work_dir) / partition.name
+    return folder / f"{stage.name}.parquet", folder / f"{stage.name}.done.json"
+
+
+def is_done(work_dir, partition, stage, fingerprint):
+    output, marker = _paths(work_dir, partition, stage)
+    if not marker.exists() or (stage.output and not output.exists()):
+        return False
+    try:
+        return json.loads(marker.read_text()).get("fingerprint") == fingerprint
+    except ValueError:
+        return False
+
+
+def run_task(work_dir, partition, stage, fingerprint, dep_names, publish_mode):
+    """One partition × stage, in a worker process. Returns (rows, seconds)."""
+    started = time.perf_counter()
+    output, marker = _paths(work_dir, partition, stage)
+    output.parent.mkdir(parents=True, exist_ok=True)
+
+    if dep_names:
+        frames = [pd.read_parquet(_paths(work_dir, partition, Stage(dep, None))[0]) for dep in dep_names]
+    else:
+        frames = [_read(partition.path)]
+
+    result = stage.func(*frames)
+    rows = len(result) if result is not None else len(frames[0])
+
+    if stage.output:
+        _write_parquet(result, output)
+    if stage.publish and result is not None:
+        from backend.utils.event_store import write_events
+        write_events(result, stage=stage.publish, mode=publish_mode)
+
+    seconds = time.perf_counter() - started
+    tmp = marker.with_name(marker.name + f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps({
+        "fingerprint": fingerprint,
+        "rows": rows,
+        "seconds": round(seconds, 3),
+        "finished_at": datetime.utcnow().isoformat()
+    }))
+    os.replace(tmp, marker)
+    return rows, seconds
+
+# ----------------------------
+# SCHEDULER
+# ----------------------------
+def run_pipeline(partitions, stages=STAGES, work_dir=WORK_DIR, workers=None, publish_mode="append"):
+    """Run every pending partition × stage as soon as its deps are done.
+
+    Partitions are independent: a failure stops only that partition's
+    downstream stages, the rest keep going. Returns a summary dict.
+    """
+    workers = workers or os.cpu_count() or 1
+    prints = {p.name: task_fingerprints(p, stages) for p in partitions}
+
+    done, failed, skipped = set(), {}, 0
+    for p in partitions:
+        for stage in stages:
+            if is_done(work_dir, p, stage, prints[p.name][stage.name]):
+                done.add((p.name, stage.name))
+                skipped += 1
+
+    pending = [(p, s) for p in partitions for s in stages if (p.name, s.name) not in done]
+    running = {}
+    ran = 0
+
+    def ready(task):
+        p, s = task
+        if p.name in failed:
+            return False
+        if s.max_parallel and sum(1 for _, rs in running.values() if rs.name == s.name) >= s.max_parallel:
+            return False
+        return all((p.name, dep) in done for dep in s.deps)
+
+    print(f"🧭 {len(partitions)} partitions × {len(stages)} stages: {skipped} done, {len(pending)} to run")
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while pending or running:
+            for task in [t for t in pending if ready(t)]:
+                if len(running) >= workers:
+                    break
+                if not ready(task):
+                    continue
+                p, s = task
+                pending.remove(task)
+                future = pool.submit(run_task, str(work_dir), p, s, prints[p.name][s.name], s.deps, publish_mode)
+                running[future] = task
+
+            if not running:
+                break       # everything left belongs to failed partitions
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                p, s = running.pop(future)
+                try:
+                    rows, seconds = future.result()
+                    done.add((p.name, s.name))
+                    ran += 1
+                    print(f"✅ {p.name} / {s.name}: {rows} rows in {seconds:.1f}s")
+                except Exception as e:
+                    failed[p.name] = f"{s.name}: {e}"
+                    print(f"❌ {p.name} / {s.name} failed:", e)
+
+    blocked = [(p.name, s.name) for p, s in pending]
+    return {
+        "partitions": len(partitions),
+        "skipped": skipped,
+        "ran": ran,
+        "failed": failed,
+        "blocked": len(blocked),
+    }
+
+# ----------------------------
+# ENTRY POINT
+# ----------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the offline enrichment pipeline as a resumable DAG")
+    parser.add_argument("inputs", nargs="+", help="input files or directories (.csv, .csv.gz, .parquet)")
+    parser.add_argument("--work-dir", default=str(WORK_DIR))
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--split-by-day", action="store_true", help="one partition per event day instead of per file")
+    parser.add_argument("--until", choices=[s.name for s in STAGES], help="stop after this stage")
+    parser.add_argument("--no-load", action="store_true", help="skip the database load")
+    args = parser.parse_args(argv)
+
+    files = discover_inputs(args.inputs)
+    if not files:
+        print("❌ No input files found")
+        return 1
+
+    partitions = split_by_day(files, args.work_dir) if args.split_by_day else file_partitions(files)
+    stages = select_stages(STAGES, args.until, ("load",) if args.no_load else ())
+
+    # stages observe TI and DB metrics in the worker processes
+    collect_worker_metrics(Path(args.work_dir) / "_metrics")
+
+    # day partitions own their days in the event store, so re-runs replace them
+    try:
+        summary = run_pipeline(
+            partitions, stages, args.work_dir, args.workers,
+            publish_mode="replace" if args.split_by_day else "append"
+        )
+    finally:
+        export_batch_metrics("pipeline")
+    print(f"📊 {json.dumps(summary)}")
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -2,8 +2,10 @@ import pandas as pd
 
 def preprocess_logs(csv_path):
     """Clean and normalize logs before database insertion."""
-    df = pd.read_csv(csv_path)
+    return clean_logs(pd.read_csv(csv_path))
 
+def clean_logs(df):
+    """Frame-level body of preprocess_logs (used by the pipeline runner)."""
     # Standardize column names
     df = df.rename(columns={
         "eventTime": "timestamp",
@@ -21,5 +23,9 @@ def preprocess_logs(csv_path):
     df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
 
     print(f"✅ Preprocessing complete. Shape: {df.shape}")
-    return df[["timestamp", "user", "action", "src_ip", "result", "result_flag",
-               "alert_score", "prelim_priority", "ti_country", "ti_asn"]]
+    columns = ["timestamp", "user", "action", "src_ip", "result", "result_flag",
+               "alert_score", "prelim_priority", "ti_country", "ti_asn"]
+    # keep CloudTrail's eventID so reloads of the same file can be skipped
+    if "eventID" in df.columns:
+        columns.append("eventID")
+    return df[columns]
@@ -0,0 +1,52 @@
+import hmac
+import os
+
+from backend.common.profiling import SamplingProfiler
+
+# ----------------------------
+# CONFIGURATION
+# ----------------------------
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "0") == "1"
+PROFILER_SAMPLE_RATE = float(os.getenv("PROFILER_SAMPLE_RATE", "0.01"))
+PROFILER_INTERVAL = float(os.getenv("PROFILER_INTERVAL", "0.005"))
+PROFILER_TOP_N = int(os.getenv("PROFILER_TOP_N", "20"))
+PROFILER_TOKEN = os.getenv("PROFILER_TOKEN", "")     # X-Profile header forces a profile
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")           # admin endpoints closed when unset
+
+profiler = SamplingProfiler(
+    enabled=PROFILER_ENABLED,
+    sample_rate=PROFILER_SAMPLE_RATE,
+    interval=PROFILER_INTERVAL,
+    top_n=PROFILER_TOP_N
+)
+
+# ----------------------------
+# FLASK HOOKS
+# ----------------------------
+def install_profiler(app):
+    """Profile a sampled fraction of requests, or those sending X-Profile: <PROFILER_TOKEN>."""
+    from flask import g, request
+
+    @app.before_request
+    def _start_profile():
+        if not (profiler.enabled or PROFILER_TOKEN):
+            return
+        forced = PROFILER_TOKEN and _matches(request.headers.get("X-Profile", ""), PROFILER_TOKEN)
+        if forced or profiler.should_sample():
+            g._profile_session = profiler.start(f"{request.method} {request.path}")
+
+    @app.teardown_request
+    def _stop_profile(exc=None):
+        session = g.pop("_profile_session", None)
+        if session is not None:
+            profiler.stop(session)
+
+
+def _matches(value, token):
+    # compared as bytes: compare_digest raises TypeError on non-ASCII str
+    return hmac.compare_digest(value.encode(), token.encode())
+
+
+def is_admin(token):
+    """Check an X-Admin-Token value against ADMIN_TOKEN."""
+    return bool(ADMIN_TOKEN) and _matches(token or "", ADMIN_TOKEN)
@@ -0,0 +1,73 @@
+import os
+from functools import wraps
+
+from flask import request, make_response
+
+from backend.common.response_cache import ResponseCache as SharedResponseCache
+from backend.utils.data_versions import fetch_data_versions, local_epoch
+
+# ----------------------------
+# Cache Configuration
+# ----------------------------
+CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "30"))
+VERSION_POLL_INTERVAL = float(os.getenv("CACHE_VERSION_POLL_INTERVAL", "2"))
+MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "512"))
+
+
+class ResponseCache(SharedResponseCache):
+    """Version-keyed response cache for the Flask views.
+
+    Versions are read with fetch_data_versions(); the cache itself lives
+    in backend.common.response_cache.
+    """
+
+    def __init__(self, ttl=CACHE_TTL, version_poll_interval=VERSION_POLL_INTERVAL,
+                 max_entries=MAX_ENTRIES):
+        super().__init__(ttl, version_poll_interval, max_entries, local_epoch=local_epoch)
+
+    def get_or_render(self, key, depends_on, build):
+        """Return a cached entry, or build one with `build()`.
+
+        `build` returns (body_bytes, status, mimetype). Only 200 responses
+        are stored.
+        """
+        def fields():
+            body, status, mimetype = build()
+            return {"body": body, "status": status, "mimetype": mimetype}
+
+        version = self.version_of(depends_on, fetch_data_versions)
+        return self.get_or_build(key, version, fields)
+
+
+response_cache = ResponseCache()
+
+
+# ----------------------------
+# Flask Decorator
+# ----------------------------
+def cached_json(name, depends_on=("enriched_logs",)):
+    """Cache a JSON view and answer If-None-Match with 304 Not Modified."""
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = (name, request.query_string)
+
+            def build():
+                resp = make_response(view(*args, **kwargs))
+                return resp.get_data(), resp.status_code, resp.mimetype
+
+            entry = response_cache.get_or_render(key, depends_on, build)
+
+            resp = make_response(entry["body"], entry["status"])
+            resp.mimetype = entry["mimetype"]
+            if entry["status"] != 200:
+                return resp
+
+            resp.set_etag(entry["etag"])
+            resp.headers["Cache-Control"] = "no-cache"
+            return resp.make_conditional(request)
+
+        return wrapper
+
+    return decorator
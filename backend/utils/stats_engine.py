@@ -0,0 +1,117 @@
+from backend.common.counters import install_counters
+from backend.utils.db_config import get_connection
+
+# ----------------------------
+# Materialized Counters
+# ----------------------------
+# window name -> (lookback interval, chart resolution)
+SERIES_WINDOWS = {
+    "1h": ("1 hour", "minute"),
+    "24h": ("24 hours", "hour"),
+    "7d": ("7 days", "hour"),
+}
+
+
+def ensure_counters(cur):
+    """Install counter tables and the enriched_logs trigger (idempotent).
+
+    Per-minute counters are maintained by a statement-level trigger on
+    insert, so dashboard cards and charts read a small table instead of
+    scanning enriched_logs on every poll.
+    """
+    def exists(sql):
+        cur.execute(sql)
+        return cur.fetchone() is not None
+
+    installed = install_counters("enriched_logs", cur.execute, exists)
+    if installed:
+        print("📈 Installed enriched_logs counters")
+    return installed
+
+
+# ----------------------------
+# Query API
+# ----------------------------
+def fetch_summary(conn, source="enriched_logs"):
+    """All dashboard counters for `source` in one grouped pass."""
+    cur = conn.cursor()
+    cur.execute(
+        """
+        SELECT
+            COALESCE(SUM(events), 0),
+            COALESCE(SUM(events) FILTER (WHERE priority = 'CRITICAL'), 0),
+            COALESCE(SUM(events) FILTER (WHERE priority = 'HIGH'), 0),
+            COALESCE(SUM(events) FILTER (WHERE priority = 'MEDIUM'), 0),
+            COALESCE(SUM(events) FILTER (WHERE priority = 'LOW'), 0),
+            COALESCE(SUM(score_sum), 0),
+            (SELECT COUNT(*) FROM metric_users WHERE source = %s)
+        FROM metric_counters
+        WHERE source = %s;
+        """,
+        (source, source)
+    )
+    total, critical, high, medium, low, score_sum, unique_users = cur.fetchone()
+    cur.close()
+
+    total = int(total)
+    return {
+        "total": total,
+        "by_priority": {
+            "CRITICAL": int(critical),
+            "HIGH": int(high),
+            "MEDIUM": int(medium),
+            "LOW": int(low),
+        },
+        "unique_users": int(unique_users),
+        "avg_score": float(score_sum) / total if total else 0.0,
+    }
+
+
+def fetch_series(conn, source="enriched_logs", window="24h"):
+    """Time-bucketed event counts per priority for the last `window`."""
+    if window not in SERIES_WINDOWS:
+        raise ValueError(f"Unsupported window: {window}")
+    lookback, resolution = SERIES_WINDOWS[window]
+
+    cur = conn.cursor()
+    cur.execute(
+        f"""
+        SELECT date_trunc('{resolution}', bucket) AS ts,
+               priority,
+               SUM(events),
+               SUM(score_sum)
+        FROM metric_counters
+        WHERE source = %s
+          AND bucket >= (now() AT TIME ZONE 'UTC') - interval '{lookback}'
+        GROUP BY 1, 2
+        ORDER BY 1;
+        """,
+        (source,)
+    )
+    rows = cur.fetchall()
+    cur.close()
+
+    points = {}
+    for ts, priority, events, score_sum in rows:
+        point = points.setdefault(ts, {"timestamp": ts.isoformat(), "total": 0, "score_sum": 0.0})
+        point[priority] = int(events)
+        point["total"] += int(events)
+        point["score_sum"] += float(score_sum)
+
+    series = []
+    for point in points.values():
+        point["avg_score"] = point.pop("score_sum") / point["total"] if point["total"] else 0.0
+        series.append(point)
+
+    return {"source": source, "window": window, "resolution": resolution, "series": series}
+
+
+def get_summary(source="enriched_logs"):
+    """Convenience wrapper that opens its own connection."""
+    conn = get_connection()
+    if not conn:
+        return None
+    try:
+        return fetch_summary(conn, source)
+    finally:
+        conn.close()
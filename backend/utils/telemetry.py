@@ -0,0 +1,125 @@
+import time
+from functools import lru_cache
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+from psycopg2.extensions import connection as _pg_connection, cursor as _pg_cursor
+
+# ----------------------------
+# METRICS
+# ----------------------------
+FAST_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+REQUEST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+TI_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0)
+
+REQUEST_LATENCY = Histogram(
+    "iampact_http_request_duration_seconds", "HTTP request latency",
+    ["method", "route", "status"], buckets=REQUEST_BUCKETS
+)
+DB_QUERY_LATENCY = Histogram(
+    "iampact_db_query_duration_seconds", "Database statement latency",
+    ["operation"], buckets=FAST_BUCKETS
+)
+DB_ROWS = Counter(
+    "iampact_db_rows_total", "Rows returned or affected by database statements", ["operation"]
+)
+TI_LOOKUP_LATENCY = Histogram(
+    "iampact_ti_lookup_duration_seconds", "Threat-intel API lookup latency",
+    ["provider"], buckets=TI_BUCKETS
+)
+TI_CACHE_REQUESTS = Counter(
+    "iampact_ti_cache_requests_total", "Threat-intel cache lookups", ["result"]
+)
+
+# labels() takes a lock per call; keep the bound children instead
+_children = {}
+
+
+def _child(metric, *labels):
+    key = (metric, labels)
+    child = _children.get(key)
+    if child is None:
+        child = _children[key] = metric.labels(*labels)
+    return child
+
+
+def observe_ti_lookup(provider, seconds):
+    _child(TI_LOOKUP_LATENCY, provider).observe(seconds)
+
+
+def count_ti_cache(hit):
+    _child(TI_CACHE_REQUESTS, "hit" if hit else "miss").inc()
+
+
+# ----------------------------
+# DATABASE (psycopg2)
+# ----------------------------
+def _operation(query):
+    if isinstance(query, bytes):
+        query = query.decode("utf-8", errors="replace")
+    head = str(query).lstrip().split(None, 1)
+    return head[0].upper() if head else "OTHER"
+
+
+class _TimedCursorMixin:
+    """Times execute/executemany; execute_values/execute_batch page through execute."""
+
+    def _timed(self, method, query, args):
+        started = time.perf_counter()
+        try:
+            return method(query, args)
+        finally:
+            operation = _operation(query)
+            _child(DB_QUERY_LATENCY, operation).observe(time.perf_counter() - started)
+            if self.rowcount and self.rowcount > 0:
+                _child(DB_ROWS, operation).inc(self.rowcount)
+
+    def execute(self, query, vars=None):
+        return self._timed(super().execute, query, vars)
+
+    def executemany(self, query, vars_list):
+        return self._timed(super().executemany, query, vars_list)
+
+
+@lru_cache(maxsize=None)
+def _timed_cursor_class(factory):
+    return type(f"Timed{factory.__name__}", (_TimedCursorMixin, factory), {})
+
+
+class TimedConnection(_pg_connection):
+    """psycopg2 connection whose cursors (any cursor_factory) report to /metrics.
+
+    Use as psycopg2.connect(..., connection_factory=TimedConnection).
+    """
+
+    def cursor(self, *args, **kwargs):
+        factory = kwargs.pop("cursor_factory", None) or self.cursor_factory or _pg_cursor
+        return super().cursor(*args, cursor_factory=_timed_cursor_class(factory), **kwargs)
+
+
+# ----------------------------
+# FLASK HOOKS
+# ----------------------------
+def install_request_metrics(app):
+    """Observe one latency sample per request, labelled by URL rule."""
+    # Flask is imported here so the batch scripts can use the DB/TI metrics without it
+    from flask import g, request
+
+    @app.before_request
+    def _start_timer():
+        g._metrics_started = time.perf_counter()
+
+    @app.after_request
+    def _observe(response):
+        started = g.pop("_metrics_started", None)
+        if started is not None:
+            rule = request.url_rule.rule if request.url_rule else "unmatched"
+            _child(REQUEST_LATENCY, request.method, rule, str(response.status_code)).observe(
+                time.perf_counter() - started
+            )
+        return response
+
+
+def metrics_response():
+    """Prometheus exposition of this process' metrics."""
+    from flask import Response
+    return Response(generate_latest(), mimetype=CONTENT_TYPE_LATEST)
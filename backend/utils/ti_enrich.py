@@ -1,14 +1,22 @@
 import os
+import fcntl
+import json
+import time
 import requests
 import pandas as pd
 from pathlib import Path
 from time import sleep
+from backend.utils.batch_metrics import export_batch_metrics
+from backend.utils.event_store import write_events
+from backend.utils.telemetry import observe_ti_lookup, count_ti_cache
 
 # ---------------------- CONFIG ----------------------
 API_KEY = os.getenv("ABUSEIPDB_KEY")
 DATA_PATH = Path(__file__).resolve().parents[1] / "data" / "scored_logs.csv"
 OUT_PATH = Path(__file__).resolve().parents[1] / "data" / "enriched_logs.csv"
 RATE_LIMIT_DELAY = 1  # seconds between API calls
+CACHE_PATH = Path(__file__).resolve().parents[1] / "data" / "ti_cache.json"
+CACHE_TTL = int(os.getenv("TI_CACHE_TTL", 24 * 3600))  # seconds a reputation stays fresh
 
 # ---------------------- HELPERS ----------------------
 def normalize_ip(ip):
@@ -49,6 +57,46 @@ def abuse_check(ip):
         return None
 
 
+def load_cache():
+    """Load cached lookups that are still within CACHE_TTL."""
+    try:
+        cache = json.loads(CACHE_PATH.read_text())
+    except (OSError, ValueError):
+        return {}
+    now = time.time()
+    return {ip: entry for ip, entry in cache.items() if now - entry.get("checked_at", 0) < CACHE_TTL}
+
+
+def save_cache(cache):
+    """Merge into the on-disk cache; parallel pipeline partitions share it."""
+    CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with open(CACHE_PATH.with_suffix(".lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            merged = {**load_cache(), **cache}
+            tmp = CACHE_PATH.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(merged))
+            tmp.replace(CACHE_PATH)
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def cached_abuse_check(ip, cache):
+    """Return (result, from_cache); only successful lookups are cached."""
+    entry = cache.get(ip)
+    count_ti_cache(entry is not None)
+    if entry is not None:
+        return entry["result"], True
+
+    started = time.perf_counter()
+    res = abuse_check(ip)
+    observe_ti_lookup("abuseipdb", time.perf_counter() - started)
+
+    if res:
+        cache[ip] = {"result": res, "checked_at": time.time()}
+    return res, False
+
+
 def map_score(conf):
     """Convert confidence score (0–100) → 1–10 scale."""
     if conf < 10: return 1
@@ -59,41 +107,51 @@ def map_score(conf):
 
 
 # ---------------------- MAIN ----------------------
-def main():
-    print("🚀 Running Threat Intelligence enrichment...")
-    if not DATA_PATH.exists():
-        print(f"❌ Data file not found: {DATA_PATH}")
-        return
-
-    print(f"📘 Loading logs from: {DATA_PATH}")
-    df = pd.read_csv(DATA_PATH)
-
-    # Normalize IPs
+def enrich_frame(df):
+    """Normalize src_ip and add ti_score / ti_country / ti_asn (cached lookups)."""
     df["src_ip"] = df["src_ip"].fillna("unknown").apply(normalize_ip)
     valid_ips = [ip for ip in df["src_ip"].dropna().unique() if ip.count(".") == 3]
     print(f"🔍 Found {len(valid_ips)} valid IPs to check...")
 
     if not valid_ips:
         print(f"⚠️ No valid IPs found! Skipping enrichment.")
-        df.to_csv(OUT_PATH, index=False)
-        print(f"✅ Saved clean copy → {OUT_PATH}")
-        return
+        return df
 
     results = {}
+    cache = load_cache()
+    hits = 0
     for i, ip in enumerate(valid_ips, 1):
-        print(f"🔹 [{i}/{len(valid_ips)}] Checking {ip}...")
-        res = abuse_check(ip)
+        res, from_cache = cached_abuse_check(ip, cache)
         if res:
             results[ip] = res
+        if from_cache:
+            hits += 1
+            continue
+        print(f"🔹 [{i}/{len(valid_ips)}] Checked {ip}")
         sleep(RATE_LIMIT_DELAY)
+    save_cache(cache)
+    print(f"🗂️ TI cache hits: {hits}/{len(valid_ips)}")
 
     # Map results back to DataFrame
     df["ti_score"] = df["src_ip"].apply(lambda x: map_score(results.get(x, {}).get("abuseConfidenceScore", 0)))
     df["ti_country"] = df["src_ip"].apply(lambda x: results.get(x, {}).get("country", "NA"))
     df["ti_asn"] = df["src_ip"].apply(lambda x: results.get(x, {}).get("asn", "NA"))
+    return df
+
+
+def main():
+    print("🚀 Running Threat Intelligence enrichment...")
+    if not DATA_PATH.exists():
+        print(f"❌ Data file not found: {DATA_PATH}")
+        return
+
+    print(f"📘 Loading logs from: {DATA_PATH}")
+    df = enrich_frame(pd.read_csv(DATA_PATH))
 
     # Save enriched data
     df.to_csv(OUT_PATH, index=False)
+    write_events(df, stage="enriched")
+    export_batch_metrics("ti_enrich")
     print(f"✅ Threat-Intel enrichment complete → {OUT_PATH}")
 
 